@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares two benchmark reports generated by run_benchmarks.py.
+# The exit code is 1 when any phase got slower than the threshold.
+#
+#   python benchmarks/compare_benchmarks.py --threshold 0.10 before.json after.json
+
+import argparse
+import json
+import sys
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Mapping,
+        MutableSequence,
+        Sequence,
+    )
+
+
+def compare_reports(
+    baseline: "Mapping[str, Any]",
+    current: "Mapping[str, Any]",
+    threshold: "float",
+    min_time: "float",
+    per_file: "bool" = False,
+) -> "Sequence[str]":
+    """
+    It returns the description of every detected regression.
+    Timings below min_time are too noisy to be compared.
+    """
+    if baseline.get("corpus") != current.get("corpus"):
+        print(
+            "[WARNING] Reports were obtained from different corpora, so they are not comparable"
+        )
+
+    regressions: "MutableSequence[str]" = []
+    print(f"{'phase':12} {'baseline':>10} {'current':>10} {'change':>8}")
+    for phase, base_time in baseline["totals"].items():
+        cur_time = current["totals"].get(phase)
+        if cur_time is None:
+            continue
+        change = (cur_time - base_time) / base_time if base_time > 0 else 0.0
+        print(f"{phase:12} {base_time:10.4f} {cur_time:10.4f} {change:+8.1%}")
+        if change > threshold and cur_time >= min_time:
+            regressions.append(f"{phase}: {change:+.1%}")
+
+    if per_file:
+        for name, base_result in baseline["results"].items():
+            cur_result = current["results"].get(name)
+            if cur_result is None:
+                continue
+            for phase, base_timings in base_result["phases"].items():
+                cur_timings = cur_result["phases"].get(phase)
+                if cur_timings is None:
+                    continue
+                base_time = base_timings["median"]
+                cur_time = cur_timings["median"]
+                if base_time > 0 and cur_time >= min_time:
+                    change = (cur_time - base_time) / base_time
+                    if change > threshold:
+                        regressions.append(f"{name} {phase}: {change:+.1%}")
+
+    return regressions
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(description="Compare two benchmark reports")
+    ap.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Maximum allowed relative slowdown (default 0.10, i.e. 10%%)",
+    )
+    ap.add_argument(
+        "--min-time",
+        type=float,
+        default=0.005,
+        help="Timings below this number of seconds are not considered",
+    )
+    ap.add_argument(
+        "--per-file",
+        action="store_true",
+        help="Also check each file of the corpus, not only the totals",
+    )
+    ap.add_argument("baseline", help="Report from the reference commit")
+    ap.add_argument("current", help="Report from the commit being evaluated")
+    args = ap.parse_args(argv)
+
+    with open(args.baseline, mode="r", encoding="utf-8") as bH:
+        baseline = json.load(bH)
+    with open(args.current, mode="r", encoding="utf-8") as cH:
+        current = json.load(cH)
+
+    regressions = compare_reports(
+        baseline,
+        current,
+        threshold=args.threshold,
+        min_time=args.min_time,
+        per_file=args.per_file,
+    )
+    if len(regressions) > 0:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"\t{regression}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the configuration mode parsing against the full grammar over
+# a local corpus of configuration files (for instance, a checkout of
+# nf-core/modules or of several pipelines), checking both digested
+# trees are the same. When no path is given, synthetic configuration
+# files are generated. Some snippets which the subset could parse in
+# another way (declarations which are also command expressions) are
+# always checked too, and they must not fall back, or the check would
+# be pointless. The exit code is 1 when any tree differs.
+#
+#   python benchmarks/config_fast_path.py path/to/pipelines
+#   python benchmarks/config_fast_path.py --files 4 --units 2
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Iterator,
+        MutableMapping,
+        MutableSequence,
+        Sequence,
+        Tuple,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.config import (
+    CONFIG_PATH,
+    digest_groovy_config_content,
+    get_config_parser,
+    is_groovy_config_path,
+)
+from groovy_parser.grammar import get_inlined_groovy_parser
+from groovy_parser.parser import digest_groovy_content
+
+from benchmarks.synthetic_corpus import (
+    gen_config,
+)
+
+
+# Snippets which are both declarations and command expressions
+REGRESSION_SNIPPETS: "Sequence[str]" = [
+    "String s = 'x'\n",
+    "Foo bar\n",
+    "a { b c }\n",
+    "x = y\nz w\n",
+    "foo bar, baz\n",
+    "foo.bar baz\n",
+    "foo bar = 1\n",
+    "foo { a -> b c }\n",
+    "List<String> l = []\n",
+    "Foo[] a\n",
+    "foo bar() { }\n",
+    "x = (String) y\n",
+]
+
+
+def find_config_files(paths: "Sequence[str]") -> "Iterator[str]":
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if is_groovy_config_path(filename):
+                        yield os.path.join(dirpath, filename)
+        else:
+            yield path
+
+
+def load_contents(
+    paths: "Sequence[str]", files: "int", units: "int"
+) -> "Iterator[Tuple[str, str]]":
+    if len(paths) > 0:
+        for filename in find_config_files(paths):
+            with open(filename, mode="r", encoding="utf-8") as cH:
+                yield filename, cH.read()
+    else:
+        rng = random.Random(42)
+        for ifile in range(files):
+            yield f"synthetic_{ifile}.config", "\n".join(
+                gen_config(rng) for _ in range(units)
+            )
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Benchmark the configuration mode parsing against the full grammar"
+    )
+    ap.add_argument(
+        "--files", type=int, default=4, help="Synthetic configuration files"
+    )
+    ap.add_argument(
+        "--units",
+        type=int,
+        default=2,
+        help="Configuration blocks of each synthetic file",
+    )
+    ap.add_argument("--json", dest="json_output", help="Save the report as JSON")
+    ap.add_argument("paths", nargs="*", help="Configuration files or directories")
+    args = ap.parse_args(argv)
+
+    # Both parsers are built beforehand, so they are not accounted in the times
+    t0 = time.perf_counter()
+    get_config_parser()
+    config_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    get_inlined_groovy_parser(("sep", "nls"), ("script_statement",))
+    full_build = time.perf_counter() - t0
+    print(f"Parser build: {config_build:.2f}s configuration, {full_build:.2f}s full")
+
+    report: "MutableSequence[MutableMapping[str, Any]]" = []
+    config_time = 0.0
+    full_time = 0.0
+    mismatches = 0
+    snippets = [
+        (True, f"<snippet {isnippet}>", snippet)
+        for isnippet, snippet in enumerate(REGRESSION_SNIPPETS)
+    ]
+    contents = (
+        (False, filename, content)
+        for filename, content in load_contents(args.paths, args.files, args.units)
+    )
+    for is_snippet, filename, content in itertools.chain(snippets, contents):
+        entry: "MutableMapping[str, Any]" = {"file": filename}
+        t0 = time.perf_counter()
+        try:
+            result = digest_groovy_config_content(content)
+            entry["path"] = result.path
+            entry["reason"] = result.reason
+            config_tree = result.t_tree
+        except Exception as e:
+            config_tree = None
+            entry["path"] = "error"
+            entry["reason"] = str(e).splitlines()[0]
+        entry["config_time"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        try:
+            entry["agrees"] = digest_groovy_content(content) == config_tree
+        except Exception:
+            # Failing files are still accounted
+            entry["agrees"] = config_tree is None
+        entry["full_time"] = time.perf_counter() - t0
+        # The snippets are only meaningful when they are not parsed by the full grammar
+        if is_snippet and entry["path"] != CONFIG_PATH:
+            entry["agrees"] = False
+        if not entry["agrees"]:
+            mismatches += 1
+
+        print(
+            f"{entry['path']:6} {entry['config_time']:8.3f}s {entry['full_time']:8.3f}s {filename}"
+            + (f" ({entry['reason']})" if entry["reason"] else "")
+            + ("" if entry["agrees"] else " [DIFFERS]")
+        )
+        if not is_snippet:
+            config_time += entry["config_time"]
+            full_time += entry["full_time"]
+            report.append(entry)
+
+    num_config = sum(1 for entry in report if entry["path"] == CONFIG_PATH)
+    print(
+        f"\n{len(report)} files, {num_config} in configuration mode, {len(report) - num_config} fell back"
+    )
+    print(f"Configuration mode (with fallbacks) time: {config_time:.3f}s")
+    print(f"Full grammar time: {full_time:.3f}s")
+    if config_time > 0:
+        print(f"Speedup: {full_time / config_time:.1f}x")
+    print(f"Disagreements: {mismatches}")
+
+    if args.json_output is not None:
+        with open(args.json_output, mode="w", encoding="utf-8") as jH:
+            json.dump(report, jH, indent=4)
+
+    return 1 if mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Round trips a corpus through the concrete syntax tree writer, checking
+# the output is the very same source, and compares its time against
+# the per leaf writer of parser-groovy-writer.py over the digested tree.
+# Both exclude the parsing, which is done once. When no path is given,
+# the synthetic corpus is used. The exit code is 1 when any round trip
+# is not exact.
+#
+#   python benchmarks/cst_roundtrip.py --repeat 5 path/to/rnaseq
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Iterator,
+        MutableSequence,
+        Sequence,
+        Tuple,
+    )
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from groovy_parser.cst import (
+    build_groovy_cst,
+    write_groovy_cst,
+)
+from groovy_parser.grammar import get_groovy_parser
+from groovy_parser.parser import (
+    digest_lark_tree,
+    lex_groovy_content,
+)
+
+from benchmarks.earley_hotspots import (
+    EXTENSIONS,
+)
+from benchmarks.synthetic_corpus import (
+    generate_corpus,
+)
+
+
+def load_digested_writer() -> "Any":
+    # The script name is not a valid module name
+    spec = importlib.util.spec_from_file_location(
+        "parser_groovy_writer", os.path.join(ROOT_DIR, "parser-groovy-writer.py")
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.write_groovy
+
+
+def find_sources(paths: "Sequence[str]") -> "Iterator[Tuple[str, str]]":
+    """
+    Same as the one from earley_hotspots, but the line endings are kept
+    """
+    if len(paths) == 0:
+        for source in generate_corpus(files_per_kind=1, sizes={"medium": 4}):
+            yield source.name, source.content
+        return
+
+    for path in paths:
+        filenames = [path]
+        if os.path.isdir(path):
+            filenames = []
+            for dirpath, dirnames, dir_filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(dir_filenames):
+                    if filename.endswith(EXTENSIONS):
+                        filenames.append(os.path.join(dirpath, filename))
+
+        for filename in filenames:
+            with open(filename, mode="r", encoding="utf-8", newline="") as gH:
+                yield filename, gH.read()
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Round trip sources through the concrete syntax tree writer"
+    )
+    ap.add_argument(
+        "--repeat", type=int, default=3, help="Repetitions of each measurement"
+    )
+    ap.add_argument("paths", nargs="*", help="Files or directories to round trip")
+    args = ap.parse_args(argv)
+
+    write_groovy = load_digested_writer()
+    parser = get_groovy_parser()
+    cst_seconds = 0.0
+    digested_seconds = 0.0
+    inexact: "MutableSequence[str]" = []
+    for label, content in find_sources(args.paths):
+        lark_tokens = lex_groovy_content(content)
+        try:
+            # The type ignore is needed due the poor type annotation of
+            # lark, which assumes the input is always a string
+            tree = parser.parse(lark_tokens)  # type: ignore[arg-type]
+        except Exception as e:
+            print(f"[ERROR] {label}: {e.__class__.__name__}")
+            continue
+
+        cst_best = float("inf")
+        for _ in range(args.repeat):
+            out = io.StringIO()
+            t0 = time.perf_counter()
+            cst = build_groovy_cst(content, lark_tokens, tree=tree)
+            write_groovy_cst(cst, out)
+            cst_best = min(cst_best, time.perf_counter() - t0)
+        exact = out.getvalue() == content
+
+        digested_best = float("inf")
+        for _ in range(args.repeat):
+            out = io.StringIO()
+            t0 = time.perf_counter()
+            # The per leaf writer prints each leaf
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_groovy(
+                    digest_lark_tree(tree, prune=[]), out, reset_prev_wants_space=True
+                )
+            digested_best = min(digested_best, time.perf_counter() - t0)
+
+        cst_seconds += cst_best
+        digested_seconds += digested_best
+        if not exact:
+            inexact.append(label)
+        print(
+            f"[{'OK' if exact else 'DIFF':4}] {cst_best * 1000:9.2f}ms {digested_best * 1000:9.2f}ms {len(content):9} chars {label}"
+        )
+
+    print(
+        f"\nCST writer {cst_seconds:.3f}s, digested tree writer {digested_seconds:.3f}s"
+        + (f" ({digested_seconds / cst_seconds:.1f}x)" if cst_seconds > 0 else "")
+    )
+    if len(inexact) > 0:
+        print(f"{len(inexact)} round trips are not exact: {', '.join(inexact)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Ranks the rules of the grammar by the Earley items they create over
+# a corpus, in order to know where grammar optimizations pay off.
+# When no path is given, the synthetic corpus is used.
+#
+#   python benchmarks/earley_hotspots.py --top 30 path/to/rnaseq
+
+import argparse
+import json
+import os
+import sys
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Iterator,
+        MutableSequence,
+        Sequence,
+        Tuple,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.diagnostics import (
+    aggregate_earley_diagnostics,
+    diagnose_groovy_content,
+    EarleyDiagnostics,
+)
+
+from benchmarks.synthetic_corpus import (
+    generate_corpus,
+)
+
+EXTENSIONS = (".nf", ".config", ".groovy")
+
+
+def find_sources(paths: "Sequence[str]") -> "Iterator[Tuple[str, str]]":
+    if len(paths) == 0:
+        for source in generate_corpus(files_per_kind=1, sizes={"small": 1}):
+            yield source.name, source.content
+        return
+
+    for path in paths:
+        if os.path.isdir(path):
+            filenames = []
+            for dirpath, dirnames, dir_filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(dir_filenames):
+                    if filename.endswith(EXTENSIONS):
+                        filenames.append(os.path.join(dirpath, filename))
+        else:
+            filenames = [path]
+
+        for filename in filenames:
+            with open(filename, mode="r", encoding="utf-8") as gH:
+                yield filename, gH.read()
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Rank the grammar rules by their cost in the Earley chart"
+    )
+    ap.add_argument(
+        "--top", type=int, default=20, help="Number of entries of each ranking"
+    )
+    ap.add_argument("--json", dest="json_output", help="Save the report as JSON")
+    ap.add_argument("paths", nargs="*", help="Files or directories to diagnose")
+    args = ap.parse_args(argv)
+
+    diagnostics: "MutableSequence[EarleyDiagnostics]" = []
+    for label, content in find_sources(args.paths):
+        try:
+            _, diag = diagnose_groovy_content(content, label=label)
+        except Exception as e:
+            print(f"[ERROR] {label}: {e.__class__.__name__}")
+            continue
+        diagnostics.append(diag)
+        print(
+            f"{diag.parse_time:8.3f}s {diag.total_items:10} items {len(diag.columns) - 1:7} tokens {label}"
+        )
+
+    report = aggregate_earley_diagnostics(diagnostics, top=args.top)
+
+    print(f"\n{'rule':40} {'items':>10} {'share':>7} {'ambig':>6} {'discard':>7}")
+    for rule in report["rules"]:
+        print(
+            f"{rule['rule']:40} {rule['items']:10} {rule['share']:7.1%} {rule['chart_ambiguities']:6} {rule['discarded_alternatives']:7}"
+        )
+
+    if len(report["ambiguous_rules"]) > 0:
+        print("\nAmbiguities resolved in the final forest")
+        for rule in report["ambiguous_rules"]:
+            print(
+                f"{rule['rule']:40} {rule['resolved_ambiguities']:6} nodes {rule['discarded_alternatives']:6} discarded alternatives"
+            )
+
+    print("\nLargest chart columns")
+    for column in report["hot_columns"]:
+        print(
+            f"{column['items'] + column['to_scan']:7} items at {column['label']}:{column['line']}:{column['column']} before {column['token_type']}"
+        )
+
+    if args.json_output is not None:
+        with open(args.json_output, mode="w", encoding="utf-8") as jH:
+            json.dump(
+                {
+                    **report,
+                    "per_file": [diag.as_dict() for diag in diagnostics],
+                },
+                jH,
+                indent=4,
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Indexes a synthetic corpus in the SQLite feature index, checking the
+# incremental updates only parse what changed (nothing, a modified file,
+# nor a copied one), and times the queries against sweeping the cached
+# digested trees and extracting their features again. The exit code is
+# 1 when any update or query does not give the expected answer.
+#
+#   python benchmarks/feature_index.py --files 6
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Callable,
+        Sequence,
+        Set,
+        Tuple,
+    )
+
+    from groovy_parser.index import IndexUpdateSummary
+    from groovy_parser.parser import RuleNode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.index import GroovyFeatureIndex
+from groovy_parser.nextflow import extract_nextflow_features
+from groovy_parser.parser import parse_and_digest_groovy_file
+
+from benchmarks.synthetic_corpus import (
+    gen_process,
+    gen_workflow,
+)
+
+
+def sweep(
+    paths: "Sequence[str]", cache_directory: "str"
+) -> "Set[Tuple[str, str, Tuple[str, ...]]]":
+    """
+    It answers which processes (and their containers) are in the files,
+    extracting them from the cached digested trees
+    """
+    found = set()
+    for path in paths:
+        t_tree = parse_and_digest_groovy_file(path, cache_directory=cache_directory)
+        processes, _, _ = extract_nextflow_features(cast("RuleNode", t_tree))
+        for process in processes:
+            found.add((path, process.name, tuple(process.containers)))
+    return found
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Benchmark the incremental SQLite index of Nextflow features"
+    )
+    ap.add_argument("--files", type=int, default=6, help="Files of the corpus")
+    ap.add_argument("--repeat", type=int, default=20, help="Times each query is run")
+    args = ap.parse_args(argv)
+
+    rng = random.Random(42)
+    failures = 0
+
+    def check(label: "str", summary: "IndexUpdateSummary", **expected: "int") -> "None":
+        nonlocal failures
+        got = {key: getattr(summary, key) for key in expected}
+        ok = got == expected
+        if not ok:
+            failures += 1
+        print(
+            f"{label:24} {summary.elapsed_seconds:8.3f}s  files={summary.files} unchanged={summary.unchanged}"
+            f" rehashed={summary.rehashed} parsed={summary.parsed} removed={summary.removed}"
+            f" errors={summary.errors}"
+            + ("" if ok else f" [FAIL, expected {expected}]")
+        )
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "corpus")
+        cache_directory = os.path.join(workdir, "cache")
+        os.mkdir(corpus)
+        os.mkdir(cache_directory)
+        paths = []
+        for ifile in range(args.files):
+            path = os.path.join(corpus, f"module_{ifile}.nf")
+            with open(path, mode="w", encoding="utf-8") as wH:
+                wH.write(gen_process(rng) + "\n" + gen_workflow(rng))
+            paths.append(path)
+
+        with GroovyFeatureIndex(os.path.join(workdir, "features.db")) as index:
+
+            def update() -> "IndexUpdateSummary":
+                return index.update([corpus], cache_directory=cache_directory)
+
+            check("First update", update(), files=args.files, parsed=args.files)
+            check("Nothing changed", update(), unchanged=args.files, parsed=0)
+
+            with open(paths[0], mode="a", encoding="utf-8") as aH:
+                aH.write(gen_process(rng))
+            check("One file modified", update(), unchanged=args.files - 1, parsed=1)
+
+            copied = os.path.join(corpus, "copied.nf")
+            shutil.copyfile(paths[1], copied)
+            paths.append(copied)
+            check("One file copied", update(), rehashed=1, parsed=0)
+
+            os.unlink(paths[2])
+            del paths[2]
+            check("One file removed", update(), removed=1, parsed=0)
+
+            expected = sweep(paths, cache_directory)
+
+            def by_index() -> "Set[Tuple[str, str, Tuple[str, ...]]]":
+                return {
+                    (
+                        process.path,
+                        process.name,
+                        tuple(index.process_features(process)["container"]),
+                    )
+                    for process in index.processes()
+                }
+
+            indexed = by_index()
+            if indexed != expected:
+                failures += 1
+                print(f"[FAIL] Indexed processes {sorted(indexed)}")
+                print(f"       Swept processes {sorted(expected)}")
+
+            # A container and a name of some process, to look for
+            _, name, containers = sorted(expected)[0]
+            queries: "Sequence[Tuple[str, Callable[[], object], Callable[[], object]]]" = [
+                (
+                    "processes by name",
+                    lambda: sorted(p.path for p in index.processes(name=name)),
+                    lambda: sorted(
+                        path
+                        for path, p_name, _ in sweep(paths, cache_directory)
+                        if p_name == name
+                    ),
+                ),
+                (
+                    "processes by container",
+                    lambda: sorted(
+                        p.path for p in index.processes(container=containers[-1])
+                    ),
+                    lambda: sorted(
+                        path
+                        for path, _, p_containers in sweep(paths, cache_directory)
+                        if containers[-1] in p_containers
+                    ),
+                ),
+            ]
+            for label, indexed_query, swept_query in queries:
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    indexed_answer = indexed_query()
+                indexed_time = (time.perf_counter() - t0) / args.repeat
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    swept_answer = swept_query()
+                swept_time = (time.perf_counter() - t0) / args.repeat
+                agrees = indexed_answer == swept_answer
+                if not agrees:
+                    failures += 1
+                print(
+                    f"{label:24} {indexed_time * 1000:8.2f}ms indexed {swept_time * 1000:8.2f}ms swept"
+                    + ("" if agrees else " [DIFFERS]")
+                )
+
+    print(f"Failures: {failures}")
+    return 1 if failures > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
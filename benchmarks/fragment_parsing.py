@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Measures the cost of digesting fragments (expressions and closures
+# like the ones found in configuration files) from their own start
+# rule, against digesting them wrapped in a one line script. The
+# digested fragments are checked against the matching node of the
+# wrapped ones, and the exit code is 1 when any of them differs.
+#
+#   python benchmarks/fragment_parsing.py --repeat 5
+
+import argparse
+import os
+import sys
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Sequence,
+        Tuple,
+    )
+
+    from groovy_parser.parser import (
+        RuleNode,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.grammar import get_inlined_groovy_parser
+from groovy_parser.parser import (
+    digest_groovy_content,
+    digest_groovy_fragment,
+)
+
+# Each fragment is wrapped as the only element of a list, where it is an expression
+FRAGMENTS: "Sequence[Tuple[str, str]]" = [
+    ("expression", "params.outdir"),
+    ("expression", "6.GB * task.attempt"),
+    ("expression", "task.exitStatus in [143,137,104] ? 'retry' : 'finish'"),
+    ("expression", "params.genomes ? params.genomes['GRCh38'] : null"),
+    ("expression", '"${params.outdir}/pipeline_info/report.html"'),
+    ("closure", "{ check_max( 6.GB * task.attempt, 'memory' ) }"),
+    ("closure", "{ filename -> filename.equals('versions.yml') ? null : filename }"),
+]
+
+
+def wrapped_fragment(content: "str") -> "RuleNode":
+    """
+    It digests the fragment as the only element of a list, returning its node
+    """
+    t_tree = cast("RuleNode", digest_groovy_content(f"x = [{content}]\n"))
+    # The list is the right side of the assignment
+    assignment = cast("RuleNode", t_tree["children"][0])
+    t_list = cast("RuleNode", assignment["children"][-1])
+    # Between the brackets
+    return cast("RuleNode", t_list["children"][1])
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Benchmark the parsing of fragments from their own start rule"
+    )
+    ap.add_argument(
+        "--repeat", type=int, default=3, help="Times each fragment is digested"
+    )
+    args = ap.parse_args(argv)
+
+    # The parser is built beforehand, so it is not accounted in the times
+    get_inlined_groovy_parser(("sep", "nls"), ("script_statement",))
+
+    fragment_time = 0.0
+    wrapped_time = 0.0
+    mismatches = 0
+    for start, content in FRAGMENTS:
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            t_fragment = cast("RuleNode", digest_groovy_fragment(content, start=start))
+        elapsed_fragment = (time.perf_counter() - t0) / args.repeat
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            t_wrapped = wrapped_fragment(content)
+        elapsed_wrapped = (time.perf_counter() - t0) / args.repeat
+        fragment_time += elapsed_fragment
+        wrapped_time += elapsed_wrapped
+
+        # The wrapped node also has the rules the fragment is inlined in
+        rule = t_wrapped["rule"]
+        agrees = (
+            start in rule
+            and rule[rule.index(start) :] == t_fragment["rule"]
+            and t_wrapped["children"] == t_fragment["children"]
+        )
+        if not agrees:
+            mismatches += 1
+        print(
+            f"{start:10} {elapsed_fragment * 1000:8.1f}ms {elapsed_wrapped * 1000:8.1f}ms {content}"
+            + ("" if agrees else " [DIFFERS]")
+        )
+
+    print(
+        f"\n{len(FRAGMENTS)} fragments: {fragment_time * 1000:.1f}ms from their start rule, {wrapped_time * 1000:.1f}ms wrapped"
+    )
+    print(f"Disagreements: {mismatches}")
+
+    return 1 if mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
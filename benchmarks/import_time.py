@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Guards the import budget of the light modules, which must not import
+# lark, Pygments lexers nor the tokenizer until some content is parsed.
+# Each module is imported in a fresh interpreter with -X importtime,
+# keeping the best of several runs. The budgets are relative to the
+# import of the grammar module, which pulls in all the heavy ones, and
+# which is measured in the same run. The exit code is 1 when a forbidden
+# module is imported, or when an import exceeds its budget.
+#
+#   python benchmarks/import_time.py --budget-factor 2
+
+import argparse
+import os
+import subprocess
+import sys
+
+from typing import (
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        List,
+        Mapping,
+        MutableMapping,
+        Sequence,
+        Tuple,
+    )
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules which are only imported when some content is parsed
+FORBIDDEN_MODULES = [
+    "lark",
+    "pygments.lexer",
+    "groovy_parser.tokenizer",
+    "groovy_parser.lexer",
+    "groovy_parser.grammar",
+]
+
+# The module whose import loads everything, including the light modules
+BASELINE_MODULE = "groovy_parser.grammar"
+
+# Fractions of the cumulative import time of the baseline module. The
+# light modules take from a sixth to a half of it, so there is room
+# for the noise, while a heavy module sneaking in again brings them
+# close to the baseline
+BUDGETS = {
+    "groovy_parser.parser": 0.65,
+    "groovy_parser.nextflow": 0.4,
+    "groovy_parser.daemon": 0.75,
+    "groovy_parser.pipeline": 0.8,
+}
+
+
+class ImportTiming(NamedTuple):
+    module: "str"
+    # Cumulative microseconds, including the dependencies
+    cumulative: "int"
+    # The forbidden modules which were imported
+    forbidden: "Sequence[str]"
+
+
+def parse_importtime(stderr: "str") -> "Mapping[str, int]":
+    """
+    It returns the cumulative import time of each module reported
+    by -X importtime, which are the same module names
+    """
+    cumulative: "MutableMapping[str, int]" = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative[fields[2].strip()] = int(fields[1])
+
+    return cumulative
+
+
+def time_import(module: "str") -> "ImportTiming":
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [ROOT_DIR] + ([env["PYTHONPATH"]] if "PYTHONPATH" in env else [])
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    cumulative = parse_importtime(result.stderr)
+
+    return ImportTiming(
+        module=module,
+        cumulative=cumulative[module],
+        forbidden=[name for name in FORBIDDEN_MODULES if name in cumulative],
+    )
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Check the import time budget of the light modules"
+    )
+    ap.add_argument(
+        "--repeat", type=int, default=5, help="Repetitions of each measurement"
+    )
+    ap.add_argument(
+        "--budget-factor",
+        type=float,
+        default=1.0,
+        help="Factor applied to the budgets, for noisy machines",
+    )
+    args = ap.parse_args(argv)
+
+    # The measurements are interleaved, so the baseline and the light
+    # modules go through the same load of the machine
+    timings: "MutableMapping[str, List[ImportTiming]]" = {
+        module: [] for module in [BASELINE_MODULE, *BUDGETS]
+    }
+    for _ in range(args.repeat):
+        for module, module_timings in timings.items():
+            module_timings.append(time_import(module))
+
+    baseline = min(timing.cumulative for timing in timings[BASELINE_MODULE])
+    print(f"[BASE ] {BASELINE_MODULE:24} {baseline / 1000:8.1f}ms")
+
+    failures = 0
+    for module, budget in BUDGETS.items():
+        best = min(timings[module], key=lambda timing: timing.cumulative)
+        forbidden = sorted(set(name for t in timings[module] for name in t.forbidden))
+        limit = baseline * budget * args.budget_factor
+        status = "OK"
+        if len(forbidden) > 0:
+            status = "HEAVY"
+        elif best.cumulative > limit:
+            status = "SLOW"
+        if status != "OK":
+            failures += 1
+        print(
+            f"[{status:5}] {module:24} {best.cumulative / 1000:8.1f}ms (budget {limit / 1000:.1f}ms, {best.cumulative / baseline:.0%} of the baseline)"
+            + (f" imports {', '.join(forbidden)}" if len(forbidden) > 0 else "")
+        )
+
+    return 1 if failures > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
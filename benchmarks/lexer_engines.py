@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the Lark token streams and the throughput of the combined
+# tokenizer pipeline and the fused lexer against the original one
+# (restricted tokenizer and lexer), which is the reference. The
+# positions from the fused lexer are also checked against the text.
+# When no path is given, the synthetic corpus is used. The exit code
+# is 1 when any stream differs.
+#
+#   python benchmarks/lexer_engines.py --repeat 5 path/to/rnaseq
+
+import argparse
+import os
+import sys
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Callable,
+        Optional,
+        Sequence,
+        Tuple,
+    )
+
+    from lark.common import (
+        LexerConf,
+    )
+    from lark.lexer import (
+        Token as LarkToken,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.lexer import (
+    FusedGroovyLexer,
+    PygmentsGroovyLexer,
+)
+from groovy_parser.tokenizer import (
+    CombinedGroovyRestrictedTokenizer,
+    GroovyRestrictedTokenizer,
+)
+
+from benchmarks.earley_hotspots import (
+    find_sources,
+)
+
+
+def original_lex(content: "str") -> "Sequence[LarkToken]":
+    lexer = PygmentsGroovyLexer(cast("LexerConf", None))
+    return list(lexer.lex(list(GroovyRestrictedTokenizer().get_tokens(content))))
+
+
+def combined_lex(content: "str") -> "Sequence[LarkToken]":
+    lexer = PygmentsGroovyLexer(cast("LexerConf", None))
+    return list(
+        lexer.lex(list(CombinedGroovyRestrictedTokenizer().get_tokens(content)))
+    )
+
+
+def fused_lex(content: "str") -> "Sequence[LarkToken]":
+    return list(FusedGroovyLexer().lex(content))
+
+
+def check_positions(
+    content: "str", lark_tokens: "Sequence[LarkToken]"
+) -> "Optional[LarkToken]":
+    """
+    It returns the first token whose position does not match the text
+    """
+    text = content.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n")
+    line_starts = [0]
+    for pos, c in enumerate(text):
+        if c == "\n":
+            line_starts.append(pos + 1)
+    for tok in lark_tokens:
+        assert tok.start_pos is not None and tok.end_pos is not None
+        assert tok.line is not None and tok.column is not None
+        if text[tok.start_pos : tok.end_pos] not in tok.value[2]:
+            return tok
+        if line_starts[tok.line - 1] + tok.column != tok.start_pos:
+            return tok
+
+    return None
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Compare the lexing pipelines against the original one"
+    )
+    ap.add_argument(
+        "--repeat", type=int, default=3, help="Repetitions of each measurement"
+    )
+    ap.add_argument("paths", nargs="*", help="Files or directories to lex")
+    args = ap.parse_args(argv)
+
+    sources = list(find_sources(args.paths))
+    num_bytes = sum(len(content.encode("utf-8")) for _, content in sources)
+
+    mismatches = 0
+    for label, content in sources:
+        reference = [(tok.type, tok.value) for tok in original_lex(content)]
+        fused_tokens = fused_lex(content)
+        for name, lark_tokens in (
+            ("combined", combined_lex(content)),
+            ("fused", fused_tokens),
+        ):
+            if [(tok.type, tok.value) for tok in lark_tokens] != reference:
+                mismatches += 1
+                print(f"[MISMATCH {name}] {label}")
+        wrong = check_positions(content, fused_tokens)
+        if wrong is not None:
+            mismatches += 1
+            print(f"[POSITION] {label}:{wrong.line}:{wrong.column} {wrong.type}")
+
+    engines: "Sequence[Tuple[str, Callable[[str], Sequence[LarkToken]]]]" = [
+        ("original", original_lex),
+        ("combined", combined_lex),
+        ("fused", fused_lex),
+    ]
+    for name, engine in engines:
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for _, content in sources:
+                engine(content)
+            elapsed = time.perf_counter() - t0
+            if best is None or elapsed < best:
+                best = elapsed
+        assert best is not None
+        print(f"{name:8} {best:8.4f}s {num_bytes / best / 1024 / 1024:8.2f} MiB/s")
+
+    print(f"\n{len(sources)} files, {mismatches} mismatching token streams")
+
+    return 1 if mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the token level Nextflow scanner against the full parser
+# over a local corpus (for instance, a checkout of nf-core/modules).
+#
+#   python benchmarks/nextflow_scanner.py --check path/to/modules
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Iterator,
+        MutableMapping,
+        MutableSequence,
+        Sequence,
+    )
+
+    from groovy_parser.parser import (
+        RuleNode,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.nextflow import (
+    extract_nextflow_features,
+)
+from groovy_parser.parser import (
+    parse_and_digest_groovy_content,
+)
+from groovy_parser.scanner import (
+    PARSE_PATH,
+    scan_nextflow_content,
+)
+
+
+def find_nextflow_files(paths: "Sequence[str]") -> "Iterator[str]":
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(".nf"):
+                        yield os.path.join(dirpath, filename)
+        else:
+            yield path
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Benchmark the Nextflow token scanner against the full parser"
+    )
+    ap.add_argument(
+        "--check",
+        action="store_true",
+        help="Also run the full parser on every file, comparing both results",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        dest="cache_directory",
+        help="Caching directory used by the full parser",
+    )
+    ap.add_argument("--json", dest="json_output", help="Save the report as JSON")
+    ap.add_argument("paths", nargs="+", help="Files or directories to scan")
+    args = ap.parse_args(argv)
+
+    report: "MutableSequence[MutableMapping[str, Any]]" = []
+    scan_time = 0.0
+    full_time = 0.0
+    mismatches = 0
+    for filename in find_nextflow_files(args.paths):
+        with open(filename, mode="r", encoding="utf-8") as nH:
+            content = nH.read()
+
+        entry: "MutableMapping[str, Any]" = {"file": filename}
+        t0 = time.perf_counter()
+        try:
+            result = scan_nextflow_content(
+                content, cache_directory=args.cache_directory
+            )
+            entry["path"] = result.path
+            entry["reason"] = result.reason
+        except Exception as e:
+            result = None
+            entry["path"] = "error"
+            entry["reason"] = str(e)
+        entry["scan_time"] = time.perf_counter() - t0
+        scan_time += entry["scan_time"]
+
+        if args.check:
+            t0 = time.perf_counter()
+            try:
+                t_tree = parse_and_digest_groovy_content(
+                    content, cache_directory=args.cache_directory
+                )
+                features = (
+                    extract_nextflow_features(cast("RuleNode", t_tree))
+                    if "rule" in t_tree
+                    else ([], [], [])
+                )
+                entry["agrees"] = result is not None and tuple(features) == tuple(
+                    result[0:3]
+                )
+            except Exception:
+                # Failing files are still accounted
+                entry["agrees"] = result is None
+            entry["full_time"] = time.perf_counter() - t0
+            full_time += entry["full_time"]
+            if not entry["agrees"]:
+                mismatches += 1
+
+        print(
+            f"{entry['path']:5} {entry['scan_time']:8.3f}s {filename}"
+            + (f" ({entry['reason']})" if entry["reason"] else "")
+        )
+        report.append(entry)
+
+    num_parsed = sum(1 for entry in report if entry["path"] == PARSE_PATH)
+    print(
+        f"\n{len(report)} files, {len(report) - num_parsed} scanned, {num_parsed} parsed"
+    )
+    print(f"Scanner (with fallbacks) time: {scan_time:.3f}s")
+    if args.check:
+        print(f"Full parser time: {full_time:.3f}s")
+        if scan_time > 0:
+            print(f"Speedup: {full_time / scan_time:.1f}x")
+        print(f"Disagreements: {mismatches}")
+
+    if args.json_output is not None:
+        with open(args.json_output, mode="w", encoding="utf-8") as jH:
+            json.dump(report, jH, indent=4)
+
+    return 1 if mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
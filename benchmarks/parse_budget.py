@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Runs a batch of synthetic sources along with a pathological one (a huge
+# configuration file) under a parsing budget, twice over the same cache.
+# The first run has to cancel the pathological source without stalling
+# the rest of the batch, whose digested trees are checked against the
+# ones parsed without budget, and the second one has to find it in the
+# cache. The exit code is 1 when any of these does not happen.
+#
+#   python benchmarks/parse_budget.py --timeout 30 -j 4
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        MutableSequence,
+        Sequence,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.batch import digest_groovy_files
+from groovy_parser.budget import budget_from_limits
+from groovy_parser.parser import (
+    digest_groovy_content,
+    GroovyParseStats,
+)
+
+from benchmarks.synthetic_corpus import (
+    gen_config,
+    generate_corpus,
+)
+
+PATHOLOGICAL_NAME = "pathological.config"
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Check a batch with a pathological source under a parsing budget"
+    )
+    ap.add_argument(
+        "--timeout", type=float, default=30.0, help="Seconds of each parsing"
+    )
+    ap.add_argument("--max-memory", type=float, help="MiB of each worker")
+    ap.add_argument(
+        "-j", "--jobs", type=int, default=2, help="Number of worker processes"
+    )
+    ap.add_argument(
+        "--units",
+        type=int,
+        default=32,
+        help="Configuration blocks of the pathological source",
+    )
+    args = ap.parse_args(argv)
+
+    budget = budget_from_limits(args.timeout, args.max_memory)
+    assert budget is not None
+    corpus = generate_corpus(files_per_kind=1, sizes={"small": 1})
+    rng = random.Random(42)
+    pathological = "\n".join(gen_config(rng) for _ in range(args.units))
+
+    failures: "MutableSequence[str]" = []
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = []
+        for source in corpus:
+            path = os.path.join(workdir, source.name.replace("/", "_"))
+            with open(path, mode="w", encoding="utf-8") as sH:
+                sH.write(source.content)
+            paths.append(path)
+        pathological_path = os.path.join(workdir, PATHOLOGICAL_NAME)
+        with open(pathological_path, mode="w", encoding="utf-8") as sH:
+            sH.write(pathological)
+        paths.insert(len(paths) // 2, pathological_path)
+        cache_directory = os.path.join(workdir, "cache")
+        os.mkdir(cache_directory)
+
+        for run in ("first", "second"):
+            t0 = time.perf_counter()
+            batch = digest_groovy_files(
+                paths,
+                cache_directory=cache_directory,
+                max_workers=args.jobs,
+                budget=budget,
+            )
+            elapsed = time.perf_counter() - t0
+            entry = batch.entries[pathological_path]
+            exceeded = entry.budget_exceeded
+            print(
+                f"{run} run: {elapsed:.2f}s, {batch.summary.budget_exceeded} exceeded the budget"
+            )
+            if exceeded is None:
+                failures.append(f"{run} run: the pathological source was not cancelled")
+            else:
+                print(
+                    f"\t{PATHOLOGICAL_NAME} ({len(pathological)} chars, {entry.stats.cache_outcome}): {exceeded}"
+                )
+            if run == "second" and (
+                entry.stats.cache_outcome != GroovyParseStats.CACHE_NEGATIVE_HIT
+            ):
+                failures.append(f"{run} run: the pathological source was parsed again")
+            for path in paths:
+                if path != pathological_path and batch.entries[path].t_tree is None:
+                    failures.append(
+                        f"{run} run: {path} failed: {batch.entries[path].error}"
+                    )
+
+        # The rest of the batch is not affected by the budget
+        for source, path in zip(corpus, (p for p in paths if p != pathological_path)):
+            if batch.entries[path].t_tree != digest_groovy_content(source.content):
+                failures.append(
+                    f"{source.name} differs from the parsing without budget"
+                )
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+
+    return 1 if len(failures) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
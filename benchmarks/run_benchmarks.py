@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Per phase benchmarks over the synthetic corpus. Results are saved
+# as JSON, so they can be compared across commits with
+# compare_benchmarks.py
+#
+#   python benchmarks/run_benchmarks.py -o before.json
+#   (apply some change to the grammar, the tokenizer or the lexer)
+#   python benchmarks/run_benchmarks.py -o after.json
+#   python benchmarks/compare_benchmarks.py before.json after.json
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Callable,
+        Mapping,
+        MutableMapping,
+        Optional,
+        Sequence,
+        Tuple,
+    )
+
+    from lark import (
+        Lark,
+    )
+    from lark.common import (
+        LexerConf,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lark import __version__ as lark_version
+from pygments import __version__ as pygments_version
+
+from groovy_parser.lexer import (
+    FusedGroovyLexer,
+    PygmentsGroovyLexer,
+)
+from groovy_parser.grammar import (
+    create_groovy_parser,
+    create_inlined_groovy_parser,
+)
+from groovy_parser.parser import (
+    count_tree_nodes,
+    digest_lark_tree,
+    parse_and_digest_groovy_content,
+)
+from groovy_parser.tokenizer import (
+    GroovyRestrictedTokenizer,
+)
+
+from benchmarks.synthetic_corpus import (
+    generate_corpus,
+    SIZES,
+)
+
+PHASES = [
+    "tokenize",
+    "preprocess",
+    "lex",
+    "fused_lex",
+    "parse",
+    "digest",
+    "cache_write",
+    "cache_read",
+]
+
+
+def timed(
+    func: "Callable[[], Any]", repeat: "int"
+) -> "Tuple[Any, Mapping[str, float]]":
+    timings = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+
+    return result, {
+        "min": min(timings),
+        "median": statistics.median(timings),
+    }
+
+
+def git_revision() -> "Optional[str]":
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def benchmark_content(
+    content: "str", parser: "Lark", repeat: "int", cache_dir: "str"
+) -> "MutableMapping[str, Any]":
+    lexer = PygmentsGroovyLexer(cast("LexerConf", None))
+    phases: "MutableMapping[str, Mapping[str, float]]" = {}
+
+    tokens, phases["tokenize"] = timed(
+        lambda: list(GroovyRestrictedTokenizer().get_tokens(content)), repeat
+    )
+    preproc, phases["preprocess"] = timed(
+        lambda: list(lexer._preprocess_tokens(tokens)), repeat
+    )
+    lark_tokens, phases["lex"] = timed(lambda: list(lexer.lex(tokens)), repeat)
+    # Tokenizing, preprocessing and lexing in a single pass
+    _, phases["fused_lex"] = timed(
+        lambda: list(FusedGroovyLexer().lex(content)), repeat
+    )
+    # The Lark parse includes the preprocessing and lexing steps,
+    # as the lexer is called by the parser itself
+    tree, phases["parse"] = timed(lambda: parser.parse(tokens), repeat)
+    t_tree, phases["digest"] = timed(lambda: digest_lark_tree(tree), repeat)
+
+    cache_file = os.path.join(cache_dir, "bench.json.gz")
+
+    def cache_write() -> None:
+        with gzip.open(cache_file, mode="wt", encoding="utf-8") as jH:
+            json.dump(t_tree, jH, sort_keys=True)
+
+    _, phases["cache_write"] = timed(cache_write, repeat)
+
+    # A cache hit, which includes the computation of the cache key
+    parse_and_digest_groovy_content(content, cache_directory=cache_dir)
+    _, phases["cache_read"] = timed(
+        lambda: parse_and_digest_groovy_content(content, cache_directory=cache_dir),
+        repeat,
+    )
+
+    return {
+        "bytes": len(content.encode("utf-8")),
+        "lines": content.count("\n") + 1,
+        "pygments_tokens": len(tokens),
+        "preprocessed_tokens": len(preproc),
+        "lark_tokens": len(lark_tokens),
+        "tree_nodes": count_tree_nodes(tree),
+        "phases": phases,
+    }
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Per phase benchmarks over a deterministic synthetic corpus"
+    )
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--files-per-kind", type=int, default=1)
+    ap.add_argument(
+        "--sizes",
+        default="small,medium",
+        help=f"Comma separated list of sizes to benchmark, from {', '.join(SIZES)}",
+    )
+    ap.add_argument(
+        "--repeat", type=int, default=1, help="Repetitions of each measurement"
+    )
+    ap.add_argument(
+        "--inlined",
+        action="store_true",
+        help="Use the parser from the inlined grammar, whose trees are only suitable for digestion",
+    )
+    ap.add_argument("-o", "--output", help="JSON file where results are saved")
+    args = ap.parse_args(argv)
+
+    sizes = {size: SIZES[size] for size in args.sizes.split(",")}
+    corpus = generate_corpus(
+        seed=args.seed, files_per_kind=args.files_per_kind, sizes=sizes
+    )
+
+    t0 = time.perf_counter()
+    parser = create_inlined_groovy_parser() if args.inlined else create_groovy_parser()
+    parser_build = time.perf_counter() - t0
+
+    results: "MutableMapping[str, Any]" = {}
+    totals = {phase: 0.0 for phase in PHASES}
+    with tempfile.TemporaryDirectory(prefix="groovy-bench") as cache_dir:
+        for source in corpus:
+            result = benchmark_content(source.content, parser, args.repeat, cache_dir)
+            results[source.name] = result
+            for phase in PHASES:
+                totals[phase] += result["phases"][phase]["median"]
+            print(
+                f"{source.name:28} "
+                + " ".join(
+                    f"{phase}={result['phases'][phase]['median']:.4f}"
+                    for phase in PHASES
+                )
+            )
+
+    print(f"\nparser_build={parser_build:.4f}")
+    for phase in PHASES:
+        print(f"{phase:12} {totals[phase]:10.4f}s")
+
+    report = {
+        "metadata": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "lark": lark_version,
+            "pygments": pygments_version,
+            "inlined": args.inlined,
+        },
+        "corpus": {
+            "seed": args.seed,
+            "files_per_kind": args.files_per_kind,
+            "sizes": sizes,
+            "repeat": args.repeat,
+        },
+        "parser_build": parser_build,
+        "totals": totals,
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, mode="w", encoding="utf-8") as oH:
+            json.dump(report, oH, indent=4, sort_keys=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the full parsing against the memoized top level statements
+# over a corpus, checking the digested trees are the same, and reporting
+# the hit rates and the times. When no path is given, the synthetic
+# corpus is used, along with forks which join pairs of its sources.
+# The exit code is 1 when any digested tree differs.
+#
+#   python benchmarks/statement_memo.py path/to/pipelines
+
+import argparse
+import os
+import sys
+import time
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Iterator,
+        MutableSequence,
+        Sequence,
+        Tuple,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.memo import (
+    digest_groovy_content_memoized,
+    StatementDigestMemo,
+)
+from groovy_parser.parser import (
+    digest_groovy_content,
+    GroovyParseStats,
+)
+
+from benchmarks.earley_hotspots import (
+    find_sources,
+)
+from benchmarks.synthetic_corpus import (
+    generate_corpus,
+)
+
+
+def synthetic_forks() -> "Iterator[Tuple[str, str]]":
+    """
+    The synthetic sources, followed by the forks, which share
+    all their top level statements with two of them
+    """
+    corpus = generate_corpus(files_per_kind=2, sizes={"small": 1, "medium": 2})
+    for source in corpus:
+        yield source.name, source.content
+
+    for i_source, source in enumerate(corpus):
+        for other in corpus[i_source + 1 :]:
+            if other.kind == source.kind and other.size == source.size:
+                yield f"fork/{source.name}+{os.path.basename(other.name)}", "\n".join(
+                    (source.content, other.content)
+                )
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Compare the full parsing against the memoized statements"
+    )
+    ap.add_argument(
+        "--max-entries",
+        type=int,
+        default=65536,
+        help="Number of digested statements kept in the memo",
+    )
+    ap.add_argument("paths", nargs="*", help="Files or directories to parse")
+    args = ap.parse_args(argv)
+
+    memo = StatementDigestMemo(max_entries=args.max_entries)
+    sources = find_sources(args.paths) if len(args.paths) > 0 else synthetic_forks()
+    full_seconds = 0.0
+    memo_seconds = 0.0
+    mismatches: "MutableSequence[str]" = []
+    failures = 0
+    for label, content in sources:
+        t_full = time.perf_counter()
+        try:
+            expected = digest_groovy_content(content)
+        except Exception as e:
+            print(f"[ERROR] {label}: {e.__class__.__name__}")
+            failures += 1
+            continue
+        t_memo = time.perf_counter()
+        stats = GroovyParseStats()
+        t_tree = digest_groovy_content_memoized(content, stats=stats, memo=memo)
+        t_end = time.perf_counter()
+
+        full_seconds += t_memo - t_full
+        memo_seconds += t_end - t_memo
+        status = "OK"
+        if t_tree != expected:
+            status = "DIFF"
+            mismatches.append(label)
+        print(
+            f"[{status:4}] {t_memo - t_full:8.3f}s {t_end - t_memo:8.3f}s {stats.statement_hits:5} hits {stats.statement_misses:5} misses {label}"
+        )
+
+    print(
+        f"\nHit rate {memo.hit_rate:.1%} ({memo.hits} hits, {memo.misses} misses),"
+        f" {memo.fallbacks} full parse fallbacks, {failures} unparsable"
+    )
+    print(
+        f"Full parsing {full_seconds:.2f}s, memoized {memo_seconds:.2f}s"
+        + (f" ({full_seconds / memo_seconds:.2f}x)" if memo_seconds > 0 else "")
+    )
+    if len(mismatches) > 0:
+        print(f"{len(mismatches)} digested trees differ: {', '.join(mismatches)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the peak memory and the time of writing the digested tree of
+# a large content as JSON, either from the whole digested tree or
+# streaming it one top level statement at a time. Each way is run in
+# its own process, whose peak resident set size is reported. Both
+# outputs are hashed instead of kept, and the exit code is 1 when they
+# differ. When no file is given, a large synthetic configuration file
+# is generated.
+#
+#   python benchmarks/stream_digest.py --units 32
+#   python benchmarks/stream_digest.py path/to/huge/nextflow.config
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        IO,
+        Optional,
+        Sequence,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.grammar import get_inlined_groovy_parser
+from groovy_parser.parser import digest_groovy_content
+from groovy_parser.stream import (
+    DEFAULT_WINDOW_TOKENS,
+    write_digested_statements,
+)
+
+from benchmarks.synthetic_corpus import (
+    gen_config,
+)
+
+MODES = ("whole", "streamed")
+
+
+class HashingSink:
+    """
+    File-like object which only keeps the hash and the size of what it is written
+    """
+
+    def __init__(self) -> None:
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: "str") -> "int":
+        self.hash.update(data.encode("utf-8"))
+        self.size += len(data)
+        return len(data)
+
+
+class Measurement(NamedTuple):
+    seconds: "float"
+    # Peak resident set size, in KiB
+    max_rss: "int"
+    size: "int"
+    digest: "str"
+
+
+def load_content(path: "Optional[str]", units: "int") -> "str":
+    if path is not None:
+        with open(path, mode="r", encoding="utf-8") as gH:
+            return gH.read()
+
+    rng = random.Random(42)
+    return "\n".join(gen_config(rng) for _ in range(units))
+
+
+def run_mode(mode: "str", content: "str", window_tokens: "int") -> "Measurement":
+    # The parser is built beforehand, so it is not accounted in the time
+    get_inlined_groovy_parser(("sep", "nls"), ("script_statement",))
+
+    sink = HashingSink()
+    t0 = time.perf_counter()
+    if mode == "whole":
+        json.dump(digest_groovy_content(content), cast("IO[str]", sink))
+    else:
+        write_digested_statements(
+            content, cast("IO[str]", sink), window_tokens=window_tokens
+        )
+    elapsed = time.perf_counter() - t0
+
+    return Measurement(
+        seconds=elapsed,
+        max_rss=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        size=sink.size,
+        digest=sink.hash.hexdigest(),
+    )
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Compare the whole and the streamed JSON digestion of a large content"
+    )
+    ap.add_argument(
+        "--units",
+        type=int,
+        default=8,
+        help="Configuration blocks of the generated content",
+    )
+    ap.add_argument(
+        "--window-tokens",
+        type=int,
+        default=DEFAULT_WINDOW_TOKENS,
+        help="Tokens parsed at once when streaming",
+    )
+    # Internal option, used to run each way in its own process
+    ap.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    ap.add_argument("path", nargs="?", help="File to digest")
+    args = ap.parse_args(argv)
+
+    content = load_content(args.path, args.units)
+    if args.mode is not None:
+        print(json.dumps(run_mode(args.mode, content, args.window_tokens)._asdict()))
+        return 0
+
+    label = (
+        args.path
+        if args.path is not None
+        else f"synthetic configuration with {args.units} blocks"
+    )
+    print(f"{label}: {len(content)} characters")
+
+    measurements = {}
+    for mode in MODES:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode]
+            + [f"--units={args.units}", f"--window-tokens={args.window_tokens}"]
+            + ([args.path] if args.path is not None else []),
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True,
+        )
+        measurement = Measurement(**json.loads(result.stdout))
+        measurements[mode] = measurement
+        print(
+            f"{mode:8}: {measurement.seconds:8.2f}s {measurement.max_rss / 1024:8.1f} MiB peak RSS"
+        )
+    print(f"JSON output {measurements['whole'].size} characters")
+
+    if measurements["whole"].digest != measurements["streamed"].digest:
+        print("The streamed JSON differs from the whole one")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Deterministic generator of realistic Nextflow and Groovy sources,
+# so benchmarks do not depend on network access or external checkouts.
+#
+#   python benchmarks/synthetic_corpus.py --seed 42 /tmp/corpus
+
+import argparse
+import os
+import random
+import sys
+
+from typing import (
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Callable,
+        Mapping,
+        MutableSequence,
+        Sequence,
+    )
+
+TOOLS = [
+    "samtools",
+    "bwa",
+    "fastqc",
+    "multiqc",
+    "bedtools",
+    "star",
+    "salmon",
+    "trimgalore",
+    "picard",
+    "gatk4",
+    "bcftools",
+    "minimap2",
+]
+
+SUBCOMMANDS = ["sort", "index", "view", "merge", "mem", "quant", "stats", "filter"]
+
+LABELS = ["process_single", "process_low", "process_medium", "process_high"]
+
+WORDS = [
+    "reads",
+    "bam",
+    "fasta",
+    "index",
+    "genome",
+    "versions",
+    "report",
+    "summary",
+    "counts",
+    "sample",
+]
+
+# Sizes are expressed as the number of top level units in each source
+SIZES: "Mapping[str, int]" = {
+    "small": 1,
+    "medium": 4,
+    "large": 12,
+}
+
+
+class SyntheticSource(NamedTuple):
+    name: "str"
+    kind: "str"
+    size: "str"
+    content: "str"
+
+
+def _tool(rng: "random.Random") -> "str":
+    return rng.choice(TOOLS) + "_" + rng.choice(SUBCOMMANDS)
+
+
+def gen_process(rng: "random.Random") -> "str":
+    tool = _tool(rng)
+    name = tool.upper()
+    version = f"{rng.randint(1, 3)}.{rng.randint(0, 20)}"
+    words = rng.sample(WORDS, 3)
+    lines = [
+        f"process {name} {{",
+        '    tag "$meta.id"',
+        f"    label '{rng.choice(LABELS)}'",
+        "",
+        f"    conda \"bioconda::{tool.split('_')[0]}={version}\"",
+        "    container \"${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?",
+        f"        'https://depot.galaxyproject.org/singularity/{tool}:{version}--h00cdaf9_0' :",
+        f"        'biocontainers/{tool}:{version}--h00cdaf9_0' }}\"",
+        "",
+        "    input:",
+        f"    tuple val(meta), path({words[0]})",
+        f"    path {words[1]}",
+        "",
+        "    output:",
+        f'    tuple val(meta), path("*.{words[2]}"), emit: {words[2]}',
+        '    path "versions.yml"                , emit: versions',
+        "",
+        "    when:",
+        "    task.ext.when == null || task.ext.when",
+        "",
+        "    script:",
+        "    def args = task.ext.args ?: ''",
+        '    def prefix = task.ext.prefix ?: "${meta.id}"',
+        '    def threads = task.cpus > 1 ? "-@ ${task.cpus - 1}" : ""',
+        '    """',
+        f"    {tool.split('_')[0]} {tool.split('_')[1]} \\\\",
+        "        $args \\\\",
+        "        $threads \\\\",
+        f"        -o ${{prefix}}.{words[2]} \\\\",
+        f"        ${words[0]}",
+        "",
+        "    cat <<-END_VERSIONS > versions.yml",
+        '    "${task.process}":',
+        f"        {tool.split('_')[0]}: \\$(echo \\$({tool.split('_')[0]} --version 2>&1) | sed 's/^.*{tool} //')",
+        "    END_VERSIONS",
+        '    """',
+        "}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def gen_workflow(rng: "random.Random") -> "str":
+    tools = [_tool(rng).upper() for _ in range(rng.randint(2, 4))]
+    name = "_".join(rng.sample(WORDS, 2)).upper()
+    lines = []
+    for tool in tools:
+        lines.append(
+            f"include {{ {tool} }} from '../../modules/nf-core/{tool.lower().replace('_', '/')}/main'"
+        )
+    lines.extend(
+        [
+            "",
+            f"workflow {name} {{",
+            "    take:",
+            "    ch_input // channel: [ val(meta), [ reads ] ]",
+            "",
+            "    main:",
+            "    ch_versions = Channel.empty()",
+            "    ch_input",
+            "        .map { meta, reads -> [ meta + [ single_end: reads.size() == 1 ], reads ] }",
+            "        .set { ch_reads }",
+        ]
+    )
+    prev = "ch_reads"
+    for tool in tools:
+        lines.extend(
+            [
+                f"    {tool} ( {prev}, params.fasta ? file(params.fasta) : [] )",
+                f"    ch_versions = ch_versions.mix({tool}.out.versions.first())",
+            ]
+        )
+        prev = f"{tool}.out.{rng.choice(WORDS)}"
+    lines.extend(
+        [
+            "",
+            "    emit:",
+            f"    result   = {prev}",
+            "    versions = ch_versions",
+            "}",
+            "",
+        ]
+    )
+    return "\n".join(lines)
+
+
+def gen_config(rng: "random.Random") -> "str":
+    lines = ["params {"]
+    for word in rng.sample(WORDS, 4):
+        value = rng.choice(
+            ["null", "false", "true", str(rng.randint(1, 64)), f"'{word}.txt'"]
+        )
+        lines.append(f"    {word}_{rng.randint(1, 9)} = {value}")
+    lines.extend(
+        [
+            "}",
+            "",
+            "process {",
+            f"    cpus   = {{ check_max( {rng.randint(1, 8)} * task.attempt, 'cpus' ) }}",
+            f"    memory = {{ check_max( {rng.randint(1, 32)}.GB * task.attempt, 'memory' ) }}",
+            "    errorStrategy = { task.exitStatus in [143,137,104,134,139] ? 'retry' : 'finish' }",
+            "",
+        ]
+    )
+    for _ in range(2):
+        tool = _tool(rng).upper()
+        lines.extend(
+            [
+                f"    withName: '{tool}' {{",
+                f"        ext.args   = '--{rng.choice(WORDS)} {rng.randint(1, 100)}'",
+                "        publishDir = [",
+                '            path: { "${params.outdir}/' + tool.lower() + '" },',
+                "            mode: params.publish_dir_mode,",
+                "            saveAs: { filename -> filename.equals('versions.yml') ? null : filename }",
+                "        ]",
+                "    }",
+            ]
+        )
+    lines.extend(
+        [
+            "}",
+            "",
+            "profiles {",
+            "    docker {",
+            "        docker.enabled         = true",
+            "        singularity.enabled    = false",
+            "    }",
+            "}",
+            "",
+            "includeConfig 'conf/modules.config'",
+            "",
+        ]
+    )
+    return "\n".join(lines)
+
+
+def gen_class(rng: "random.Random") -> "str":
+    name = "".join(w.capitalize() for w in rng.sample(WORDS, 2))
+    field = rng.choice(WORDS)
+    lines = [
+        f"class {name} {{",
+        "",
+        "    //",
+        f"    // Generated helper for {field} handling",
+        "    //",
+        f"    public static String {field}Summary(workflow, params, Map options = [:]) {{",
+        "        def summary = [:]",
+        "        summary['Run Name'] = workflow.runName",
+        f"        summary['{field.capitalize()}'] = params.{field} ?: 'none'",
+        "        for (entry in options) {",
+        '            summary["opt_${entry.key}"] = entry.value',
+        "        }",
+        "        def colors = [reset: '\\033[0m', green: '\\033[0;32m']",
+        '        return summary.collect { k, v -> "${colors.green}${k}${colors.reset}: $v" }.join("\\n")',
+        "    }",
+        "",
+        f"    private static List<String> checkFiles(List files) {{",
+        "        def missing = []",
+        "        files.each { f ->",
+        "            if (!file(f).exists()) {",
+        "                missing << f",
+        "            }",
+        "        }",
+        "        return missing",
+        "    }",
+        "}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+GENERATORS: "Mapping[str, Callable[[random.Random], str]]" = {
+    "module": gen_process,
+    "subworkflow": gen_workflow,
+    "config": gen_config,
+    "class": gen_class,
+}
+
+EXTENSIONS: "Mapping[str, str]" = {
+    "module": ".nf",
+    "subworkflow": ".nf",
+    "config": ".config",
+    "class": ".groovy",
+}
+
+
+def generate_corpus(
+    seed: "int" = 42,
+    files_per_kind: "int" = 2,
+    sizes: "Mapping[str, int]" = SIZES,
+) -> "Sequence[SyntheticSource]":
+    """
+    It generates the corpus. The same seed always produces
+    the very same sources.
+    """
+    rng = random.Random(seed)
+    corpus: "MutableSequence[SyntheticSource]" = []
+    for size, units in sizes.items():
+        for kind, generator in GENERATORS.items():
+            for ifile in range(files_per_kind):
+                content = "\n".join(generator(rng) for _ in range(units))
+                corpus.append(
+                    SyntheticSource(
+                        name=f"{size}/{kind}_{ifile}{EXTENSIONS[kind]}",
+                        kind=kind,
+                        size=size,
+                        content=content,
+                    )
+                )
+
+    return corpus
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Write a deterministic synthetic Nextflow and Groovy corpus"
+    )
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--files-per-kind", type=int, default=2)
+    ap.add_argument("destination", help="Directory where the corpus is written")
+    args = ap.parse_args(argv)
+
+    for source in generate_corpus(seed=args.seed, files_per_kind=args.files_per_kind):
+        path = os.path.join(args.destination, source.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode="w", encoding="utf-8") as cH:
+            cH.write(source.content)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the token streams and the throughput of the Pygments driven
+# tokenizer against the combined regular expressions one. When no path
+# is given, the synthetic corpus is used. The exit code is 1 when any
+# stream differs.
+#
+#   python benchmarks/tokenizer_engines.py --repeat 5 path/to/rnaseq
+
+import argparse
+import os
+import sys
+import time
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Sequence,
+        Type,
+    )
+
+    from pygments.lexer import (
+        RegexLexer,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.tokenizer import (
+    CombinedGroovyRestrictedTokenizer,
+    GroovyRestrictedTokenizer,
+)
+
+from benchmarks.earley_hotspots import (
+    find_sources,
+)
+
+
+def tokenize(tokenizer_class: "Type[RegexLexer]", content: "str") -> "Sequence[Any]":
+    return list(tokenizer_class().get_tokens(content))
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Compare the Pygments driven and the combined regular expressions tokenizers"
+    )
+    ap.add_argument(
+        "--repeat", type=int, default=3, help="Repetitions of each measurement"
+    )
+    ap.add_argument("paths", nargs="*", help="Files or directories to tokenize")
+    args = ap.parse_args(argv)
+
+    sources = list(find_sources(args.paths))
+    num_bytes = sum(len(content.encode("utf-8")) for _, content in sources)
+
+    mismatches = 0
+    for label, content in sources:
+        if tokenize(GroovyRestrictedTokenizer, content) != tokenize(
+            CombinedGroovyRestrictedTokenizer, content
+        ):
+            mismatches += 1
+            print(f"[MISMATCH] {label}")
+
+    for tokenizer_class in (
+        GroovyRestrictedTokenizer,
+        CombinedGroovyRestrictedTokenizer,
+    ):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for _, content in sources:
+                tokenize(tokenizer_class, content)
+            elapsed = time.perf_counter() - t0
+            if best is None or elapsed < best:
+                best = elapsed
+        assert best is not None
+        print(
+            f"{tokenizer_class.__name__:36} {best:8.4f}s {num_bytes / best / 1024 / 1024:8.2f} MiB/s"
+        )
+
+    print(f"\n{len(sources)} files, {mismatches} mismatching token streams")
+
+    return 1 if mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares two versions of a synthetic pipeline (one process changed,
+# one added and one removed) with the structural diff over the cached
+# hashed trees, against diffing the JSON text of both digested trees.
+# The exit code is 1 when the structural diff does not report exactly
+# those changes. When two files are given, they are compared instead.
+#
+#   python benchmarks/tree_diff.py --processes 8
+#   python benchmarks/tree_diff.py old/main.nf new/main.nf
+
+import argparse
+import difflib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Optional,
+        Sequence,
+        Set,
+        Tuple,
+        Union,
+    )
+
+    from groovy_parser.parser import (
+        EmptyNode,
+        LeafNode,
+        RuleNode,
+    )
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groovy_parser.diff import (
+    ADDED,
+    CHANGED,
+    diff_groovy_files,
+    parse_and_digest_groovy_file_hashed,
+    REMOVED,
+)
+from groovy_parser.parser import (
+    parse_and_digest_groovy_file,
+)
+
+from benchmarks.synthetic_corpus import (
+    gen_process,
+    gen_workflow,
+)
+
+
+def gen_versions(
+    processes: "int",
+) -> "Tuple[str, str, Set[Tuple[str, Tuple[str, ...]]]]":
+    """
+    It generates both versions of the pipeline, along with the changes
+    the structural diff has to report
+    """
+    rng = random.Random(42)
+    blocks = []
+    for iproc in range(processes + 1):
+        block = gen_process(rng)
+        name = block.split(" ", 2)[1]
+        blocks.append((f"{name}_{iproc}", block.replace(name, f"{name}_{iproc}", 1)))
+    workflow = gen_workflow(rng)
+
+    old_blocks = blocks[:processes]
+    new_blocks = list(blocks[1:])
+    changed_name, changed_block = new_blocks[processes // 2]
+    new_blocks[processes // 2] = (
+        changed_name,
+        changed_block.replace("    label '", "    label 'changed_", 1),
+    )
+
+    expected: "Set[Tuple[str, Tuple[str, ...]]]" = {
+        (REMOVED, ("process " + blocks[0][0],)),
+        (ADDED, ("process " + blocks[-1][0],)),
+        (CHANGED, ("process " + changed_name,)),
+    }
+    return (
+        "\n".join(block for _, block in old_blocks) + "\n" + workflow,
+        "\n".join(block for _, block in new_blocks) + "\n" + workflow,
+        expected,
+    )
+
+
+def count_rule_nodes(t_tree: "Union[RuleNode, LeafNode, EmptyNode]") -> "int":
+    children = cast("RuleNode", t_tree).get("children")
+    if children is None:
+        return 0
+    return 1 + sum(count_rule_nodes(child) for child in children)
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        description="Benchmark the structural diff of two versions of a pipeline"
+    )
+    ap.add_argument(
+        "--processes",
+        type=int,
+        default=8,
+        help="Processes of each synthetic version",
+    )
+    ap.add_argument("--repeat", type=int, default=5, help="Times each diff is computed")
+    ap.add_argument("paths", nargs="*", help="Old and new versions of a file")
+    args = ap.parse_args(argv)
+    if len(args.paths) not in (0, 2):
+        ap.error("Either no paths or the old and new versions are expected")
+
+    expected: "Optional[Set[Tuple[str, Tuple[str, ...]]]]" = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if len(args.paths) == 2:
+            old_path, new_path = args.paths
+        else:
+            old_content, new_content, expected = gen_versions(args.processes)
+            old_path = os.path.join(workdir, "old.nf")
+            new_path = os.path.join(workdir, "new.nf")
+            with open(old_path, mode="w", encoding="utf-8") as oH:
+                oH.write(old_content)
+            with open(new_path, mode="w", encoding="utf-8") as nH:
+                nH.write(new_content)
+        cache_directory = os.path.join(workdir, "cache")
+        os.mkdir(cache_directory)
+
+        # Both versions are parsed and hashed once, so the diffs only use the cache
+        t0 = time.perf_counter()
+        old_tree = parse_and_digest_groovy_file_hashed(
+            old_path, cache_directory=cache_directory
+        )
+        new_tree = parse_and_digest_groovy_file_hashed(
+            new_path, cache_directory=cache_directory
+        )
+        print(f"Parsing and hashing both versions: {time.perf_counter() - t0:.2f}s")
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            diff = diff_groovy_files(
+                old_path, new_path, cache_directory=cache_directory
+            )
+        structural_time = (time.perf_counter() - t0) / args.repeat
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            old_text = json.dumps(
+                parse_and_digest_groovy_file(old_path, cache_directory=cache_directory),
+                indent=1,
+            ).splitlines()
+            new_text = json.dumps(
+                parse_and_digest_groovy_file(new_path, cache_directory=cache_directory),
+                indent=1,
+            ).splitlines()
+            text_diff = list(difflib.unified_diff(old_text, new_text, lineterm=""))
+        text_time = (time.perf_counter() - t0) / args.repeat
+
+    for change in diff.changes:
+        print(f"{change.kind:8} {' > '.join(change.path)}")
+    num_nodes = count_rule_nodes(old_tree) + count_rule_nodes(new_tree)
+    print(
+        f"\nStructural diff: {structural_time * 1000:.1f}ms, {diff.visited_nodes} of {num_nodes} rule nodes visited"
+    )
+    print(f"JSON text diff: {text_time * 1000:.1f}ms, {len(text_diff)} diff lines")
+
+    if expected is not None:
+        reported = {(change.kind, tuple(change.path)) for change in diff.changes}
+        if reported != expected:
+            print(f"[FAIL] Expected changes {sorted(expected)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
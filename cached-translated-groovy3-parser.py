@@ -17,6 +17,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
 import json
 import logging
 import os
@@ -47,8 +48,19 @@ if TYPE_CHECKING:
 
 from pygments.token import Token
 
+from groovy_parser.batch import (
+    digest_groovy_files,
+)
+from groovy_parser.budget import (
+    budget_from_limits,
+)
+from groovy_parser.nextflow import (
+    extract_nextflow_features,
+)
 from groovy_parser.parser import (
-    parse_and_digest_groovy_content,
+    aggregate_parse_stats,
+    GroovyParseStats,
+    parse_and_digest_groovy_file,
 )
 
 from lark import (
@@ -59,318 +71,34 @@ from lark import (
 from lark.visitors import Discard
 
 
-# FilteredOutTokens = (
-#    Token.Comment,
-#    Token.Comments,
-#    Token.Generic,
-#    Token.Other,
-# )
-
-
-ROOT_RULE = ["compilation_unit", "script_statements"]
-
-INCLUDE_PROCESS_RULE = [
-    #    "script_statement",
-    "statement",
-    "statement_expression",
-    "command_expression",
-]
-
-IDENTIFIER_RULE = ["primary", "identifier"]
-
-PRE_IDENTIFIER_NAME = [
-    "expression",
-    "postfix_expression",
-    "path_expression",
-]
-
-
-PROCESS_CHILD = {"leaf": "IDENTIFIER", "value": "process"}
-
-INCLUDE_CHILD = {"leaf": "IDENTIFIER", "value": "include"}
-
-WORKFLOW_CHILD = {"leaf": "IDENTIFIER", "value": "workflow"}
-
-
-CONTAINER_CHILD = {"leaf": "IDENTIFIER", "value": "container"}
-
-CONDA_CHILD = {"leaf": "IDENTIFIER", "value": "conda"}
-
-TEMPLATE_CHILD = {"leaf": "IDENTIFIER", "value": "template"}
-
-
-P_RULE = [
-    "argument_list",
-    "first_argument_list_element",
-    "expression_list_element",
-    "expression",
-    "postfix_expression",
-    "path_expression",
-]
-
-W_RULE = [
-    "argument_list",
-    "first_argument_list_element",
-    "expression_list_element",
-    "expression",
-    "postfix_expression",
-    "path_expression",
-]
-
-NAMELESS_W_RULE = [
-    "argument_list",
-    "first_argument_list_element",
-    "expression_list_element",
-    "expression",
-    "postfix_expression",
-    "path_expression",
-    "primary",
-    "closure_or_lambda_expression",
-    "closure",
-]
-
-
-def extract_strings(node: "Union[EmptyNode, LeafNode, RuleNode]") -> "Iterator[str]":
-    leaf_type = node.get("leaf")
-    if leaf_type is not None:
-        lnode = cast("LeafNode", node)
-        if leaf_type in ("STRING_LITERAL", "STRING_LITERAL_PART"):
-            yield lnode["value"]
-    else:
-        children = node.get("children")
-        if isinstance(children, list):
-            for child in children:
-                yield from extract_strings(child)
-
-
-class NfProcess(NamedTuple):
-    name: "str"
-    containers: "Sequence[str]"
-    condas: "Sequence[str]"
-    templates: "Sequence[str]"
-
-
-def extract_nextflow_containers(
-    node: "Union[EmptyNode, LeafNode, RuleNode]",
-) -> "Iterator[str]":
-    # return [ node ]
-    yield from filter(
-        lambda s: s not in ("singularity", "docker"), extract_strings(node)
-    )
-
-
-def extract_nextflow_condas(
-    node: "Union[EmptyNode, LeafNode, RuleNode]",
-) -> "Iterator[str]":
-    # return [ node ]
-    spsplt = re.compile("[\t ]+")
-    for conda_str in extract_strings(node):
-        yield from spsplt.split(conda_str)
-
-
-def extract_nextflow_templates(
-    node: "Union[EmptyNode, LeafNode, RuleNode]",
-) -> "Iterator[str]":
-    # return [ node ]
-    yield from extract_strings(node)
-
-
-def extract_process_features(
-    t_tree: "RuleNode",
-) -> "Tuple[Sequence[str], Sequence[str], Sequence[str]]":
-    templates: "MutableSequence[str]" = []
-    containers: "MutableSequence[str]" = []
-    condas: "MutableSequence[str]" = []
-
-    # First, sanity check
-    # root_rule = t_tree.get("rule")
-    # if root_rule[-len(ROOT_RULE):] == ROOT_RULE:
-
-    # Now, capture what it is interesting
-    for child in t_tree["children"]:
-        if "rule" in child:
-            r_child = cast("RuleNode", child)
-            child_rule = r_child["rule"]
-            unprocessed = True
-            if child_rule[-len(INCLUDE_PROCESS_RULE) :] == INCLUDE_PROCESS_RULE:
-                # Save the process
-                c_children = r_child["children"]
-                c_children_0 = cast("RuleNode", c_children[0])
-                c_children_0_rule = c_children_0.get("rule")
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(PRE_IDENTIFIER_NAME) :]
-                    == PRE_IDENTIFIER_NAME
-                ):
-                    c_children_0 = cast("RuleNode", c_children_0["children"][0])
-                    c_children_0_rule = c_children_0.get("rule")
-
-                # This is needed to re-evaluate
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(IDENTIFIER_RULE) :] == IDENTIFIER_RULE
-                ):
-                    c_children_0_children = c_children_0["children"]
-
-                    if c_children_0_children[0] == CONTAINER_CHILD:
-                        containers.extend(extract_nextflow_containers(c_children[1]))
-                        unprocessed = False
-                    elif c_children_0_children[0] == CONDA_CHILD:
-                        # both named and nameless workflows
-                        condas.extend(extract_nextflow_condas(c_children[1]))
-                        unprocessed = False
-                    elif c_children_0_children[0] == TEMPLATE_CHILD:
-                        templates.extend(extract_nextflow_templates(c_children[-1]))
-                        unprocessed = False
-
-            if unprocessed:
-                c_containers, c_condas, c_templates = extract_process_features(r_child)
-                containers.extend(c_containers)
-                condas.extend(c_condas)
-                templates.extend(c_templates)
-
-    return containers, condas, templates
-
-
-def extract_nextflow_process(node: "RuleNode") -> "NfProcess":
-    p_rule = node.get("rule")
-    process_name = "<error>"
-    templates: "Sequence[str]" = []
-    containers: "Sequence[str]" = []
-    condas: "Sequence[str]" = []
-    if p_rule == P_RULE:
-        p_c_children = node["children"]
-        assert len(p_c_children) > 0
-        assert "children" in p_c_children[0]
-        pro_node = cast("RuleNode", p_c_children[0])
-        assert len(pro_node["children"]) > 0
-        assert "value" in pro_node["children"][0]
-        process_name = cast("LeafNode", pro_node["children"][0])["value"]
-        process_body = cast("RuleNode", p_c_children[1])
-        containers, condas, templates = extract_process_features(process_body)
-    return NfProcess(
-        name=process_name,
-        templates=templates,
-        containers=containers,
-        condas=condas,
-    )
-
-
-class NfInclude(NamedTuple):
-    path: "str"
-
-
-def extract_nextflow_includes(node: "RuleNode") -> "Sequence[NfInclude]":
-    # return [ node ]
-    return [
-        NfInclude(
-            path=path,
-        )
-        for path in extract_strings(node)
-    ]
-
-
-class NfWorkflow(NamedTuple):
-    name: "Optional[str]"
-
-
-def extract_nextflow_workflow(node: "RuleNode") -> "NfWorkflow":
-    nodes = None
-    name = None
-    if node["rule"] == W_RULE:
-        assert len(node["children"]) > 1
-        name = cast("LeafNode", cast("RuleNode", node["children"][0])["children"][0])[
-            "value"
-        ]
-        nodes = cast("RuleNode", node["children"][1])["children"]
-    elif node["rule"] == NAMELESS_W_RULE:
-        nodes = node["children"]
-
-    return NfWorkflow(
-        name=name,
-    )
-
-
-def extract_nextflow_features(
-    t_tree: "RuleNode",
-) -> "Tuple[Sequence[NfProcess], Sequence[NfInclude], Sequence[NfWorkflow]]":
-    processes: "MutableSequence[NfProcess]" = []
-    includes: "MutableSequence[NfInclude]" = []
-    workflows: "MutableSequence[NfWorkflow]" = []
-
-    # First, sanity check
-    # root_rule = t_tree.get("rule")
-    # if root_rule[-len(ROOT_RULE):] == ROOT_RULE:
-
-    # Now, capture what it is interesting
-    for a_child in t_tree["children"]:
-        if "rule" in a_child:
-            child = cast("RuleNode", a_child)
-            child_rule = child["rule"]
-
-            unprocessed = True
-            if child_rule[-len(INCLUDE_PROCESS_RULE) :] == INCLUDE_PROCESS_RULE:
-                # Save the process
-                c_children = child["children"]
-                c_children_0 = cast("RuleNode", c_children[0])
-                c_children_0_rule = c_children_0.get("rule")
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(PRE_IDENTIFIER_NAME) :]
-                    == PRE_IDENTIFIER_NAME
-                ):
-                    c_children_0 = cast("RuleNode", c_children_0["children"][0])
-                    c_children_0_rule = c_children_0.get("rule")
-
-                # This is needed to re-evaluate
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(IDENTIFIER_RULE) :] == IDENTIFIER_RULE
-                ):
-                    c_children_0_children = c_children_0["children"]
-
-                    if c_children_0_children[0] == PROCESS_CHILD:
-                        processes.append(
-                            extract_nextflow_process(cast("RuleNode", c_children[1]))
-                        )
-                        unprocessed = False
-                    elif c_children_0_children[0] == WORKFLOW_CHILD:
-                        # both named and nameless workflows
-                        workflows.append(
-                            extract_nextflow_workflow(cast("RuleNode", c_children[1]))
-                        )
-                        unprocessed = False
-                    elif c_children_0_children[0] == INCLUDE_CHILD:
-                        includes.extend(
-                            extract_nextflow_includes(cast("RuleNode", c_children[-1]))
-                        )
-                        unprocessed = False
-
-            if unprocessed:
-                c_processes, c_includes, c_workflows = extract_nextflow_features(child)
-                processes.extend(c_processes)
-                includes.extend(c_includes)
-                workflows.extend(c_workflows)
-
-    return processes, includes, workflows
-
-
 def analyze_nf_source(
     filename: "str",
     jsonfile: "str",
     resultfile: "str",
     cache_directory: "Optional[str]" = None,
     ro_cache_directories: "Sequence[str]" = [],
+    stats: "Optional[GroovyParseStats]" = None,
+    recover: "bool" = False,
+    ignore_cached_errors: "bool" = False,
 ) -> "Union[RuleNode, LeafNode, EmptyNode]":
-    with open(filename, mode="r", encoding="utf-8") as wfH:
-        content = wfH.read()
-
-    t_tree = parse_and_digest_groovy_content(
-        content,
+    t_tree = parse_and_digest_groovy_file(
+        filename,
         cache_directory=cache_directory,
         ro_cache_directories=ro_cache_directories,
+        stats=stats,
+        recover=recover,
+        ignore_cached_errors=ignore_cached_errors,
     )
+    save_nf_results(t_tree, jsonfile, resultfile)
 
+    return t_tree
+
+
+def save_nf_results(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    jsonfile: "str",
+    resultfile: "str",
+) -> None:
     # These are for debugging purposes
     # logging.debug(tree.pretty())
     # with open(jsonfile, mode="w", encoding="utf-8") as jH:
@@ -398,8 +126,6 @@ def analyze_nf_source(
         print(f"I {includes}", file=rW)
         print(f"W {workflows}", file=rW)
 
-    return t_tree
-
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -424,8 +150,64 @@ if __name__ == "__main__":
         print(
             "[WARNING] No read-only caching is used. If you want to use cached parsed contents declare variable GROOVY_CACHEDIRS_RO, separating more than one path by colons"
         )
-    for filename in sys.argv[1:]:
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--profile",
+        dest="profile_file",
+        help="JSON file where the aggregated parsing statistics are saved",
+    )
+    ap.add_argument(
+        "--recover",
+        action="store_true",
+        help="Skip the top level statements which cannot be parsed, instead of failing the whole file",
+    )
+    ap.add_argument(
+        "--retry-failures",
+        action="store_true",
+        help="Parse again the files whose failure was cached",
+    )
+    ap.add_argument(
+        "--memoize-statements",
+        action="store_true",
+        help="Reuse the top level statements already digested from other files",
+    )
+    ap.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes (all the cores by default)",
+    )
+    ap.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds the parsing of each file may last, before it is cancelled",
+    )
+    ap.add_argument(
+        "--max-memory",
+        type=float,
+        help="MiB each worker may use while parsing a file, before it is cancelled",
+    )
+    ap.add_argument("filenames", nargs="*")
+    args = ap.parse_args()
+    profile_file = args.profile_file
+    if profile_file is not None:
+        print(f"* Saving parsing statistics at {profile_file}")
+    # Files with the same content are parsed only once
+    batch = digest_groovy_files(
+        args.filenames,
+        cache_directory=cache_directory,
+        ro_cache_directories=ro_cache_directories,
+        max_workers=args.jobs,
+        recover=args.recover,
+        ignore_cached_errors=args.retry_failures,
+        memoize_statements=args.memoize_statements,
+        budget=budget_from_limits(args.timeout, args.max_memory),
+    )
+    stats_list: "MutableSequence[Tuple[str, GroovyParseStats]]" = []
+    for filename, entry in batch.entries.items():
         print(f"* Parsing {filename}")
+        stats_list.append((filename, entry.stats))
         logfile = filename + ".lark"
         jsonfile = logfile + ".json"
         resultfile = logfile + ".result"
@@ -433,15 +215,35 @@ if __name__ == "__main__":
         for hdlr in log.handlers[:]:  # remove all old handlers
             log.removeHandler(hdlr)
         log.addHandler(fH)  # set the new handler
+        if entry.parsed_path != filename:
+            logging.info(f"Same content as {entry.parsed_path}")
         try:
-            analyze_nf_source(
-                filename,
-                jsonfile,
-                resultfile,
-                cache_directory=cache_directory,
-                ro_cache_directories=ro_cache_directories,
-            )
+            if entry.t_tree is None:
+                raise RuntimeError(entry.error)
+            save_nf_results(entry.t_tree, jsonfile, resultfile)
+            if entry.stats.parse_errors > 0:
+                print(f"\t{entry.stats.parse_errors} unparsable regions were skipped")
         except Exception as e:
             print(f"\tParse failed, see {logfile}")
             logging.exception("Parse failed")
         fH.close()
+
+    summary = batch.summary
+    print(
+        f"* {summary.files} files, {summary.unique_contents} unique contents"
+        f" (dedup ratio {summary.dedup_ratio:.2f}), {summary.saved_seconds:.2f}s saved"
+        f" by not parsing again {summary.duplicates} duplicates"
+    )
+    if summary.budget_exceeded > 0:
+        print(f"* {summary.budget_exceeded} contents exceeded the parsing budget")
+
+    if profile_file is not None:
+        with open(profile_file, mode="w", encoding="utf-8") as pH:
+            json.dump(
+                {
+                    **aggregate_parse_stats(stats_list),
+                    "batch": summary.as_dict(),
+                },
+                pH,
+                indent=4,
+            )
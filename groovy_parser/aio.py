@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# asyncio front-end, so the parsing does not block the event loop
+
+import asyncio
+import concurrent.futures
+import functools
+import os
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from types import (
+        TracebackType,
+    )
+
+    from typing import (
+        Any,
+        Callable,
+        Mapping,
+        Optional,
+        Sequence,
+        Tuple,
+        Type,
+        Union,
+    )
+
+    from .budget import ParseBudget
+    from .parser import (
+        _CachedDigestLookup,
+        EmptyNode,
+        LeafNode,
+        RuleNode,
+        SourceBytes,
+    )
+
+from .budget import (
+    warm_groovy_parser,
+)
+from .parser import (
+    _cached_parse_error,
+    _digest_in_worker,
+    _lookup_cached_digest,
+    _store_cached_digest,
+    _store_cached_parse_error,
+    decode_groovy_source,
+    DEFAULT_NOFLAT,
+    DEFAULT_PRUNE,
+    GroovyParseStats,
+    normalize_groovy_source,
+    open_groovy_source,
+    write_cached_budget_exceeded,
+)
+
+
+def _read_normalized_file(path: "Union[str, os.PathLike[str]]") -> "bytes":
+    with open_groovy_source(path) as source:
+        return bytes(normalize_groovy_source(source))
+
+
+def _lookup_file(
+    path: "Union[str, os.PathLike[str]]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]",
+    stats: "Optional[GroovyParseStats]",
+    recover: "bool",
+    ignore_cached_errors: "bool",
+    spans: "bool",
+    budget: "Optional[ParseBudget]",
+    config_mode: "bool",
+) -> "Tuple[_CachedDigestLookup, Optional[str]]":
+    # The content is only decoded on cache misses
+    with open_groovy_source(path) as source:
+        lookup = _lookup_cached_digest(
+            lambda: normalize_groovy_source(source),
+            ro_cache_directories,
+            cache_directory,
+            stats,
+            recover,
+            ignore_cached_errors,
+            spans=spans,
+            budget=budget,
+            config_mode=config_mode,
+        )
+        content = None
+        if lookup.t_tree is None:
+            content = decode_groovy_source(source, os.fspath(path))
+
+    return lookup, content
+
+
+class AsyncGroovyParser:
+    """
+    It parses and digests Groovy contents from asyncio code. The parsing
+    happens in an executor (by default, a process pool whose workers keep
+    their parsers warm), with at most max_concurrency contents in flight.
+    The remaining requests wait in the event loop, so cancelling them
+    really drops their work, while the ones already running in the
+    executor are completed. Cache lookups and writes happen in the
+    default executor of the loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: "Optional[int]" = None,
+        executor: "Optional[concurrent.futures.Executor]" = None,
+        prune: "Sequence[str]" = DEFAULT_PRUNE,
+        noflat: "Sequence[str]" = DEFAULT_NOFLAT,
+    ):
+        if max_concurrency is None:
+            max_concurrency = os.cpu_count() or 1
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.prune = tuple(prune)
+        self.noflat = tuple(noflat)
+
+        self._own_executor = executor is None
+        self._executor = executor
+        # It is created on first use, as it is bound to the running loop
+        self._semaphore: "Optional[asyncio.Semaphore]" = None
+        self._semaphore_loop: "Optional[asyncio.AbstractEventLoop]" = None
+
+    def _get_executor(self) -> "concurrent.futures.Executor":
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_concurrency,
+                initializer=warm_groovy_parser,
+                initargs=(self.prune, self.noflat),
+            )
+        return self._executor
+
+    async def _digest(
+        self,
+        content: "str",
+        stats: "Optional[GroovyParseStats]",
+        recover: "bool",
+        spans: "bool",
+        config_mode: "bool",
+    ) -> "Tuple[Optional[Union[RuleNode, LeafNode, EmptyNode]], Optional[Mapping[str, Any]]]":
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+
+        async with self._semaphore:
+            t_tree, error_entry, worker_stats = await loop.run_in_executor(
+                self._get_executor(),
+                _digest_in_worker,
+                content,
+                self.prune,
+                self.noflat,
+                stats is not None,
+                recover,
+                spans,
+                config_mode,
+            )
+
+        if stats is not None and worker_stats is not None:
+            stats.merge(worker_stats)
+
+        return t_tree, error_entry
+
+    async def _parse_and_digest_source(
+        self,
+        lookup: "_CachedDigestLookup",
+        content: "Optional[str]",
+        get_source: "Callable[[], SourceBytes]",
+        cache_directory: "Optional[Union[str, os.PathLike[str]]]",
+        stats: "Optional[GroovyParseStats]",
+        recover: "bool",
+        spans: "bool",
+        config_mode: "bool",
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        """
+        The parse and the cache store steps of parse_and_digest_groovy_content,
+        once the cache lookup was done
+        """
+        from .budget import ParseBudgetExceeded
+
+        loop = asyncio.get_running_loop()
+        t_tree = lookup.t_tree
+        error_entry: "Optional[Mapping[str, Any]]" = None
+        if t_tree is None:
+            assert content is not None
+            try:
+                t_tree, error_entry = await self._digest(
+                    content, stats, recover, spans, config_mode
+                )
+            except ParseBudgetExceeded as pbe:
+                # The executor is a BudgetedProcessPool which cancelled it
+                if cache_directory is not None:
+                    await loop.run_in_executor(
+                        None,
+                        functools.partial(
+                            write_cached_budget_exceeded,
+                            get_source,
+                            pbe,
+                            cache_directory,
+                            spans=spans,
+                            config_mode=config_mode,
+                        ),
+                    )
+                raise
+
+            if t_tree is None:
+                assert error_entry is not None
+                await loop.run_in_executor(
+                    None, _store_cached_parse_error, lookup, error_entry, stats
+                )
+                raise _cached_parse_error(error_entry)
+
+        await loop.run_in_executor(
+            None,
+            functools.partial(
+                _store_cached_digest,
+                lookup,
+                t_tree,
+                error_entry,
+                stats=stats,
+                spans=spans,
+            ),
+        )
+
+        return t_tree
+
+    async def parse_and_digest(
+        self,
+        content: "str",
+        ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+        cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+        stats: "Optional[GroovyParseStats]" = None,
+        recover: "bool" = False,
+        ignore_cached_errors: "bool" = False,
+        spans: "bool" = False,
+        budget: "Optional[ParseBudget]" = None,
+        config_mode: "bool" = False,
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        """
+        Same as parse_and_digest_groovy_content, but there is no statement
+        memo, as the parsing happens in the executor. As the parse errors
+        cannot always be pickled, the ones of the contents which could not
+        be parsed are raised as CachedParseError, like the cached ones.
+        The budget is only used to look up the contents which already
+        exceeded it, unless the executor is a BudgetedProcessPool.
+        """
+        loop = asyncio.get_running_loop()
+        get_source = lambda: content.encode("utf-8")
+        lookup = await loop.run_in_executor(
+            None,
+            functools.partial(
+                _lookup_cached_digest,
+                get_source,
+                ro_cache_directories,
+                cache_directory,
+                stats,
+                recover,
+                ignore_cached_errors,
+                spans=spans,
+                budget=budget,
+                config_mode=config_mode,
+            ),
+        )
+
+        return await self._parse_and_digest_source(
+            lookup,
+            content,
+            get_source,
+            cache_directory,
+            stats,
+            recover,
+            spans,
+            config_mode,
+        )
+
+    async def parse_and_digest_file(
+        self,
+        path: "Union[str, os.PathLike[str]]",
+        ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+        cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+        stats: "Optional[GroovyParseStats]" = None,
+        recover: "bool" = False,
+        ignore_cached_errors: "bool" = False,
+        spans: "bool" = False,
+        budget: "Optional[ParseBudget]" = None,
+        config_mode: "bool" = False,
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        """
+        Same as parse_and_digest_groovy_file, with the differences told
+        in parse_and_digest
+        """
+        loop = asyncio.get_running_loop()
+        lookup, content = await loop.run_in_executor(
+            None,
+            _lookup_file,
+            path,
+            ro_cache_directories,
+            cache_directory,
+            stats,
+            recover,
+            ignore_cached_errors,
+            spans,
+            budget,
+            config_mode,
+        )
+
+        return await self._parse_and_digest_source(
+            lookup,
+            content,
+            lambda: _read_normalized_file(path),
+            cache_directory,
+            stats,
+            recover,
+            spans,
+            config_mode,
+        )
+
+    async def aclose(self) -> None:
+        """
+        It shuts down the executor, when it was created by this instance
+        """
+        if self._own_executor and self._executor is not None:
+            executor = self._executor
+            self._executor = None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def __aenter__(self) -> "AsyncGroovyParser":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: "Optional[Type[BaseException]]",
+        exc_val: "Optional[BaseException]",
+        exc_tb: "Optional[TracebackType]",
+    ) -> None:
+        await self.aclose()
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_groovy_parser() -> "AsyncGroovyParser":
+    """
+    The instance shared by aparse_and_digest and aparse_and_digest_file,
+    which uses all the available cores
+    """
+    return AsyncGroovyParser()
+
+
+async def aparse_and_digest(
+    content: "str",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    stats: "Optional[GroovyParseStats]" = None,
+    recover: "bool" = False,
+    ignore_cached_errors: "bool" = False,
+    spans: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+    config_mode: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    return await get_async_groovy_parser().parse_and_digest(
+        content,
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        stats=stats,
+        recover=recover,
+        ignore_cached_errors=ignore_cached_errors,
+        spans=spans,
+        budget=budget,
+        config_mode=config_mode,
+    )
+
+
+async def aparse_and_digest_file(
+    path: "Union[str, os.PathLike[str]]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    stats: "Optional[GroovyParseStats]" = None,
+    recover: "bool" = False,
+    ignore_cached_errors: "bool" = False,
+    spans: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+    config_mode: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    return await get_async_groovy_parser().parse_and_digest_file(
+        path,
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        stats=stats,
+        recover=recover,
+        ignore_cached_errors=ignore_cached_errors,
+        spans=spans,
+        budget=budget,
+        config_mode=config_mode,
+    )
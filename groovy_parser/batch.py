@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Batch parsing, where the files with the very same content (like the
+# vendored copies of the same module) are parsed only once
+
+import concurrent.futures
+import hashlib
+import os
+import time
+
+from typing import (
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Iterable,
+        Mapping,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from .parser import (
+        EmptyNode,
+        LeafNode,
+        RuleNode,
+    )
+
+    # The digested tree, or the error (and whether it was an exceeded
+    # budget), along with the statistics
+    DigestOutcome = Tuple[
+        Optional[Union[RuleNode, LeafNode, EmptyNode]],
+        Optional[str],
+        Optional["ParseBudgetExceeded"],
+        "GroovyParseStats",
+    ]
+
+from .budget import (
+    BudgetedProcessPool,
+    cancelled_parse_stats,
+    ParseBudget,
+    ParseBudgetExceeded,
+    ParseWorkerDied,
+    warm_groovy_parser,
+    worker_parse_stats,
+)
+from .memo import get_statement_memo
+from .parser import (
+    _parse_and_digest_source,
+    decode_groovy_source,
+    DEFAULT_NOFLAT,
+    DEFAULT_PRUNE,
+    GroovyParseStats,
+    normalize_groovy_source,
+    open_groovy_source,
+)
+
+
+class GroovyBatchEntry(NamedTuple):
+    path: "str"
+    # The sha256 of the normalized content, None when it could not be read
+    content_hash: "Optional[str]"
+    t_tree: "Optional[Union[RuleNode, LeafNode, EmptyNode]]"
+    # The reason when the file could not be read or parsed
+    error: "Optional[str]"
+    # The path which was actually parsed, which is this one
+    # unless the content was shared with a previous one
+    parsed_path: "Optional[str]"
+    stats: "GroovyParseStats"
+    # Set when the parsing exceeded its budget (now or in a previous run)
+    budget_exceeded: "Optional[ParseBudgetExceeded]" = None
+
+
+class GroovyBatchSummary(NamedTuple):
+    files: "int"
+    unique_contents: "int"
+    # Files whose content was already seen
+    duplicates: "int"
+    unreadable: "int"
+    hash_seconds: "float"
+    # Wall time spent on the unique contents, within the workers
+    parse_seconds: "float"
+    # What parsing (or looking up) again the duplicates would have cost
+    saved_seconds: "float"
+    elapsed_seconds: "float"
+    # Unique contents whose parsing exceeded the budget
+    budget_exceeded: "int" = 0
+
+    @property
+    def dedup_ratio(self) -> "float":
+        readable = self.files - self.unreadable
+        return readable / self.unique_contents if self.unique_contents > 0 else 1.0
+
+    def as_dict(self) -> "Mapping[str, Any]":
+        return {
+            "files": self.files,
+            "unique_contents": self.unique_contents,
+            "duplicates": self.duplicates,
+            "unreadable": self.unreadable,
+            "hash_seconds": self.hash_seconds,
+            "parse_seconds": self.parse_seconds,
+            "saved_seconds": self.saved_seconds,
+            "elapsed_seconds": self.elapsed_seconds,
+            "budget_exceeded": self.budget_exceeded,
+            "dedup_ratio": self.dedup_ratio,
+        }
+
+
+class GroovyBatchResult(NamedTuple):
+    # In the same order as the input paths
+    entries: "Mapping[str, GroovyBatchEntry]"
+    summary: "GroovyBatchSummary"
+
+
+def hash_groovy_file(path: "str") -> "str":
+    """
+    The hash of the content of a file, once its line endings are
+    normalized, so it matches the content part of the cache key
+    """
+    with open_groovy_source(path) as source:
+        return hashlib.sha256(normalize_groovy_source(source)).hexdigest()
+
+
+def _read_file_or_error(
+    path: "str",
+) -> "Tuple[Optional[str], Optional[bytes], Optional[str]]":
+    """
+    The hash and the normalized content of a file, so the content
+    does not have to be read again when it is parsed
+    """
+    try:
+        with open_groovy_source(path) as source:
+            content = bytes(normalize_groovy_source(source))
+    except OSError as e:
+        return None, None, f"{e.__class__.__name__}: {e}"
+
+    return hashlib.sha256(content).hexdigest(), content, None
+
+
+def _digest_unique_content(
+    path: "str",
+    source: "bytes",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+    recover: "bool",
+    ignore_cached_errors: "bool",
+    memoize_statements: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+) -> "DigestOutcome":
+    """
+    This method is the unit of work run by the workers, which receive
+    the normalized content already read from the path. Errors are
+    returned as text, as not all the parse errors can be pickled.
+    """
+    with worker_parse_stats() as stats:
+        try:
+            t_tree = _parse_and_digest_source(
+                lambda: decode_groovy_source(source, path),
+                lambda: source,
+                ro_cache_directories=ro_cache_directories,
+                cache_directory=cache_directory,
+                prune=prune,
+                noflat=noflat,
+                stats=stats,
+                recover=recover,
+                ignore_cached_errors=ignore_cached_errors,
+                statement_memo=get_statement_memo() if memoize_statements else None,
+                budget=budget,
+            )
+        except ParseBudgetExceeded as pbe:
+            # Known from the cache
+            return None, f"{pbe.__class__.__name__}: {pbe}", pbe, stats
+        except Exception as e:
+            return None, f"{e.__class__.__name__}: {e}", None, stats
+
+    return t_tree, None, None, stats
+
+
+def _cancelled_outcome(
+    source: "bytes",
+    error: "Exception",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]",
+) -> "DigestOutcome":
+    """
+    The outcome of a content whose worker was killed (or died), which
+    is remembered in the cache when it exceeded its budget
+    """
+    return (
+        None,
+        f"{error.__class__.__name__}: {error}",
+        error if isinstance(error, ParseBudgetExceeded) else None,
+        cancelled_parse_stats(error, lambda: source, cache_directory),
+    )
+
+
+def digest_groovy_files(
+    paths: "Iterable[str]",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    max_workers: "Optional[int]" = None,
+    executor: "Optional[concurrent.futures.Executor]" = None,
+    prune: "Sequence[str]" = DEFAULT_PRUNE,
+    noflat: "Sequence[str]" = DEFAULT_NOFLAT,
+    recover: "bool" = False,
+    ignore_cached_errors: "bool" = False,
+    memoize_statements: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+) -> "GroovyBatchResult":
+    """
+    It parses and digests a batch of files. All of them are hashed
+    first, so each distinct content is parsed (or looked up in the
+    cache) only once, in a worker process, and its digested tree is
+    shared by all the files with that content. When no executor is
+    provided, a process pool using all the available cores is created.
+    With memoize_statements, the top level statements already digested
+    by the same worker are not parsed again.
+
+    With a budget and no executor, the pool is a BudgetedProcessPool,
+    which cancels the parsings exceeding it without stalling the rest
+    of the batch. These contents are remembered in the cache, so they
+    are not parsed again under the same budget, unless
+    ignore_cached_errors is set.
+    """
+    t_start = time.perf_counter()
+    unique_paths = list(dict.fromkeys(os.fspath(path) for path in paths))
+
+    # Reading and hashing is mostly I/O. Only the content of the first
+    # file of each group is kept, to be handed to the workers
+    t_hash = time.perf_counter()
+    hashes: "MutableSequence[Tuple[Optional[str], Optional[str]]]" = []
+    groups: "MutableMapping[str, MutableSequence[str]]" = {}
+    sources: "MutableMapping[str, bytes]" = {}
+    with concurrent.futures.ThreadPoolExecutor() as hasher:
+        for path, (content_hash, content, hash_error) in zip(
+            unique_paths, hasher.map(_read_file_or_error, unique_paths)
+        ):
+            hashes.append((content_hash, hash_error))
+            if content_hash is not None:
+                assert content is not None
+                groups.setdefault(content_hash, []).append(path)
+                sources.setdefault(content_hash, content)
+    hash_seconds = time.perf_counter() - t_hash
+
+    own_executor = executor is None
+    if executor is None:
+        if budget is not None:
+            executor = BudgetedProcessPool(
+                max_workers=max_workers,
+                budget=budget,
+                initializer=warm_groovy_parser,
+                initargs=(tuple(prune), tuple(noflat)),
+            )
+        else:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    outcomes: "MutableMapping[str, DigestOutcome]" = {}
+    try:
+        futures = {
+            executor.submit(
+                _digest_unique_content,
+                group[0],
+                sources[content_hash],
+                cache_directory,
+                ro_cache_directories,
+                tuple(prune),
+                tuple(noflat),
+                recover,
+                ignore_cached_errors,
+                memoize_statements,
+                budget,
+            ): content_hash
+            for content_hash, group in groups.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            content_hash = futures[future]
+            try:
+                outcomes[content_hash] = future.result()
+            except (ParseBudgetExceeded, ParseWorkerDied) as e:
+                outcomes[content_hash] = _cancelled_outcome(
+                    sources[content_hash], e, cache_directory
+                )
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+
+    entries: "MutableMapping[str, GroovyBatchEntry]" = {}
+    parse_seconds = 0.0
+    saved_seconds = 0.0
+    duplicates = 0
+    unreadable = 0
+    budget_exceeded = sum(
+        1 for _, _, exceeded, _ in outcomes.values() if exceeded is not None
+    )
+    for path, (content_hash, hash_error) in zip(unique_paths, hashes):
+        if content_hash is None:
+            unreadable += 1
+            entries[path] = GroovyBatchEntry(
+                path=path,
+                content_hash=None,
+                t_tree=None,
+                error=hash_error,
+                parsed_path=None,
+                stats=GroovyParseStats(),
+            )
+            continue
+
+        t_tree, error, exceeded, stats = outcomes[content_hash]
+        parsed_path = groups[content_hash][0]
+        wall_time = sum(stats.wall_times.values())
+        if parsed_path == path:
+            parse_seconds += wall_time
+        else:
+            duplicates += 1
+            saved_seconds += wall_time
+            dup_stats = GroovyParseStats()
+            dup_stats.cache_outcome = GroovyParseStats.CACHE_DEDUPLICATED
+            dup_stats.parse_errors = stats.parse_errors
+            stats = dup_stats
+        entries[path] = GroovyBatchEntry(
+            path=path,
+            content_hash=content_hash,
+            t_tree=t_tree,
+            error=error,
+            parsed_path=parsed_path,
+            stats=stats,
+            budget_exceeded=exceeded,
+        )
+
+    return GroovyBatchResult(
+        entries=entries,
+        summary=GroovyBatchSummary(
+            files=len(unique_paths),
+            unique_contents=len(groups),
+            duplicates=duplicates,
+            unreadable=unreadable,
+            hash_seconds=hash_seconds,
+            parse_seconds=parse_seconds,
+            saved_seconds=saved_seconds,
+            elapsed_seconds=time.perf_counter() - t_start,
+            budget_exceeded=budget_exceeded,
+        ),
+    )
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Wall clock time and memory budgets for the parsing of each content,
+# enforced by a pool of worker processes which kills the worker running
+# a task over its budget, so a pathological input does not stall a
+# whole batch
+
+import collections
+import concurrent.futures
+import contextlib
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+
+from typing import (
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Callable,
+        Iterator,
+        Mapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        TypeVar,
+        Union,
+    )
+
+    from multiprocessing.connection import Connection
+    from multiprocessing.context import BaseContext
+
+    from .parser import (
+        GroovyParseStats,
+        SourceBytes,
+    )
+
+    _T = TypeVar("_T")
+
+from .parser import (
+    DEFAULT_NOFLAT,
+    DEFAULT_PRUNE,
+)
+
+# Seconds between two inspections of the busy workers
+DEFAULT_POLL_INTERVAL = 0.05
+
+# Seconds given to an idle worker to finish, before killing it
+STOP_TIMEOUT = 5.0
+
+# Sent by the workers once they are warmed up by the initializer
+_READY = "ready"
+
+# The limits of a budget
+WALL_LIMIT = "wall_seconds"
+MEMORY_LIMIT = "memory_bytes"
+
+
+class ParseBudget(NamedTuple):
+    # Wall clock seconds the parsing of each content may last
+    wall_seconds: "Optional[float]" = None
+    # Resident set size the worker parsing a content may reach, in bytes
+    memory_bytes: "Optional[int]" = None
+
+
+def budget_from_limits(
+    timeout: "Optional[float]", max_memory_mib: "Optional[float]"
+) -> "Optional[ParseBudget]":
+    """
+    The budget from the limits given in the command line programs,
+    in seconds and MiB. None when there is no limit.
+    """
+    if timeout is None and max_memory_mib is None:
+        return None
+
+    return ParseBudget(
+        wall_seconds=timeout,
+        memory_bytes=(
+            int(max_memory_mib * 1024 * 1024) if max_memory_mib is not None else None
+        ),
+    )
+
+
+class ParseBudgetExceeded(Exception):
+    """
+    Raised when the parsing of a content was cancelled because it exceeded
+    the limit (WALL_LIMIT or MEMORY_LIMIT) of its budget, or when it is
+    known to exceed it from the cache. It tells the tokens consumed by the
+    parser at the point of cancellation.
+    """
+
+    def __init__(
+        self,
+        limit: "str",
+        allowed: "float",
+        used: "float",
+        tokens: "int",
+        seconds: "float",
+    ):
+        super().__init__(limit, allowed, used, tokens, seconds)
+        self.limit = limit
+        self.allowed = allowed
+        self.used = used
+        self.tokens = tokens
+        self.seconds = seconds
+
+    def __str__(self) -> "str":
+        if self.limit == MEMORY_LIMIT:
+            used = f"{self.used / 1024 / 1024:.1f} MiB"
+            allowed = f"{self.allowed / 1024 / 1024:.1f} MiB"
+        else:
+            used = f"{self.used:.2f}s"
+            allowed = f"{self.allowed:.2f}s"
+        return (
+            f"The parsing exceeded its {self.limit} budget ({used} over {allowed})"
+            f" after {self.tokens} tokens and {self.seconds:.2f}s"
+        )
+
+    def applies_to(self, budget: "ParseBudget") -> "bool":
+        """
+        Whether the budget is not larger than the exceeded one, so it
+        would be exceeded again
+        """
+        allowed = budget._asdict().get(self.limit)
+        return allowed is not None and allowed <= self.allowed
+
+    def as_dict(self) -> "Mapping[str, Any]":
+        return {
+            "limit": self.limit,
+            "allowed": self.allowed,
+            "used": self.used,
+            "tokens": self.tokens,
+            "seconds": self.seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, entry: "Mapping[str, Any]") -> "ParseBudgetExceeded":
+        return cls(
+            entry["limit"],
+            entry["allowed"],
+            entry["used"],
+            entry["tokens"],
+            entry["seconds"],
+        )
+
+
+class ParseWorkerDied(RuntimeError):
+    """
+    Raised when the worker process running a task died on its own
+    """
+
+
+# Within a worker process, its shared counter of parsed tokens
+_worker_progress: "Optional[Any]" = None
+
+
+def worker_token_progress() -> "Optional[Any]":
+    """
+    Within a worker of a BudgetedProcessPool, the shared counter to be
+    set as GroovyParseStats.token_progress, so the tokens consumed by
+    the parser are known when the task is cancelled. None elsewhere.
+    """
+    return _worker_progress
+
+
+@contextlib.contextmanager
+def worker_parse_stats() -> "Iterator[GroovyParseStats]":
+    """
+    The statistics of a parsing run by a worker, whose token_progress
+    is the one from worker_token_progress. It is unset afterwards, as
+    the shared counter cannot be pickled back.
+    """
+    from .parser import GroovyParseStats
+
+    stats = GroovyParseStats()
+    stats.token_progress = worker_token_progress()
+    try:
+        yield stats
+    finally:
+        stats.token_progress = None
+
+
+def warm_groovy_parser(
+    prune: "Sequence[str]" = DEFAULT_PRUNE,
+    noflat: "Sequence[str]" = DEFAULT_NOFLAT,
+) -> None:
+    """
+    Initializer of the workers, which builds the parser beforehand
+    """
+    from .grammar import get_inlined_groovy_parser
+
+    get_inlined_groovy_parser(tuple(prune), tuple(noflat))
+
+
+def cancelled_parse_stats(
+    error: "Exception",
+    get_source: "Callable[[], SourceBytes]",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    spans: "bool" = False,
+    config_mode: "bool" = False,
+) -> "GroovyParseStats":
+    """
+    The statistics of a content whose worker was killed (or died). When
+    it exceeded its budget, it is remembered in the cache, if any.
+    """
+    from .parser import (
+        GroovyParseStats,
+        write_cached_budget_exceeded,
+    )
+
+    stats = GroovyParseStats()
+    if isinstance(error, ParseBudgetExceeded):
+        # The phases are unknown, so all the time is accounted as parsing
+        stats.wall_times["parse"] = error.seconds
+        if cache_directory is not None:
+            stats.cache_outcome = GroovyParseStats.CACHE_MISS
+            try:
+                write_cached_budget_exceeded(
+                    get_source,
+                    error,
+                    cache_directory,
+                    spans=spans,
+                    config_mode=config_mode,
+                )
+            except OSError:
+                pass
+
+    return stats
+
+
+def _worker_main(
+    conn: "Connection",
+    progress: "Any",
+    initializer: "Optional[Callable[..., None]]",
+    initargs: "Tuple[Any, ...]",
+) -> None:
+    global _worker_progress
+    _worker_progress = progress
+    if initializer is not None:
+        initializer(*initargs)
+    conn.send(_READY)
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        func, args, kwargs = task
+        progress.value = 0
+        try:
+            outcome: "Tuple[bool, Any]" = (True, func(*args, **kwargs))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # Like the exceptions which cannot be pickled
+            conn.send((False, RuntimeError(f"{e.__class__.__name__}: {e}")))
+
+
+def _resident_set_size(pid: "int") -> "Optional[int]":
+    """
+    The resident set size of a process in bytes, when it can be
+    told (only where /proc is available)
+    """
+    try:
+        with open(f"/proc/{pid}/statm", mode="r") as sH:
+            return int(sH.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _Task(NamedTuple):
+    future: "concurrent.futures.Future[Any]"
+    func: "Callable[..., Any]"
+    args: "Tuple[Any, ...]"
+    kwargs: "Mapping[str, Any]"
+
+
+class _Worker:
+    def __init__(
+        self,
+        context: "BaseContext",
+        initializer: "Optional[Callable[..., None]]",
+        initargs: "Tuple[Any, ...]",
+    ):
+        self.progress = context.Value("q", 0, lock=False)
+        self.conn, worker_conn = context.Pipe()
+        self.process = context.Process(  # type: ignore[attr-defined]
+            target=_worker_main,
+            args=(worker_conn, self.progress, initializer, initargs),
+            daemon=True,
+        )
+        self.process.start()
+        worker_conn.close()
+        self.task: "Optional[_Task]" = None
+        # Whether the initializer already finished
+        self.ready = False
+        # When the running task started, None until the worker is ready
+        self.started: "Optional[float]" = None
+
+    def check_ready(self) -> "bool":
+        """
+        It consumes the handshake of the worker, when it was already sent
+        """
+        if not self.ready and self.conn.poll():
+            message = self.conn.recv()
+            assert message == _READY
+            self.ready = True
+        return self.ready
+
+    def run(self, task: "_Task") -> None:
+        self.check_ready()
+        self.conn.send((task.func, task.args, task.kwargs))
+        self.task = task
+        # The warm up of a new worker is not accounted to its first task
+        self.started = time.monotonic() if self.ready else None
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class BudgetedProcessPool(concurrent.futures.Executor):
+    """
+    Pool of worker processes where each task has a budget of wall clock
+    time and memory, the resident set size of its worker (which is only
+    watched where /proc is available). The worker running a task over
+    its budget is killed, and the future of the task gets
+    ParseBudgetExceeded. Only that worker is respawned, so the rest of
+    the pool keeps its warm parsers, and the respawned one is warmed up
+    by the initializer (like warm_groovy_parser). The budget of a task
+    only starts once its worker tells it is warmed up.
+    """
+
+    def __init__(
+        self,
+        max_workers: "Optional[int]" = None,
+        budget: "ParseBudget" = ParseBudget(),
+        initializer: "Optional[Callable[..., None]]" = None,
+        initargs: "Tuple[Any, ...]" = (),
+        mp_context: "Optional[BaseContext]" = None,
+        poll_interval: "float" = DEFAULT_POLL_INTERVAL,
+    ):
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        self.budget = budget
+        self.poll_interval = poll_interval
+        self._context = (
+            mp_context if mp_context is not None else multiprocessing.get_context()
+        )
+        self._initializer = initializer
+        self._initargs = initargs
+        self._pending: "collections.deque[_Task]" = collections.deque()
+        self._condition = threading.Condition()
+        self._shutdown = False
+        # Workers which were killed (or died) and replaced
+        self.respawns = 0
+
+        self._workers: "MutableSequence[_Worker]" = [
+            self._spawn() for _ in range(max_workers)
+        ]
+        self._supervisor = threading.Thread(
+            target=self._supervise, name="BudgetedProcessPool", daemon=True
+        )
+        self._supervisor.start()
+
+    def _spawn(self) -> "_Worker":
+        return _Worker(self._context, self._initializer, self._initargs)
+
+    def submit(  # type: ignore[override]
+        self, fn: "Callable[..., _T]", *args: "Any", **kwargs: "Any"
+    ) -> "concurrent.futures.Future[_T]":
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future: "concurrent.futures.Future[_T]" = concurrent.futures.Future()
+            self._pending.append(_Task(future, fn, args, kwargs))
+            self._condition.notify()
+
+        return future
+
+    def shutdown(self, wait: "bool" = True, *, cancel_futures: "bool" = False) -> None:
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                while len(self._pending) > 0:
+                    self._pending.popleft().future.cancel()
+            self._condition.notify()
+        if wait:
+            self._supervisor.join()
+
+    def _replace(self, i_worker: "int", error: "BaseException") -> None:
+        worker = self._workers[i_worker]
+        task = worker.task
+        worker.kill()
+        self._workers[i_worker] = self._spawn()
+        self.respawns += 1
+        if task is not None:
+            task.future.set_exception(error)
+
+    def _dispatch(self) -> None:
+        for i_worker, worker in enumerate(self._workers):
+            if worker.task is not None:
+                continue
+            while len(self._pending) > 0:
+                task = self._pending.popleft()
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    worker.run(task)
+                except Exception as e:
+                    # Either the task cannot be pickled, or the worker is gone
+                    task.future.set_exception(e)
+                    if not worker.process.is_alive():
+                        self._replace(i_worker, e)
+                        worker = self._workers[i_worker]
+                    continue
+                break
+
+    def _watch(self, i_worker: "int") -> None:
+        worker = self._workers[i_worker]
+        task = worker.task
+        assert task is not None
+
+        if not worker.ready:
+            try:
+                if worker.check_ready():
+                    worker.started = time.monotonic()
+            except (EOFError, OSError):
+                self._replace(
+                    i_worker,
+                    ParseWorkerDied(
+                        f"The worker died with exit code {worker.process.exitcode}"
+                    ),
+                )
+                return
+
+        if worker.ready and worker.conn.poll():
+            try:
+                succeeded, value = worker.conn.recv()
+            except (EOFError, OSError):
+                self._replace(
+                    i_worker,
+                    ParseWorkerDied(
+                        f"The worker died with exit code {worker.process.exitcode}"
+                    ),
+                )
+                return
+            worker.task = None
+            if succeeded:
+                task.future.set_result(value)
+            else:
+                task.future.set_exception(value)
+            return
+
+        if not worker.process.is_alive():
+            self._replace(
+                i_worker,
+                ParseWorkerDied(
+                    f"The worker died with exit code {worker.process.exitcode}"
+                ),
+            )
+            return
+
+        if worker.started is None:
+            # Still warming up
+            return
+
+        seconds = time.monotonic() - worker.started
+        exceeded: "Optional[Tuple[str, float, float]]" = None
+        if self.budget.wall_seconds is not None and seconds > self.budget.wall_seconds:
+            exceeded = (WALL_LIMIT, self.budget.wall_seconds, seconds)
+        elif self.budget.memory_bytes is not None:
+            rss = _resident_set_size(worker.process.pid)
+            if rss is not None and rss > self.budget.memory_bytes:
+                exceeded = (MEMORY_LIMIT, self.budget.memory_bytes, rss)
+
+        if exceeded is not None:
+            limit, allowed, used = exceeded
+            # The counter is read once the worker cannot update it anymore
+            worker.process.kill()
+            worker.process.join()
+            self._replace(
+                i_worker,
+                ParseBudgetExceeded(
+                    limit, allowed, used, worker.progress.value, seconds
+                ),
+            )
+
+    def _supervise(self) -> None:
+        while True:
+            with self._condition:
+                self._dispatch()
+                busy = [
+                    i_worker
+                    for i_worker, worker in enumerate(self._workers)
+                    if worker.task is not None
+                ]
+                if len(busy) == 0:
+                    if self._shutdown and len(self._pending) == 0:
+                        break
+                    self._condition.wait()
+                    continue
+
+            multiprocessing.connection.wait(
+                [self._workers[i_worker].conn for i_worker in busy]
+                + [self._workers[i_worker].process.sentinel for i_worker in busy],
+                timeout=self.poll_interval,
+            )
+            for i_worker in busy:
+                self._watch(i_worker)
+
+        for worker in self._workers:
+            worker.stop()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# The groovy-parser command, which streams one JSON object per input
+# (NDJSON) to the standard output or to a single file, instead of
+# writing side files next to each input
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import gzip
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        IO,
+        Iterable,
+        Iterator,
+        Mapping,
+        MutableMapping,
+        Optional,
+        Sequence,
+        Tuple,
+    )
+
+from .budget import (
+    budget_from_limits,
+    BudgetedProcessPool,
+    cancelled_parse_stats,
+    ParseBudget,
+    ParseBudgetExceeded,
+    ParseWorkerDied,
+    warm_groovy_parser,
+    worker_parse_stats,
+)
+from .parser import (
+    GroovyParseStats,
+)
+
+COMMANDS = ("parse", "digest", "features", "cache")
+
+
+class CommandOptions(NamedTuple):
+    command: "str"
+    cache_directory: "Optional[str]"
+    ro_cache_directories: "Sequence[str]"
+    recover: "bool"
+    ignore_cached_errors: "bool"
+    spans: "bool"
+    # Whether the cache command parses the contents which are not cached
+    fill: "bool"
+    with_stats: "bool"
+    budget: "Optional[ParseBudget]" = None
+
+
+def _lookup_cache_outcome(
+    path: "str", options: "CommandOptions", stats: "GroovyParseStats"
+) -> "Mapping[str, Any]":
+    """
+    It looks up the input in the cache without parsing it, as the digest
+    command would do, so the known failures (parse errors, and exceeded
+    budgets which apply) are raised as negative hits. The contents which
+    only exceeded a budget which does not apply (or any, when there is
+    no budget) have their own outcome, as they would be parsed again.
+    """
+    from .parser import (
+        _cache_key,
+        _cached_parse_error,
+        _read_cache_entry,
+        BUDGET_VARIANT,
+        ERROR_VARIANT,
+        normalize_groovy_source,
+        open_groovy_source,
+    )
+
+    with open_groovy_source(path) as source:
+        key = _cache_key(
+            lambda: normalize_groovy_source(source),
+            ro_cache_directories=options.ro_cache_directories,
+            cache_directory=options.cache_directory,
+            stats=stats,
+        )
+    if key is None:
+        return {}
+
+    t_tree, _ = _read_cache_entry(key, stats=stats)
+    if t_tree is not None or options.ignore_cached_errors:
+        return {}
+
+    error_entry, _ = _read_cache_entry(key, stats=stats, variant=ERROR_VARIANT)
+    if error_entry is not None:
+        stats.cache_outcome = GroovyParseStats.CACHE_NEGATIVE_HIT
+        raise _cached_parse_error(cast("Mapping[str, Any]", error_entry))
+
+    budget_entry, _ = _read_cache_entry(key, stats=stats, variant=BUDGET_VARIANT)
+    if budget_entry is not None:
+        exceeded = ParseBudgetExceeded.from_dict(
+            cast("Mapping[str, Any]", budget_entry)
+        )
+        if options.budget is not None and exceeded.applies_to(options.budget):
+            stats.cache_outcome = GroovyParseStats.CACHE_NEGATIVE_HIT
+            raise exceeded
+        stats.cache_outcome = GroovyParseStats.CACHE_BUDGET_EXCEEDED
+        return {"budget_exceeded": exceeded.as_dict()}
+
+    # The last lookup leaves it as a miss
+    return {}
+
+
+def process_input(path: "str", options: "CommandOptions") -> "Mapping[str, Any]":
+    """
+    This method is the unit of work, which can be run by the workers.
+    It returns the record of the input, where the failures are reported
+    instead of being raised.
+    """
+    from .parser import (
+        digest_lark_tree,
+        parse_and_digest_groovy_file,
+        parse_groovy_file,
+    )
+
+    with worker_parse_stats() as stats:
+        record: "MutableMapping[str, Any]" = {"path": path}
+        try:
+            if options.command == "parse":
+                tree = parse_groovy_file(path, stats=stats, recover=options.recover)
+                record["tree"] = digest_lark_tree(tree, spans=options.spans)
+            elif options.command == "cache" and not options.fill:
+                record.update(_lookup_cache_outcome(path, options, stats))
+            else:
+                t_tree = parse_and_digest_groovy_file(
+                    path,
+                    cache_directory=options.cache_directory,
+                    ro_cache_directories=options.ro_cache_directories,
+                    stats=stats,
+                    recover=options.recover,
+                    ignore_cached_errors=options.ignore_cached_errors,
+                    spans=options.spans,
+                    budget=options.budget,
+                )
+                if options.command == "digest":
+                    record["tree"] = t_tree
+                elif options.command == "features":
+                    from .nextflow import nextflow_features_as_dict
+
+                    record.update(nextflow_features_as_dict(t_tree))
+            if options.command == "cache":
+                record["cache"] = stats.cache_outcome
+            if stats.parse_errors > 0:
+                record["parse_errors"] = stats.parse_errors
+        except Exception as e:
+            logging.getLogger(__name__).debug(
+                "Failed processing %s", path, exc_info=True
+            )
+            record["error"] = f"{e.__class__.__name__}: {e}"
+            if isinstance(e, ParseBudgetExceeded):
+                record["budget_exceeded"] = e.as_dict()
+            if options.command == "cache":
+                record["cache"] = stats.cache_outcome
+
+        if options.with_stats:
+            record["stats"] = stats.as_dict()
+
+    return record
+
+
+def _cancelled_record(
+    path: "str", error: "Exception", options: "CommandOptions"
+) -> "Mapping[str, Any]":
+    """
+    The record of an input whose worker was killed (or died), which is
+    remembered in the cache when it exceeded its budget
+    """
+    from .parser import (
+        normalize_groovy_source,
+        open_groovy_source,
+    )
+
+    def _read_source() -> "bytes":
+        with open_groovy_source(path) as source:
+            return bytes(normalize_groovy_source(source))
+
+    logging.getLogger(__name__).debug("Cancelled processing %s: %s", path, error)
+    stats = cancelled_parse_stats(
+        error,
+        _read_source,
+        options.cache_directory if options.command != "parse" else None,
+        spans=options.spans,
+    )
+    record: "MutableMapping[str, Any]" = {
+        "path": path,
+        "error": f"{error.__class__.__name__}: {error}",
+    }
+    if isinstance(error, ParseBudgetExceeded):
+        record["budget_exceeded"] = error.as_dict()
+    if options.command == "cache":
+        record["cache"] = stats.cache_outcome
+    if options.with_stats:
+        record["stats"] = stats.as_dict()
+
+    return record
+
+
+def read_input_list(stream: "IO[str]", null_separated: "bool") -> "Iterator[str]":
+    """
+    It reads the paths from a list, like the ones from find (-print0
+    when null separated). Empty entries are skipped
+    """
+    if null_separated:
+        pending = ""
+        for chunk in iter(lambda: stream.read(65536), ""):
+            pending += chunk
+            *paths, pending = pending.split("\0")
+            yield from (path for path in paths if path != "")
+        if pending != "":
+            yield pending
+    else:
+        for line in stream:
+            path = line.rstrip("\r\n")
+            if path != "":
+                yield path
+
+
+def process_inputs(
+    paths: "Iterable[str]",
+    options: "CommandOptions",
+    max_workers: "Optional[int]" = None,
+) -> "Iterator[Mapping[str, Any]]":
+    """
+    It yields the records of the inputs in the same order. With more than
+    one worker, they are processed by a pool of processes, which is fed
+    lazily, so the list of inputs can be consumed as it is being produced.
+    With a budget, the pool is a BudgetedProcessPool (even with a single
+    worker), so the inputs exceeding it are cancelled.
+    """
+    if max_workers == 1 and options.budget is None:
+        for path in paths:
+            yield process_input(path, options)
+        return
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # Bounded window of pending inputs, so huge lists are not submitted at once
+    window = 4 * max_workers
+    executor: "concurrent.futures.Executor"
+    if options.budget is not None:
+        executor = BudgetedProcessPool(
+            max_workers=max_workers,
+            budget=options.budget,
+            initializer=warm_groovy_parser,
+        )
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    def _record(
+        path: "str", future: "concurrent.futures.Future[Mapping[str, Any]]"
+    ) -> "Mapping[str, Any]":
+        try:
+            return future.result()
+        except (ParseBudgetExceeded, ParseWorkerDied) as e:
+            return _cancelled_record(path, e, options)
+
+    with executor:
+        pending: "collections.deque[Tuple[str, concurrent.futures.Future[Mapping[str, Any]]]]" = (
+            collections.deque()
+        )
+        for path in paths:
+            pending.append((path, executor.submit(process_input, path, options)))
+            if len(pending) >= window:
+                yield _record(*pending.popleft())
+        while len(pending) > 0:
+            yield _record(*pending.popleft())
+
+
+@contextlib.contextmanager
+def open_output(output: "Optional[str]", compress: "bool") -> "Iterator[IO[str]]":
+    """
+    The standard output, or the output file, optionally gzip compressed
+    """
+    if output is None or output == "-":
+        if compress:
+            with gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb") as gH:
+                with io.TextIOWrapper(gH, encoding="utf-8") as tH:
+                    yield tH
+        else:
+            yield sys.stdout
+    elif compress:
+        with gzip.open(output, mode="wt", encoding="utf-8") as gzH:
+            yield gzH
+    else:
+        with open(output, mode="w", encoding="utf-8") as oH:
+            yield oH
+
+
+def main(argv: "Optional[Sequence[str]]" = None) -> "int":
+    ap = argparse.ArgumentParser(
+        prog="groovy-parser",
+        description="Parse Groovy and Nextflow files, writing one JSON object per input",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=os.environ.get("GROOVY_CACHEDIR"),
+        help="Caching directory (GROOVY_CACHEDIR by default)",
+    )
+    ap.add_argument(
+        "--ro-cache-dir",
+        action="append",
+        default=[],
+        help="Read-only caching directory (it can be repeated)",
+    )
+    ap.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes (all the cores by default)",
+    )
+    ap.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds the processing of each input may last, before it is cancelled",
+    )
+    ap.add_argument(
+        "--max-memory",
+        type=float,
+        help="MiB each worker may use while processing an input, before it is cancelled",
+    )
+    ap.add_argument(
+        "-o", "--output", help="File where the records are written (stdout by default)"
+    )
+    ap.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write the records without any whitespace",
+    )
+    ap.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Compress the output with gzip",
+    )
+    ap.add_argument(
+        "--files-from",
+        help="File with the list of inputs, one per line ('-' for stdin)",
+    )
+    ap.add_argument(
+        "-0",
+        "--null",
+        action="store_true",
+        help="The list of inputs is null separated, as the one from find -print0",
+    )
+    ap.add_argument(
+        "--log-file",
+        help="File where the failures are logged, along with their tracebacks",
+    )
+    sp = ap.add_subparsers(dest="command", required=True)
+    helps = {
+        "parse": "Parse the inputs without the cache, writing their digested trees",
+        "digest": "Write the digested trees of the inputs, using the cache",
+        "features": "Write the Nextflow processes, includes and workflows of the inputs",
+        "cache": "Tell the cache outcome of the inputs, without parsing them",
+    }
+    for command in COMMANDS:
+        cp = sp.add_parser(command, help=helps[command])
+        cp.add_argument(
+            "--stats",
+            action="store_true",
+            help="Add the parsing statistics to each record",
+        )
+        if command == "cache":
+            cp.add_argument(
+                "--fill",
+                action="store_true",
+                help="Parse and cache the inputs which were not cached",
+            )
+        else:
+            cp.add_argument(
+                "--recover",
+                action="store_true",
+                help="Skip the top level statements which cannot be parsed",
+            )
+            cp.add_argument(
+                "--spans",
+                action="store_true",
+                help="Digested trees tell the source spans of their nodes",
+            )
+        if command != "parse":
+            cp.add_argument(
+                "--retry-failures",
+                action="store_true",
+                help="Parse again the inputs whose failure was cached",
+            )
+        cp.add_argument("paths", nargs="*", help="Input files")
+    args = ap.parse_args(argv)
+
+    if args.log_file is not None:
+        logging.basicConfig(filename=args.log_file, level=logging.DEBUG)
+
+    if args.cache_dir is not None:
+        os.makedirs(args.cache_dir, exist_ok=True)
+
+    options = CommandOptions(
+        command=args.command,
+        cache_directory=args.cache_dir,
+        ro_cache_directories=args.ro_cache_dir,
+        recover=getattr(args, "recover", False),
+        ignore_cached_errors=getattr(args, "retry_failures", False),
+        spans=getattr(args, "spans", False),
+        fill=getattr(args, "fill", False),
+        with_stats=args.stats,
+        budget=budget_from_limits(args.timeout, args.max_memory),
+    )
+
+    paths: "Iterable[str]" = args.paths
+    with contextlib.ExitStack() as stack:
+        if args.files_from is not None:
+            if args.files_from == "-":
+                list_stream: "IO[str]" = sys.stdin
+            else:
+                list_stream = stack.enter_context(
+                    open(args.files_from, mode="r", encoding="utf-8")
+                )
+            paths = itertools.chain(args.paths, read_input_list(list_stream, args.null))
+        elif len(args.paths) == 0:
+            paths = read_input_list(sys.stdin, args.null)
+
+        separators = (",", ":") if args.compact else None
+        failures = 0
+        out = stack.enter_context(open_output(args.output, args.gzip))
+        for record in process_inputs(paths, options, max_workers=args.jobs):
+            if "error" in record:
+                failures += 1
+            out.write(json.dumps(record, separators=separators))
+            out.write("\n")
+
+    return 1 if failures > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Configuration mode parsing of nextflow.config-like files, which are
+# mostly nested blocks, assignments, includeConfig calls and simple
+# closures. They are parsed with a subset of the grammar, where most of
+# the statements and operators are missing, so the Earley parser has
+# much less to predict. The subset keeps the rules of the full grammar,
+# and it only leaves out what needs some keyword or operator it cannot
+# consume, so the contents it parses cannot be parsed in other ways by
+# the full grammar. This is why the declarations and the types stay, as
+# "String s" and "foo bar" are also command expressions. Contents which
+# are out of the subset fall back to the full grammar.
+
+import os
+
+from typing import (
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from lark import Lark
+
+    from .parser import (
+        EmptyNode,
+        GroovyParseStats,
+        LeafNode,
+        RuleNode,
+    )
+
+from .parser import (
+    _phase,
+    _ProgressTokens,
+    count_tree_nodes,
+    lex_groovy_content,
+    normalize_groovy_text,
+)
+
+CONFIG_PATH = "config"
+FULL_PATH = "full"
+
+# Suffixes of the configuration files
+CONFIG_SUFFIXES = (".config",)
+
+# Rules and terminals which are not needed by configuration files. Every
+# excluded rule needs either some excluded terminal or a sequence of
+# tokens no remaining rule accepts (like the ARROW after the parameters
+# of a lambda), so leaving it out never changes how the remaining
+# contents are parsed
+CONFIG_EXCLUDED = (
+    # Declarations led by keywords or annotations
+    "package_declaration",
+    "import_declaration",
+    "type_declaration",
+    "annotation",
+    "this_formal_parameter",
+    "ELLIPSIS",
+    "STATIC",
+    # Statements other than blocks, labels and expressions
+    "conditional_statement",
+    "loop_statement",
+    "try_catch_statement",
+    "assert_statement",
+    "break_statement",
+    "continue_statement",
+    "SYNCHRONIZED",
+    "RETURN",
+    "THROW",
+    # Types, casts and instantiations
+    "creator",
+    "NEW",
+    "THIS",
+    "SUPER",
+    "AS",
+    "INSTANCEOF",
+    "NOT_INSTANCEOF",
+    # Expressions seldom found in configuration files
+    "lambda_expression",
+    "standard_lambda_expression",
+    "variable_names",
+    "mul_colon_expression",
+    "keywords",
+    "IF",
+    "AT",
+    "INC",
+    "DEC",
+    "BITNOT",
+    "POWER",
+    "LSHIFT",
+    "RANGE_EXCLUSIVE_LEFT",
+    "RANGE_EXCLUSIVE_RIGHT",
+    "RANGE_EXCLUSIVE_FULL",
+    "IDENTICAL",
+    "NOT_IDENTICAL",
+    "SPACESHIP",
+    "REGEX_FIND",
+    "REGEX_MATCH",
+    "BITAND",
+    "XOR",
+    "BITOR",
+    "SPREAD_DOT",
+    "SAFE_CHAIN_DOT",
+    "SAFE_INDEX",
+    "METHOD_POINTER",
+    "METHOD_REFERENCE",
+    "ADD_ASSIGN",
+    "SUB_ASSIGN",
+    "MUL_ASSIGN",
+    "DIV_ASSIGN",
+    "MOD_ASSIGN",
+    "POWER_ASSIGN",
+    "AND_ASSIGN",
+    "OR_ASSIGN",
+    "XOR_ASSIGN",
+    "LSHIFT_ASSIGN",
+    "RSHIFT_ASSIGN",
+    "URSHIFT_ASSIGN",
+    "ELVIS_ASSIGN",
+)
+
+
+class GroovyConfigDigest(NamedTuple):
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]"
+    # Either CONFIG_PATH or FULL_PATH
+    path: "str"
+    # Why the configuration mode gave up, when it happened
+    reason: "Optional[str]" = None
+
+
+def is_groovy_config_path(path: "Union[str, os.PathLike[str]]") -> "bool":
+    return os.fspath(path).endswith(CONFIG_SUFFIXES)
+
+
+def get_config_parser(
+    prune: "Tuple[str, ...]" = ("sep", "nls"),
+    noflat: "Tuple[str, ...]" = ("script_statement",),
+) -> "Lark":
+    """
+    Inlined parser of the configuration subset of the grammar
+    """
+    from .grammar import get_inlined_groovy_parser
+
+    return get_inlined_groovy_parser(prune, noflat, CONFIG_EXCLUDED)
+
+
+def digest_groovy_config_content(
+    content: "str",
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    spans: "bool" = False,
+    fallback: "bool" = True,
+) -> "GroovyConfigDigest":
+    """
+    It parses and digests the content with the configuration subset
+    of the grammar, without any cache. The tokens are lexed once, and
+    when they are out of the subset, they are parsed again with the
+    full grammar. When fallback is disabled, the parse error is raised
+    instead. The digested tree is meant to be the same digest_groovy_content
+    returns (benchmarks/config_fast_path.py checks it).
+    """
+    from lark.exceptions import ParseError as LarkParseError
+
+    from .grammar import (
+        get_inlined_groovy_parser,
+        LarkFilteringTreeEncoder,
+    )
+
+    with _phase(stats, "parser_build"):
+        parser = get_config_parser(tuple(prune), tuple(noflat))
+    lark_tokens = lex_groovy_content(content, stats=stats)
+    if stats is not None and stats.token_progress is not None:
+        lark_tokens = _ProgressTokens(lark_tokens, stats.token_progress)
+
+    path = CONFIG_PATH
+    reason: "Optional[str]" = None
+    try:
+        with _phase(stats, "parse"):
+            # The type ignore is needed due the poor type annotation of
+            # lark, which assumes the input is always a string
+            tree = parser.parse(lark_tokens)  # type: ignore[arg-type]
+    except LarkParseError as pe:
+        if not fallback:
+            raise pe
+        path = FULL_PATH
+        line = getattr(pe, "line", None)
+        reason = type(pe).__name__ + ("" if line is None else f" (line {line})")
+        if stats is not None:
+            stats.config_fallbacks += 1
+
+        with _phase(stats, "parser_build"):
+            parser = get_inlined_groovy_parser(tuple(prune), tuple(noflat))
+        with _phase(stats, "parse"):
+            tree = parser.parse(lark_tokens)  # type: ignore[arg-type]
+
+    if stats is not None:
+        stats.tree_nodes = count_tree_nodes(tree)
+
+    with _phase(stats, "digest"):
+        t_tree = LarkFilteringTreeEncoder(
+            spans=spans,
+            text=normalize_groovy_text(content) if spans else None,
+        ).default(
+            tree,
+            prune=prune,
+            noflat=noflat,
+        )
+
+    return GroovyConfigDigest(t_tree=t_tree, path=path, reason=reason)
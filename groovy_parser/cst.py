@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lossless concrete syntax trees, where every character of the source
+# belongs either to a token or to the trivia (whitespaces, comments)
+# before it, and the streaming writer which emits the source back
+
+import bisect
+
+from typing import (
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Callable,
+        IO,
+        Iterable,
+        Iterator,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from lark import Lark
+    from lark.lexer import Token as LarkToken
+    from lark.tree import ParseTree
+
+    from .grammar import ParseErrorTree
+    from .parser import GroovyParseStats
+
+from .parser import (
+    _phase,
+    count_tree_nodes,
+    lex_groovy_content,
+)
+
+# Size of the chunks emitted by the writer, in characters
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class CSTToken(NamedTuple):
+    type: "str"
+    # Offsets within the source. The trivia before the token
+    # (whitespaces, comments and the text the parser never sees)
+    # is source[trivia_start:start]
+    trivia_start: "int"
+    start: "int"
+    end: "int"
+
+
+class CSTEdit(NamedTuple):
+    # Offsets within the source of the replaced text
+    start: "int"
+    end: "int"
+    text: "str"
+
+
+def _source_offset_mapper(content: "str") -> "Tuple[Callable[[int], int], int]":
+    """
+    The lexer positions are relative to the normalized text (no BOM,
+    only \\n line endings). It returns the function which translates
+    them to offsets within the content, along with the length of the
+    normalized text.
+    """
+    bom = 1 if content.startswith("\ufeff") else 0
+    # Normalized positions of the newlines which were \r\n
+    collapsed: "MutableSequence[int]" = []
+    if "\r\n" in content:
+        idx = content.find("\r\n", bom)
+        while idx != -1:
+            collapsed.append(idx - bom - len(collapsed))
+            idx = content.find("\r\n", idx + 2)
+
+    normalized_length = len(content) - bom - len(collapsed)
+    if len(collapsed) == 0:
+        return (lambda pos: pos + bom), normalized_length
+
+    return (
+        lambda pos: pos + bom + bisect.bisect_left(collapsed, pos)
+    ), normalized_length
+
+
+class GroovyCST:
+    """
+    The concrete syntax tree of a content. The tokens tell where
+    they are in the source, so no character is lost, and the parse
+    tree (when the content was parsed) keeps the very same Lark
+    tokens, which can be mapped back to them.
+    """
+
+    def __init__(
+        self,
+        source: "str",
+        tokens: "Sequence[CSTToken]",
+        lark_tokens: "Sequence[LarkToken]",
+        tree: "Optional[ParseTree]" = None,
+        errors: "Sequence[ParseErrorTree]" = [],
+    ):
+        self.source = source
+        self.tokens = tokens
+        self.lark_tokens = lark_tokens
+        self.tree = tree
+        # The unparsable regions, when the tree was recovered
+        self.errors = errors
+        self._index: "Optional[MutableMapping[int, int]]" = None
+
+    def __len__(self) -> "int":
+        return len(self.tokens)
+
+    @property
+    def trailing_trivia_start(self) -> "int":
+        return self.tokens[-1].end if len(self.tokens) > 0 else 0
+
+    def token_text(self, index: "int") -> "str":
+        token = self.tokens[index]
+        return self.source[token.start : token.end]
+
+    def trivia(self, index: "int") -> "str":
+        token = self.tokens[index]
+        return self.source[token.trivia_start : token.start]
+
+    def trailing_trivia(self) -> "str":
+        return self.source[self.trailing_trivia_start :]
+
+    def token_index(self, lark_token: "LarkToken") -> "int":
+        """
+        The index of the CST token from a leaf of the parse tree
+        """
+        if self._index is None:
+            self._index = {
+                id(lark_token): idx for idx, lark_token in enumerate(self.lark_tokens)
+            }
+        return self._index[id(lark_token)]
+
+    def token_range(self, node: "Union[ParseTree, LarkToken]") -> "Tuple[int, int]":
+        """
+        The indices of the first and the last CST tokens of a subtree
+        """
+        from lark import Tree as LarkTree
+
+        if not isinstance(node, LarkTree):
+            idx = self.token_index(node)
+            return idx, idx
+
+        first: "Optional[int]" = None
+        last: "Optional[int]" = None
+        for leaf in node.scan_values(lambda v: True):
+            idx = self.token_index(leaf)
+            if first is None or idx < first:
+                first = idx
+            if last is None or idx > last:
+                last = idx
+
+        if first is None or last is None:
+            raise ValueError("The subtree has no tokens")
+        return first, last
+
+    def span(self, node: "Union[ParseTree, LarkToken]") -> "Tuple[int, int]":
+        """
+        The offsets within the source of a subtree, without the
+        trivia before its first token
+        """
+        first, last = self.token_range(node)
+        return self.tokens[first].start, self.tokens[last].end
+
+    def replace(self, node: "Union[ParseTree, LarkToken]", text: "str") -> "CSTEdit":
+        """
+        The edit which replaces the text of a subtree, keeping
+        the comments and whitespaces before it
+        """
+        start, end = self.span(node)
+        return CSTEdit(start=start, end=end, text=text)
+
+
+def build_groovy_cst(
+    content: "str",
+    lark_tokens: "Sequence[LarkToken]",
+    tree: "Optional[ParseTree]" = None,
+    errors: "Sequence[ParseErrorTree]" = [],
+) -> "GroovyCST":
+    """
+    It attaches the trivia to the tokens emitted by the lexer,
+    translating their positions to offsets within the content
+    """
+    to_source, normalized_length = _source_offset_mapper(content)
+    tokens: "MutableSequence[CSTToken]" = []
+    trivia_start = 0
+    for lark_token in lark_tokens:
+        assert lark_token.start_pos is not None and lark_token.end_pos is not None
+        start = to_source(lark_token.start_pos)
+        # The lexer always ends the text with a newline, which
+        # could not be in the content
+        end = to_source(min(lark_token.end_pos, normalized_length))
+        tokens.append(
+            CSTToken(
+                type=lark_token.type,
+                trivia_start=trivia_start,
+                start=start,
+                end=end,
+            )
+        )
+        trivia_start = end
+
+    return GroovyCST(content, tokens, lark_tokens, tree=tree, errors=errors)
+
+
+def parse_groovy_cst(
+    content: "str",
+    stats: "Optional[GroovyParseStats]" = None,
+    parser: "Optional[Lark]" = None,
+    recover: "bool" = False,
+) -> "GroovyCST":
+    """
+    It parses the content, returning its concrete syntax tree
+    """
+    if parser is None:
+        from .grammar import get_groovy_parser
+
+        with _phase(stats, "parser_build"):
+            parser = get_groovy_parser()
+
+    lark_tokens = lex_groovy_content(content, stats=stats)
+    errors: "Sequence[ParseErrorTree]" = []
+    with _phase(stats, "parse"):
+        if recover:
+            from .grammar import parse_tokens_recovering
+
+            tree, errors = parse_tokens_recovering(parser, lark_tokens)
+        else:
+            # The type ignore is needed due the poor type annotation of
+            # lark, which assumes the input is always a string
+            tree = parser.parse(lark_tokens)  # type: ignore[arg-type]
+
+    if stats is not None:
+        stats.tree_nodes = count_tree_nodes(tree)
+        stats.parse_errors = len(errors)
+
+    return build_groovy_cst(content, lark_tokens, tree=tree, errors=errors)
+
+
+def iter_groovy_source_chunks(
+    cst: "GroovyCST",
+    edits: "Iterable[CSTEdit]" = [],
+    chunk_size: "int" = DEFAULT_CHUNK_SIZE,
+) -> "Iterator[str]":
+    """
+    It emits the source of the tree with the edits applied, in chunks
+    of about chunk_size characters. The regions which were not edited
+    are sliced from the source, so they are reproduced as they were.
+    """
+    source = cst.source
+    pending: "MutableSequence[str]" = []
+    pending_size = 0
+
+    def _pieces() -> "Iterator[str]":
+        pos = 0
+        for edit in sorted(edits, key=lambda edit: (edit.start, edit.end)):
+            if edit.start < pos:
+                raise ValueError(
+                    f"Edit at {edit.start}:{edit.end} overlaps a previous one"
+                )
+            # Large regions are sliced in chunks, so they are not copied at once
+            for chunk_start in range(pos, edit.start, chunk_size):
+                yield source[chunk_start : min(chunk_start + chunk_size, edit.start)]
+            yield edit.text
+            pos = edit.end
+        for chunk_start in range(pos, len(source), chunk_size):
+            yield source[chunk_start : chunk_start + chunk_size]
+
+    for piece in _pieces():
+        if len(piece) >= chunk_size and pending_size == 0:
+            yield piece
+            continue
+        pending.append(piece)
+        pending_size += len(piece)
+        if pending_size >= chunk_size:
+            yield "".join(pending)
+            pending = []
+            pending_size = 0
+
+    if pending_size > 0:
+        yield "".join(pending)
+
+
+def write_groovy_cst(
+    cst: "GroovyCST",
+    out: "IO[str]",
+    edits: "Iterable[CSTEdit]" = [],
+    chunk_size: "int" = DEFAULT_CHUNK_SIZE,
+) -> "int":
+    """
+    It writes the source of the tree with the edits applied,
+    returning the number of written characters
+    """
+    written = 0
+    for chunk in iter_groovy_source_chunks(cst, edits=edits, chunk_size=chunk_size):
+        out.write(chunk)
+        written += len(chunk)
+
+    return written
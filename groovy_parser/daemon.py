@@ -0,0 +1,822 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Long running local daemon which keeps warm parsers and an in-memory
+# cache of digested trees, listening on a Unix domain socket. Requests
+# and responses are JSON documents, one per line. The client side does
+# not import neither Pygments nor Lark, so it starts fast.
+#
+#   python -m groovy_parser.daemon features main.nf modules/local/*.nf
+
+import argparse
+import collections
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import os.path
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        BinaryIO,
+        Callable,
+        Mapping,
+        MutableMapping,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from .budget import (
+        BudgetedProcessPool,
+        ParseBudget,
+    )
+    from .parser import (
+        EmptyNode,
+        LeafNode,
+        RuleNode,
+    )
+
+from . import (
+    __version__,
+)
+
+DEFAULT_IDLE_TIMEOUT = 600.0
+DEFAULT_MAX_CACHED_TREES = 4096
+DEFAULT_START_TIMEOUT = 60.0
+
+
+class GroovyDaemonError(Exception):
+    """
+    Raised by the client when the daemon could not fulfil a request
+    """
+
+
+def _private_directory(path: "str") -> "str":
+    """
+    It creates the directory only this user can enter, checking it was
+    not created beforehand by somebody else
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid != os.getuid()
+        or (st.st_mode & 0o077) != 0
+    ):
+        raise GroovyDaemonError(f"{path} is not a private directory of this user")
+    return path
+
+
+def default_socket_path() -> "str":
+    """
+    The socket lives in the runtime directory of the user, which is
+    private. Otherwise, it lives within a private directory in the
+    temporary one, as anybody could connect to it in the meanwhile
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir is not None and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, f"groovy-parser-{os.getuid()}.sock")
+
+    private_dir = _private_directory(
+        os.path.join(tempfile.gettempdir(), f"groovy-parser-{os.getuid()}")
+    )
+    return os.path.join(private_dir, "daemon.sock")
+
+
+def daemon_signature() -> "str":
+    """
+    It identifies the installed code, so a client does not talk to
+    a daemon which was started from a previous version
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(glob.glob(os.path.join(package_dir, "*.py")))
+    paths.extend(glob.glob(os.path.join(package_dir, "GROOVY_3_0_X", "*.g")))
+    h = hashlib.sha256(__version__.encode("utf-8"))
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        server = cast("GroovyParseDaemon", self.server)
+        for line in self.rfile:
+            if len(line.strip()) == 0:
+                continue
+            server.begin_request()
+            try:
+                request = json.loads(line)
+                response = {"ok": True, "result": server.process(request)}
+            except Exception as e:
+                from .budget import ParseBudgetExceeded
+
+                request = None
+                response = {"ok": False, "error": f"{e.__class__.__name__}: {e}"}
+                if isinstance(e, ParseBudgetExceeded):
+                    response["budget_exceeded"] = e.as_dict()
+            finally:
+                server.end_request()
+
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if isinstance(request, dict) and request.get("op") == "shutdown":
+                # It cannot be done from the thread running serve_forever
+                threading.Thread(target=server.shutdown).start()
+                break
+
+
+class GroovyParseDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    It answers to the requests with the parsers already built, keeping
+    the most recently digested trees in memory, keyed by the hash of
+    the content. It shuts itself down after idle_timeout seconds
+    without requests.
+
+    With a budget, the contents are parsed by a BudgetedProcessPool of
+    max_workers warm workers, so a pathological content is cancelled
+    instead of blocking the daemon, and it is remembered in the cache.
+    """
+
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        # The socket is created only accessible by this user, as
+        # changing its mode after binding it leaves a window where
+        # anybody could connect
+        previous_umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous_umask)
+        st = os.lstat(self.socket_path)
+        self.socket_identity = (st.st_dev, st.st_ino)
+
+    def remove_socket(self) -> None:
+        """
+        It removes the socket, unless it is not the one this daemon
+        created anymore (as a newer daemon is already listening there)
+        """
+        try:
+            st = os.lstat(self.socket_path)
+            if (st.st_dev, st.st_ino) == self.socket_identity:
+                os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+    def __init__(
+        self,
+        socket_path: "str",
+        idle_timeout: "float" = DEFAULT_IDLE_TIMEOUT,
+        cache_directory: "Optional[str]" = None,
+        ro_cache_directories: "Optional[Sequence[str]]" = None,
+        max_cached_trees: "int" = DEFAULT_MAX_CACHED_TREES,
+        budget: "Optional[ParseBudget]" = None,
+        max_workers: "int" = 1,
+    ):
+        # Needed when the socket is bound
+        self.socket_path = socket_path
+        self.socket_identity = (0, 0)
+        super().__init__(socket_path, _DaemonRequestHandler)
+        self.idle_timeout = idle_timeout
+        self.cache_directory = cache_directory
+        self.ro_cache_directories = ro_cache_directories
+        self.max_cached_trees = max_cached_trees
+        self.signature = daemon_signature()
+
+        self.trees: "collections.OrderedDict[str, Union[RuleNode, LeafNode, EmptyNode]]" = (
+            collections.OrderedDict()
+        )
+        self.trees_lock = threading.Lock()
+        # Parsing is serialized, as the parsers are shared
+        self.parse_lock = threading.Lock()
+        self.budget = budget
+        self.pool: "Optional[BudgetedProcessPool]" = None
+        if budget is not None:
+            from .budget import (
+                BudgetedProcessPool,
+                warm_groovy_parser,
+            )
+
+            self.pool = BudgetedProcessPool(
+                max_workers=max_workers,
+                budget=budget,
+                initializer=warm_groovy_parser,
+            )
+
+        self.activity_lock = threading.Lock()
+        self.active_requests = 0
+        self.last_activity = time.monotonic()
+        self.requests = 0
+        self.hits = 0
+
+    def begin_request(self) -> None:
+        with self.activity_lock:
+            self.active_requests += 1
+            self.requests += 1
+
+    def end_request(self) -> None:
+        with self.activity_lock:
+            self.active_requests -= 1
+            self.last_activity = time.monotonic()
+
+    def _watch_idleness(self) -> None:
+        while True:
+            time.sleep(min(self.idle_timeout / 4, 5.0))
+            with self.activity_lock:
+                idle = (
+                    self.active_requests == 0
+                    and time.monotonic() - self.last_activity > self.idle_timeout
+                )
+            if idle:
+                self.shutdown()
+                return
+
+    def serve_until_idle(self) -> None:
+        watchdog = threading.Thread(target=self._watch_idleness, daemon=True)
+        watchdog.start()
+        self.serve_forever()
+
+    def digest(
+        self, request: "Mapping[str, Any]"
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        """
+        It digests the content (or the file) of the request, through the
+        same cache steps parse_and_digest_groovy_content follows, so the
+        known failures are raised again, unless ignore_cached_errors is
+        set in the request
+        """
+        from lark.exceptions import ParseError as LarkParseError
+
+        from .parser import (
+            _cached_parse_error,
+            _lookup_cached_digest,
+            _store_cached_digest,
+            _store_cached_parse_error,
+            decode_groovy_source,
+            digest_groovy_content,
+            normalize_groovy_source,
+            open_groovy_source,
+            parse_error_as_dict,
+        )
+
+        get_content: "Callable[[], str]"
+        path = request.get("path")
+        if path is not None:
+            with open_groovy_source(path) as source:
+                raw_bytes = bytes(source)
+            source_bytes = bytes(normalize_groovy_source(raw_bytes))
+            get_content = lambda: decode_groovy_source(raw_bytes, path)
+        else:
+            content = request["content"]
+            source_bytes = content.encode("utf-8")
+            get_content = lambda: content
+        key = hashlib.sha256(source_bytes).hexdigest()
+
+        with self.trees_lock:
+            t_tree = self.trees.get(key)
+            if t_tree is not None:
+                self.trees.move_to_end(key)
+                self.hits += 1
+                return t_tree
+
+        # The workers of the pool do not share their parsers
+        with self.parse_lock if self.pool is None else contextlib.nullcontext():
+            lookup = _lookup_cached_digest(
+                lambda: source_bytes,
+                self.ro_cache_directories,
+                self.cache_directory,
+                None,
+                False,
+                bool(request.get("ignore_cached_errors", False)),
+                budget=self.budget,
+            )
+            t_tree = lookup.t_tree
+            if t_tree is None:
+                if self.pool is None:
+                    try:
+                        t_tree = digest_groovy_content(get_content())
+                    except LarkParseError as pe:
+                        _store_cached_parse_error(
+                            lookup, parse_error_as_dict(pe), stats=None
+                        )
+                        raise
+                else:
+                    t_tree, error_entry = self._digest_budgeted(
+                        source_bytes, get_content
+                    )
+                    if t_tree is None:
+                        assert error_entry is not None
+                        _store_cached_parse_error(lookup, error_entry, stats=None)
+                        raise _cached_parse_error(error_entry)
+            _store_cached_digest(lookup, t_tree, stats=None)
+
+        with self.trees_lock:
+            self.trees[key] = t_tree
+            while len(self.trees) > self.max_cached_trees:
+                self.trees.popitem(last=False)
+
+        return t_tree
+
+    def _digest_budgeted(
+        self, source_bytes: "bytes", get_content: "Callable[[], str]"
+    ) -> "Tuple[Optional[Union[RuleNode, LeafNode, EmptyNode]], Optional[Mapping[str, Any]]]":
+        from .budget import ParseBudgetExceeded
+        from .parser import (
+            _digest_in_worker,
+            write_cached_budget_exceeded,
+        )
+
+        # The contents which already exceeded it were found in the lookup
+        assert self.pool is not None and self.budget is not None
+        try:
+            t_tree, error_entry, _ = self.pool.submit(
+                _digest_in_worker, get_content()
+            ).result()
+            return t_tree, error_entry
+        except ParseBudgetExceeded as pbe:
+            if self.cache_directory is not None:
+                write_cached_budget_exceeded(
+                    lambda: source_bytes, pbe, self.cache_directory
+                )
+            raise
+
+    def process(self, request: "Mapping[str, Any]") -> "Any":
+        op = request.get("op")
+        if op == "digest":
+            return self.digest(request)
+        elif op == "features":
+            from .nextflow import (
+                nextflow_features_as_dict,
+            )
+
+            return nextflow_features_as_dict(self.digest(request))
+        elif op == "ping" or op == "shutdown":
+            with self.activity_lock:
+                requests = self.requests
+            status = {
+                "pid": os.getpid(),
+                "signature": self.signature,
+                "requests": requests,
+                "cache_hits": self.hits,
+                "cached_trees": len(self.trees),
+            }
+            if self.pool is not None:
+                status["respawned_workers"] = self.pool.respawns
+            return status
+
+        raise ValueError(f"Unknown operation {op!r}")
+
+
+def _connect(socket_path: "str") -> "Optional[socket.socket]":
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def serve(
+    socket_path: "Optional[str]" = None,
+    idle_timeout: "float" = DEFAULT_IDLE_TIMEOUT,
+    cache_directory: "Optional[str]" = None,
+    ro_cache_directories: "Optional[Sequence[str]]" = None,
+    max_cached_trees: "int" = DEFAULT_MAX_CACHED_TREES,
+    budget: "Optional[ParseBudget]" = None,
+    max_workers: "int" = 1,
+) -> "int":
+    """
+    It runs the daemon in the foreground, until it is idle or it is
+    told to shut down. It returns 1 when another daemon is already
+    listening on the socket.
+    """
+    if socket_path is None:
+        socket_path = default_socket_path()
+
+    sock = _connect(socket_path)
+    if sock is not None:
+        sock.close()
+        return 1
+    # A stale socket from a daemon which did not finish properly
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    try:
+        server = GroovyParseDaemon(
+            socket_path,
+            idle_timeout=idle_timeout,
+            cache_directory=cache_directory,
+            ro_cache_directories=ro_cache_directories,
+            max_cached_trees=max_cached_trees,
+            budget=budget,
+            max_workers=max_workers,
+        )
+    except OSError:
+        # Another daemon won the race
+        return 1
+
+    try:
+        # The parsers are warmed up before the first request arrives
+        from .budget import warm_groovy_parser
+
+        warm_groovy_parser()
+        server.serve_until_idle()
+    finally:
+        if server.pool is not None:
+            server.pool.shutdown(wait=True, cancel_futures=True)
+        server.server_close()
+        server.remove_socket()
+
+    return 0
+
+
+class GroovyDaemonClient:
+    """
+    Thin client of the daemon. When autostart is enabled, it starts the
+    daemon in the background when it is not running, or when the running
+    one comes from other version of the code. With ignore_cached_errors,
+    the contents whose failures were cached by the daemon are parsed again.
+    """
+
+    def __init__(
+        self,
+        socket_path: "Optional[str]" = None,
+        autostart: "bool" = True,
+        idle_timeout: "float" = DEFAULT_IDLE_TIMEOUT,
+        cache_directory: "Optional[str]" = None,
+        ro_cache_directories: "Optional[Sequence[str]]" = None,
+        start_timeout: "float" = DEFAULT_START_TIMEOUT,
+        budget: "Optional[ParseBudget]" = None,
+        max_workers: "int" = 1,
+    ):
+        self.socket_path = (
+            socket_path if socket_path is not None else default_socket_path()
+        )
+        self.autostart = autostart
+        self.idle_timeout = idle_timeout
+        self.cache_directory = cache_directory
+        self.ro_cache_directories = ro_cache_directories
+        self.start_timeout = start_timeout
+        self.budget = budget
+        self.max_workers = max_workers
+        self._sock: "Optional[socket.socket]" = None
+        self._rfile: "Optional[BinaryIO]" = None
+        self._process: "Optional[subprocess.Popen[bytes]]" = None
+
+    def _start_daemon(self) -> None:
+        command = [
+            sys.executable,
+            "-m",
+            "groovy_parser.daemon",
+            "--socket",
+            self.socket_path,
+            "--idle-timeout",
+            str(self.idle_timeout),
+        ]
+        if self.cache_directory is not None:
+            command.extend(["--cache-dir", self.cache_directory])
+        if self.ro_cache_directories is not None:
+            for ro_cache_directory in self.ro_cache_directories:
+                command.extend(["--ro-cache-dir", ro_cache_directory])
+        if self.budget is not None:
+            if self.budget.wall_seconds is not None:
+                command.extend(["--timeout", str(self.budget.wall_seconds)])
+            if self.budget.memory_bytes is not None:
+                command.extend(
+                    ["--max-memory", str(self.budget.memory_bytes / 1024 / 1024)]
+                )
+            command.extend(["--workers", str(self.max_workers)])
+        command.append("serve")
+
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    def _wait_connection(self) -> "socket.socket":
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            sock = _connect(self.socket_path)
+            if sock is not None:
+                return sock
+            if time.monotonic() > deadline:
+                raise GroovyDaemonError(
+                    f"The daemon did not start listening on {self.socket_path}"
+                )
+            time.sleep(0.05)
+
+    def _is_running(self, pid: "int") -> "bool":
+        # The daemons started by this client have to be reaped
+        if self._process is not None and self._process.pid == pid:
+            return self._process.poll() is None
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _wait_exit(self, pid: "int", socket_identity: "Tuple[int, int]") -> None:
+        """
+        It waits for a daemon which was told to shut down, until it has
+        removed its socket or it has finished, so the next one does not
+        find it still listening
+        """
+        deadline = time.monotonic() + self.start_timeout
+        while self._is_running(pid):
+            try:
+                st = os.lstat(self.socket_path)
+            except FileNotFoundError:
+                return
+            if (st.st_dev, st.st_ino) != socket_identity:
+                return
+            if time.monotonic() > deadline:
+                raise GroovyDaemonError(
+                    f"The daemon {pid} listening on {self.socket_path} did not finish"
+                )
+            time.sleep(0.05)
+
+    def _attach(self, sock: "socket.socket") -> None:
+        self._sock = sock
+        self._rfile = cast("BinaryIO", sock.makefile("rb"))
+
+    def connect(self) -> None:
+        if self._sock is not None:
+            return
+
+        sock = _connect(self.socket_path)
+        if sock is None:
+            if not self.autostart:
+                raise GroovyDaemonError(f"No daemon is listening on {self.socket_path}")
+            self._start_daemon()
+            sock = self._wait_connection()
+        self._attach(sock)
+
+        if self.autostart:
+            status = self.ping()
+            if status["signature"] != daemon_signature():
+                # Replacing the stale daemon, once it is gone
+                try:
+                    st = os.lstat(self.socket_path)
+                except OSError as e:
+                    raise GroovyDaemonError(
+                        f"Cannot inspect {self.socket_path}: {e}"
+                    ) from e
+                self.shutdown()
+                self._wait_exit(status["pid"], (st.st_dev, st.st_ino))
+                self._start_daemon()
+                self._attach(self._wait_connection())
+
+    def close(self) -> None:
+        if self._rfile is not None:
+            self._rfile.close()
+            self._rfile = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def request(self, op: "str", **params: "Any") -> "Any":
+        self.connect()
+        assert self._sock is not None and self._rfile is not None
+        try:
+            self._sock.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+            line = self._rfile.readline()
+        except OSError as e:
+            self.close()
+            raise GroovyDaemonError(f"The connection to the daemon failed: {e}") from e
+        if len(line) == 0:
+            self.close()
+            raise GroovyDaemonError("The daemon closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise GroovyDaemonError(response["error"])
+        return response["result"]
+
+    def ping(self) -> "Mapping[str, Any]":
+        return cast("Mapping[str, Any]", self.request("ping"))
+
+    def shutdown(self) -> None:
+        try:
+            self.request("shutdown")
+        finally:
+            self.close()
+
+    def digest_file(
+        self,
+        path: "Union[str, os.PathLike[str]]",
+        ignore_cached_errors: "bool" = False,
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        return cast(
+            "Union[RuleNode, LeafNode, EmptyNode]",
+            self.request(
+                "digest",
+                path=os.path.abspath(path),
+                ignore_cached_errors=ignore_cached_errors,
+            ),
+        )
+
+    def digest_content(
+        self, content: "str", ignore_cached_errors: "bool" = False
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        return cast(
+            "Union[RuleNode, LeafNode, EmptyNode]",
+            self.request(
+                "digest", content=content, ignore_cached_errors=ignore_cached_errors
+            ),
+        )
+
+    def features_file(
+        self,
+        path: "Union[str, os.PathLike[str]]",
+        ignore_cached_errors: "bool" = False,
+    ) -> "Mapping[str, Any]":
+        return cast(
+            "Mapping[str, Any]",
+            self.request(
+                "features",
+                path=os.path.abspath(path),
+                ignore_cached_errors=ignore_cached_errors,
+            ),
+        )
+
+    def features_content(
+        self, content: "str", ignore_cached_errors: "bool" = False
+    ) -> "Mapping[str, Any]":
+        return cast(
+            "Mapping[str, Any]",
+            self.request(
+                "features", content=content, ignore_cached_errors=ignore_cached_errors
+            ),
+        )
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        prog="python -m groovy_parser.daemon",
+        description="Parse Groovy and Nextflow files through a long running daemon",
+    )
+    ap.add_argument("--socket", help="Path of the Unix domain socket")
+    ap.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Seconds without requests before the daemon shuts down",
+    )
+    ap.add_argument("--cache-dir", help="Caching directory of the daemon")
+    ap.add_argument(
+        "--ro-cache-dir",
+        action="append",
+        help="Read-only caching directory of the daemon (it can be repeated)",
+    )
+    ap.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds the parsing of each content may last, before it is cancelled",
+    )
+    ap.add_argument(
+        "--max-memory",
+        type=float,
+        help="MiB each parsing worker may use, before its parsing is cancelled",
+    )
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parsing workers of the daemon, only used along with a budget",
+    )
+    sp = ap.add_subparsers(dest="command", required=True)
+    sp.add_parser("serve", help="Run the daemon in the foreground")
+    sp.add_parser("status", help="Show whether the daemon is running")
+    sp.add_parser("stop", help="Stop the daemon")
+    for command in ("digest", "features"):
+        cp = sp.add_parser(
+            command,
+            help=(
+                "Print the digested trees"
+                if command == "digest"
+                else "Print the Nextflow features"
+            ),
+        )
+        cp.add_argument(
+            "--retry-failures",
+            action="store_true",
+            help="Parse again the files whose failures were cached",
+        )
+        cp.add_argument("paths", nargs="+", help="Files to parse ('-' for stdin)")
+    args = ap.parse_args(argv)
+
+    budget: "Optional[ParseBudget]" = None
+    # The client does not need the pool machinery unless a budget is given
+    if args.timeout is not None or args.max_memory is not None:
+        from .budget import budget_from_limits
+
+        budget = budget_from_limits(args.timeout, args.max_memory)
+
+    if args.command == "serve":
+        return serve(
+            socket_path=args.socket,
+            idle_timeout=args.idle_timeout,
+            cache_directory=args.cache_dir,
+            ro_cache_directories=args.ro_cache_dir,
+            budget=budget,
+            max_workers=args.workers,
+        )
+
+    client = GroovyDaemonClient(
+        socket_path=args.socket,
+        autostart=args.command not in ("status", "stop"),
+        idle_timeout=args.idle_timeout,
+        cache_directory=args.cache_dir,
+        ro_cache_directories=args.ro_cache_dir,
+        budget=budget,
+        max_workers=args.workers,
+    )
+    try:
+        if args.command in ("status", "stop"):
+            try:
+                if args.command == "status":
+                    json.dump(client.ping(), sys.stdout, indent=4)
+                    print()
+                else:
+                    client.shutdown()
+            except GroovyDaemonError as gde:
+                print(gde, file=sys.stderr)
+                return 1
+            return 0
+
+        retval = 0
+        results: "MutableMapping[str, Any]" = {}
+        for path in args.paths:
+            try:
+                if path == "-":
+                    content = sys.stdin.read()
+                    if args.command == "digest":
+                        results[path] = client.digest_content(
+                            content, ignore_cached_errors=args.retry_failures
+                        )
+                    else:
+                        results[path] = client.features_content(
+                            content, ignore_cached_errors=args.retry_failures
+                        )
+                elif args.command == "digest":
+                    results[path] = client.digest_file(
+                        path, ignore_cached_errors=args.retry_failures
+                    )
+                else:
+                    results[path] = client.features_file(
+                        path, ignore_cached_errors=args.retry_failures
+                    )
+            except GroovyDaemonError as gde:
+                print(f"{path}: {gde}", file=sys.stderr)
+                retval = 1
+        json.dump(results, sys.stdout, indent=4)
+        print()
+    finally:
+        client.close()
+
+    return retval
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Earley chart diagnostics, used to find which rules from the grammar
+# are the most expensive ones for a given corpus
+
+import functools
+import threading
+import time
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Callable,
+        Iterable,
+        List,
+        Mapping,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Set,
+        Tuple,
+    )
+
+    from lark import (
+        Lark,
+    )
+    from lark.lexer import (
+        Token as LarkToken,
+    )
+    from lark.tree import (
+        ParseTree,
+    )
+
+from lark.parsers.earley import (
+    Parser as EarleyParser,
+)
+from lark.parsers.earley_forest import (
+    ForestToParseTree,
+    PackedNode,
+    SymbolNode,
+)
+
+from .grammar import (
+    create_groovy_parser,
+)
+from .parser import (
+    lex_groovy_content,
+)
+
+
+class EarleyChartColumn(NamedTuple):
+    # Position in the stream of tokens. The last column is the end of input
+    position: "int"
+    # Token which is going to be scanned (None at the end of input)
+    token_type: "Optional[str]"
+    line: "Optional[int]"
+    column: "Optional[int]"
+    # Items in the Earley set, and the ones waiting for a terminal
+    items: "int"
+    to_scan: "int"
+    elapsed: "float"
+
+
+class EarleyDiagnostics:
+    """
+    What the Earley parser did on a single content: the size of the
+    chart at each token position, the items created for each rule,
+    and the ambiguities (both the ones found while filling the chart
+    and the ones which had to be resolved in the final forest)
+    """
+
+    def __init__(self, label: "str" = "") -> None:
+        self.label = label
+        self.columns: "MutableSequence[EarleyChartColumn]" = []
+        self.items_per_rule: "MutableMapping[str, int]" = {}
+        self.chart_ambiguities: "MutableMapping[str, int]" = {}
+        self.resolved_ambiguities: "MutableMapping[str, int]" = {}
+        # Alternatives thrown away when the ambiguities were resolved
+        self.discarded_alternatives: "MutableMapping[str, int]" = {}
+        self.parse_time = 0.0
+
+    @property
+    def total_items(self) -> "int":
+        return sum(self.items_per_rule.values())
+
+    def as_dict(self) -> "Mapping[str, Any]":
+        return {
+            "label": self.label,
+            "tokens": max(len(self.columns) - 1, 0),
+            "total_items": self.total_items,
+            "parse_time": self.parse_time,
+            "columns": [column._asdict() for column in self.columns],
+            "items_per_rule": dict(self.items_per_rule),
+            "chart_ambiguities": dict(self.chart_ambiguities),
+            "resolved_ambiguities": dict(self.resolved_ambiguities),
+            "discarded_alternatives": dict(self.discarded_alternatives),
+        }
+
+
+def _symbol_rule_name(s: "Any") -> "str":
+    # Intermediate nodes are labelled with (rule, ptr)
+    if isinstance(s, tuple):
+        return cast("str", s[0].origin.name)
+    return cast("str", s.name)
+
+
+def _inc(counter: "MutableMapping[str, int]", key: "str", value: "int" = 1) -> None:
+    counter[key] = counter.get(key, 0) + value
+
+
+class EarleyChartRecorder:
+    """
+    It wraps the Earley parser of a Lark instance, so the chart is
+    inspected after each predict and complete step. The wrapped
+    instance is not shared with the regular parsing calls, as
+    the recording slows down the parsing. Calls are serialized.
+    """
+
+    def __init__(self, lark_parser: "Lark"):
+        earley = getattr(lark_parser.parser, "parser", None)
+        if not isinstance(earley, EarleyParser):
+            raise TypeError("Only the Earley parser can be diagnosed")
+
+        self.lark_parser = lark_parser
+        self.earley = earley
+        self.lock = threading.Lock()
+        self._current: "Optional[EarleyDiagnostics]" = None
+        self._tokens: "Sequence[LarkToken]" = []
+
+        # The SPPF is requested, in order to inspect it
+        self._tree_class = earley.Tree
+        earley.Tree = None
+
+        self._predict_and_complete: "Callable[..., None]" = earley.predict_and_complete
+        setattr(earley, "predict_and_complete", self._recording_predict_and_complete)
+
+    def _recording_predict_and_complete(
+        self,
+        i: "int",
+        to_scan: "Set[Any]",
+        columns: "List[Set[Any]]",
+        transitives: "Any",
+        node_cache: "Mapping[Any, SymbolNode]",
+    ) -> None:
+        t0 = time.perf_counter()
+        self._predict_and_complete(i, to_scan, columns, transitives, node_cache)
+        elapsed = time.perf_counter() - t0
+
+        diag = self._current
+        if diag is None:
+            return
+
+        column = columns[i]
+        for item in column:
+            _inc(diag.items_per_rule, item.rule.origin.name)
+        for item in to_scan:
+            _inc(diag.items_per_rule, item.rule.origin.name)
+
+        # All the symbol nodes ending at this position are already complete
+        for node in node_cache.values():
+            if len(node._children) > 1:
+                _inc(diag.chart_ambiguities, _symbol_rule_name(node.s))
+
+        token = self._tokens[i] if i < len(self._tokens) else None
+        diag.columns.append(
+            EarleyChartColumn(
+                position=i,
+                token_type=token.type if token is not None else None,
+                line=token.line if token is not None else None,
+                column=token.column if token is not None else None,
+                items=len(column),
+                to_scan=len(to_scan),
+                elapsed=elapsed,
+            )
+        )
+
+    def _record_forest(self, root: "SymbolNode", diag: "EarleyDiagnostics") -> None:
+        seen: "Set[int]" = set()
+        pending: "MutableSequence[Any]" = [root]
+        while len(pending) > 0:
+            node = pending.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            if isinstance(node, SymbolNode):
+                children = node.children
+                if len(children) > 1:
+                    rule_name = _symbol_rule_name(node.s)
+                    _inc(diag.resolved_ambiguities, rule_name)
+                    _inc(diag.discarded_alternatives, rule_name, len(children) - 1)
+                pending.extend(children)
+            elif isinstance(node, PackedNode):
+                if node.left is not None:
+                    pending.append(node.left)
+                if node.right is not None:
+                    pending.append(node.right)
+
+    def parse(
+        self, content: "str", label: "str" = ""
+    ) -> "Tuple[ParseTree, EarleyDiagnostics]":
+        lark_tokens = lex_groovy_content(content)
+        diag = EarleyDiagnostics(label)
+        with self.lock:
+            self._current = diag
+            self._tokens = lark_tokens
+            try:
+                t0 = time.perf_counter()
+                # The type ignore is needed due the poor type annotation of
+                # lark, which assumes the input is always a string
+                root = self.lark_parser.parse(lark_tokens)  # type: ignore[arg-type]
+                diag.parse_time = time.perf_counter() - t0
+            finally:
+                self._current = None
+                self._tokens = []
+
+        self._record_forest(cast("SymbolNode", root), diag)
+
+        # Same conversion the Earley parser does from the SPPF
+        earley = self.earley
+        transformer = ForestToParseTree(
+            self._tree_class,
+            earley.callbacks,
+            earley.forest_sum_visitor and earley.forest_sum_visitor(),  # type: ignore[no-untyped-call]
+            earley.resolve_ambiguity,
+            not earley.resolve_ambiguity,
+        )
+        tree = transformer.transform(root)  # type: ignore[no-untyped-call]
+
+        return tree, diag
+
+
+@functools.lru_cache(maxsize=None)
+def get_chart_recorder() -> "EarleyChartRecorder":
+    return EarleyChartRecorder(create_groovy_parser())
+
+
+def diagnose_groovy_content(
+    content: "str", label: "str" = ""
+) -> "Tuple[ParseTree, EarleyDiagnostics]":
+    """
+    It parses the content as parse_groovy_content does, also returning
+    what happened within the Earley chart
+    """
+    return get_chart_recorder().parse(content, label=label)
+
+
+def aggregate_earley_diagnostics(
+    diagnostics: "Iterable[EarleyDiagnostics]",
+    top: "int" = 20,
+) -> "Mapping[str, Any]":
+    """
+    It ranks the rules from a corpus by the number of Earley items they
+    created, which is what drives the parsing cost. The largest chart
+    columns are also reported, in order to locate the offending code,
+    so the end of input column (which has no token) is not ranked.
+    """
+    items_per_rule: "MutableMapping[str, int]" = {}
+    chart_ambiguities: "MutableMapping[str, int]" = {}
+    resolved_ambiguities: "MutableMapping[str, int]" = {}
+    discarded_alternatives: "MutableMapping[str, int]" = {}
+    hot_columns: "List[Mapping[str, Any]]" = []
+    files: "List[Mapping[str, Any]]" = []
+    for diag in diagnostics:
+        for counter, partial in (
+            (items_per_rule, diag.items_per_rule),
+            (chart_ambiguities, diag.chart_ambiguities),
+            (resolved_ambiguities, diag.resolved_ambiguities),
+            (discarded_alternatives, diag.discarded_alternatives),
+        ):
+            for rule_name, value in partial.items():
+                _inc(counter, rule_name, value)
+
+        tokens = max(len(diag.columns) - 1, 0)
+        files.append(
+            {
+                "label": diag.label,
+                "tokens": tokens,
+                "total_items": diag.total_items,
+                "items_per_token": diag.total_items / tokens if tokens > 0 else 0.0,
+                "parse_time": diag.parse_time,
+            }
+        )
+        for column in diag.columns:
+            if column.token_type is None:
+                continue
+            hot_columns.append({"label": diag.label, **column._asdict()})
+        # Only the largest ones are kept
+        hot_columns.sort(key=lambda entry: -(entry["items"] + entry["to_scan"]))
+        del hot_columns[top:]
+
+    total_items = sum(items_per_rule.values())
+    rules: "List[Mapping[str, Any]]" = [
+        {
+            "rule": rule_name,
+            "items": items,
+            "share": items / total_items if total_items > 0 else 0.0,
+            "chart_ambiguities": chart_ambiguities.get(rule_name, 0),
+            "resolved_ambiguities": resolved_ambiguities.get(rule_name, 0),
+            "discarded_alternatives": discarded_alternatives.get(rule_name, 0),
+        }
+        for rule_name, items in sorted(
+            items_per_rule.items(), key=lambda entry: (-entry[1], entry[0])
+        )
+    ]
+    ambiguous_rules = sorted(
+        (rule for rule in rules if rule["resolved_ambiguities"] > 0),
+        key=lambda rule: -rule["discarded_alternatives"],
+    )
+
+    return {
+        "files": sorted(files, key=lambda entry: -entry["items_per_token"]),
+        "total_items": total_items,
+        "rules": rules[:top],
+        "ambiguous_rules": ambiguous_rules[:top],
+        "hot_columns": hot_columns,
+    }
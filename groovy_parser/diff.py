@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Structural (Merkle) hashes of the digested trees, computed bottom-up,
+# and a diff of two digested trees which skips the identical subtrees
+# by their hashes, reporting the changed process and workflow nodes.
+# The hashes of a content are cached next to its digested tree.
+
+import contextlib
+import difflib
+import hashlib
+import os
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Hashable,
+        Iterator,
+        Mapping,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Set,
+        Tuple,
+        Union,
+    )
+
+    from .parser import (
+        EmptyNode,
+        GroovyParseStats,
+        LeafNode,
+        RuleNode,
+    )
+
+from .nextflow import (
+    extract_nextflow_process,
+    extract_nextflow_workflow,
+    IDENTIFIER_RULE,
+    INCLUDE_PROCESS_RULE,
+    PRE_IDENTIFIER_NAME,
+    PROCESS_CHILD,
+    WORKFLOW_CHILD,
+)
+from .parser import (
+    _join_variants,
+    decode_groovy_source,
+    digested_leaf_value,
+    normalize_groovy_source,
+    normalize_groovy_text,
+    open_groovy_source,
+    parse_and_digest_groovy_file,
+    read_cached_digest,
+    SPANS_VARIANT,
+    write_cached_digest,
+)
+
+# Cache variant of the hashes of the digested trees
+MERKLE_VARIANT = "merkle"
+
+# Possible kinds of changes
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+def _hasher() -> "hashlib.blake2b":
+    # Hashes do not need to be cryptographically strong, only short and fast
+    return hashlib.blake2b(digest_size=16)
+
+
+def _leaf_value(leaf: "LeafNode", text: "Optional[str]") -> "Optional[str]":
+    if text is not None:
+        return digested_leaf_value(leaf, text)
+    if "value" not in leaf and "span" in leaf:
+        # Otherwise, all the literals and names would look the same
+        raise ValueError(
+            "The normalized text is needed by the digested trees with spans"
+        )
+    return leaf.get("value")
+
+
+def _leaf_digest(leaf: "LeafNode", text: "Optional[str]") -> "bytes":
+    h = _hasher()
+    value = _leaf_value(leaf, text)
+    h.update(b"L" + leaf["leaf"].encode("utf-8") + b"\0")
+    if value is not None:
+        h.update(value.encode("utf-8"))
+    return h.digest()
+
+
+def _add_hashes(
+    node: "Union[RuleNode, LeafNode, EmptyNode]",
+    text: "Optional[str]",
+) -> "Tuple[Union[RuleNode, LeafNode, EmptyNode], bytes]":
+    if "rule" not in node:
+        if "leaf" in node:
+            return node, _leaf_digest(cast("LeafNode", node), text)
+        return node, b"E"
+
+    r_node = cast("RuleNode", dict(node))
+    h = _hasher()
+    h.update(b"R" + "/".join(r_node["rule"]).encode("utf-8") + b"\0")
+    children = []
+    for child in r_node["children"]:
+        h_child, digest = _add_hashes(child, text)
+        children.append(h_child)
+        h.update(digest)
+    r_node["children"] = children
+    digest = h.digest()
+    r_node["hash"] = digest.hex()
+    return r_node, digest
+
+
+def add_merkle_hashes(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    text: "Optional[str]" = None,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    It returns a copy of the digested tree where each rule node carries
+    the structural hash of its subtree, computed bottom-up from the rules
+    and the leaves, but not from the spans. Trees with spans need the
+    normalized text, as some of their leaves do not keep their values,
+    so ValueError is raised without it.
+    """
+    h_tree, _ = _add_hashes(t_tree, text)
+    return h_tree
+
+
+def _iter_rule_nodes(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+) -> "Iterator[RuleNode]":
+    pending = [t_tree]
+    while len(pending) > 0:
+        node = pending.pop()
+        if "rule" in node:
+            r_node = cast("RuleNode", node)
+            yield r_node
+            pending.extend(reversed(r_node["children"]))
+
+
+def _pack_hashes(h_tree: "Union[RuleNode, LeafNode, EmptyNode]") -> "Mapping[str, Any]":
+    """
+    The cached form of the hashes, in the preorder of the rule nodes,
+    so the tree is not stored twice
+    """
+    return {"hashes": [r_node["hash"] for r_node in _iter_rule_nodes(h_tree)]}
+
+
+def _unpack_hashes(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    packed: "Mapping[str, Any]",
+) -> "Optional[Union[RuleNode, LeafNode, EmptyNode]]":
+    hashes = iter(packed.get("hashes", []))
+
+    def _unpack(
+        node: "Union[RuleNode, LeafNode, EmptyNode]",
+    ) -> "Union[RuleNode, LeafNode, EmptyNode]":
+        if "rule" not in node:
+            return node
+        r_node = cast("RuleNode", dict(node))
+        r_node["hash"] = next(hashes)
+        r_node["children"] = [_unpack(child) for child in r_node["children"]]
+        return r_node
+
+    try:
+        h_tree = _unpack(t_tree)
+    except StopIteration:
+        return None
+    # Stale entries, with a different number of nodes, are computed again
+    if next(hashes, None) is not None:
+        return None
+    return h_tree
+
+
+def _read_groovy_text(path: "Union[str, os.PathLike[str]]") -> "str":
+    # The text the spans refer to
+    with open_groovy_source(path) as source:
+        return normalize_groovy_text(decode_groovy_source(source, os.fspath(path)))
+
+
+def parse_and_digest_groovy_file_hashed(
+    path: "Union[str, os.PathLike[str]]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    stats: "Optional[GroovyParseStats]" = None,
+    spans: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    Same as parse_and_digest_groovy_file, but the rule nodes of the
+    digested tree carry their structural hashes (see add_merkle_hashes),
+    which are cached next to the tree. The leaves of the trees with
+    spans are hashed from the normalized text of the file.
+    """
+    t_tree = parse_and_digest_groovy_file(
+        path,
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        stats=stats,
+        spans=spans,
+    )
+    if cache_directory is None and not spans:
+        return add_merkle_hashes(t_tree)
+
+    text: "Optional[str]" = None
+    entry: "Optional[Union[RuleNode, LeafNode, EmptyNode, Mapping[str, Any]]]" = None
+    hashpath = None
+    with contextlib.ExitStack() as stack:
+        source = stack.enter_context(open_groovy_source(path))
+        if spans:
+            text = normalize_groovy_text(decode_groovy_source(source, os.fspath(path)))
+        if cache_directory is not None:
+            # The cache outcome told by the stats is the one of the tree
+            entry, hashpath = read_cached_digest(
+                lambda: normalize_groovy_source(source),
+                ro_cache_directories=ro_cache_directories,
+                cache_directory=cache_directory,
+                variant=_join_variants(
+                    SPANS_VARIANT if spans else None, MERKLE_VARIANT
+                ),
+            )
+
+    h_tree = None
+    if entry is not None:
+        h_tree = _unpack_hashes(t_tree, cast("Mapping[str, Any]", entry))
+    if h_tree is None:
+        h_tree = add_merkle_hashes(t_tree, text)
+        if hashpath is not None:
+            write_cached_digest(hashpath, _pack_hashes(h_tree))
+
+    return h_tree
+
+
+class TreeChange(NamedTuple):
+    # Either ADDED, REMOVED or CHANGED
+    kind: "str"
+    # Labels of the process and workflow nodes (like "process FOO" or
+    # "workflow") enclosing the change, outermost first. The changes
+    # out of them are labelled with the position of the top level
+    # statement (like "statement 3") in the new tree (or the old one,
+    # when it was removed)
+    path: "Sequence[str]"
+    old: "Optional[Union[RuleNode, LeafNode, EmptyNode]]"
+    new: "Optional[Union[RuleNode, LeafNode, EmptyNode]]"
+
+
+class GroovyTreeDiff(NamedTuple):
+    changes: "Sequence[TreeChange]"
+    # Rule nodes whose children had to be compared, as the
+    # identical subtrees are skipped by their hashes
+    visited_nodes: "int"
+
+
+def _without_spans(
+    node: "Union[RuleNode, LeafNode, EmptyNode]", text: "str"
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    A copy of a digested tree with spans as the one without them, which
+    is the one the extraction of the Nextflow features understands
+    """
+    if "rule" in node:
+        r_node = cast("RuleNode", node)
+        return {
+            "rule": r_node["rule"],
+            "children": [_without_spans(child, text) for child in r_node["children"]],
+        }
+    if "leaf" in node:
+        leaf = cast("LeafNode", node)
+        return {"leaf": leaf["leaf"], "value": digested_leaf_value(leaf, text)}
+    return node
+
+
+def nextflow_node_label(
+    node: "Union[RuleNode, LeafNode, EmptyNode]",
+    text: "Optional[str]" = None,
+) -> "Optional[str]":
+    """
+    It tells whether the node is a process or a workflow declaration,
+    labelling it as extract_nextflow_features would find it. Nodes with
+    spans need the normalized text.
+    """
+    if "rule" not in node:
+        return None
+    r_node = cast("RuleNode", node)
+    if r_node["rule"][-len(INCLUDE_PROCESS_RULE) :] != INCLUDE_PROCESS_RULE:
+        return None
+    if text is not None:
+        r_node = cast("RuleNode", _without_spans(r_node, text))
+
+    children = r_node["children"]
+    if len(children) < 2 or "rule" not in children[0]:
+        return None
+    head = cast("RuleNode", children[0])
+    if head["rule"][-len(PRE_IDENTIFIER_NAME) :] == PRE_IDENTIFIER_NAME:
+        if len(head["children"]) == 0 or "rule" not in head["children"][0]:
+            return None
+        head = cast("RuleNode", head["children"][0])
+    if head["rule"][-len(IDENTIFIER_RULE) :] != IDENTIFIER_RULE:
+        return None
+
+    body = cast("RuleNode", children[1])
+    if "rule" not in body:
+        return None
+    if head["children"][0] == PROCESS_CHILD:
+        return "process " + extract_nextflow_process(body).name
+    if head["children"][0] == WORKFLOW_CHILD:
+        name = extract_nextflow_workflow(body).name
+        return "workflow" if name is None else "workflow " + name
+    return None
+
+
+def _node_key(
+    node: "Union[RuleNode, LeafNode, EmptyNode]", text: "Optional[str]"
+) -> "Hashable":
+    if "rule" in node:
+        return cast("RuleNode", node)["hash"]
+    if "leaf" in node:
+        leaf = cast("LeafNode", node)
+        return (leaf["leaf"], _leaf_value(leaf, text))
+    return None
+
+
+class _TreeDiffer:
+    def __init__(self, old_text: "Optional[str]", new_text: "Optional[str]") -> None:
+        # The normalized texts of the trees with spans
+        self.old_text = old_text
+        self.new_text = new_text
+        self.changes: "MutableSequence[TreeChange]" = []
+        self.recorded: "Set[Tuple[str, Tuple[str, ...]]]" = set()
+        self.visited_nodes = 0
+
+    def _record(
+        self,
+        kind: "str",
+        path: "Tuple[str, ...]",
+        old: "Optional[Union[RuleNode, LeafNode, EmptyNode]]",
+        new: "Optional[Union[RuleNode, LeafNode, EmptyNode]]",
+    ) -> None:
+        # Each enclosing node is reported once
+        if (kind, path) not in self.recorded:
+            self.recorded.add((kind, path))
+            self.changes.append(TreeChange(kind=kind, path=path, old=old, new=new))
+
+    def diff(
+        self,
+        old: "Union[RuleNode, LeafNode, EmptyNode]",
+        new: "Union[RuleNode, LeafNode, EmptyNode]",
+        path: "Tuple[str, ...]",
+        owners: "Tuple[Union[RuleNode, LeafNode, EmptyNode], Union[RuleNode, LeafNode, EmptyNode]]",
+    ) -> None:
+        if _node_key(old, self.old_text) == _node_key(new, self.new_text):
+            return
+        if (
+            "rule" not in old
+            or "rule" not in new
+            or cast("RuleNode", old)["rule"] != cast("RuleNode", new)["rule"]
+        ):
+            self._record(CHANGED, path, *owners)
+            return
+
+        self.visited_nodes += 1
+        old_children = cast("RuleNode", old)["children"]
+        new_children = cast("RuleNode", new)["children"]
+        matcher = difflib.SequenceMatcher(
+            None,
+            [_node_key(child, self.old_text) for child in old_children],
+            [_node_key(child, self.new_text) for child in new_children],
+            autojunk=False,
+        )
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            self._diff_children(
+                old_children, range(i1, i2), new_children, range(j1, j2), path, owners
+            )
+
+    def _diff_children(
+        self,
+        old_children: "Sequence[Union[RuleNode, LeafNode, EmptyNode]]",
+        old_range: "range",
+        new_children: "Sequence[Union[RuleNode, LeafNode, EmptyNode]]",
+        new_range: "range",
+        path: "Tuple[str, ...]",
+        owners: "Tuple[Union[RuleNode, LeafNode, EmptyNode], Union[RuleNode, LeafNode, EmptyNode]]",
+    ) -> None:
+        # Process and workflow nodes are paired by their labels
+        old_labelled: "MutableMapping[str, MutableSequence[int]]" = {}
+        old_rest = []
+        for i in old_range:
+            label = nextflow_node_label(old_children[i], self.old_text)
+            if label is None:
+                old_rest.append(i)
+            else:
+                old_labelled.setdefault(label, []).append(i)
+
+        new_rest = []
+        for j in new_range:
+            label = nextflow_node_label(new_children[j], self.new_text)
+            if label is None:
+                new_rest.append(j)
+            elif len(old_labelled.get(label, [])) > 0:
+                old_child = old_children[old_labelled[label].pop(0)]
+                self.diff(
+                    old_child,
+                    new_children[j],
+                    path + (label,),
+                    (old_child, new_children[j]),
+                )
+            else:
+                self._record(ADDED, path + (label,), None, new_children[j])
+        for label, indices in old_labelled.items():
+            for i in indices:
+                self._record(REMOVED, path + (label,), old_children[i], None)
+
+        # The rest are paired by their position. The top level
+        # statements are labelled by it, as they have no owner
+        for i, j in zip(old_rest, new_rest):
+            if len(path) == 0:
+                label = f"statement {j}"
+                self.diff(
+                    old_children[i],
+                    new_children[j],
+                    (label,),
+                    (old_children[i], new_children[j]),
+                )
+            else:
+                self.diff(old_children[i], new_children[j], path, owners)
+        if len(path) > 0:
+            if len(old_rest) != len(new_rest):
+                self._record(CHANGED, path, *owners)
+        else:
+            for i in old_rest[len(new_rest) :]:
+                self._record(REMOVED, (f"statement {i}",), old_children[i], None)
+            for j in new_rest[len(old_rest) :]:
+                self._record(ADDED, (f"statement {j}",), None, new_children[j])
+
+
+def diff_digested_trees(
+    old_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    new_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    old_text: "Optional[str]" = None,
+    new_text: "Optional[str]" = None,
+) -> "GroovyTreeDiff":
+    """
+    It compares two digested trees, descending only into the subtrees
+    whose hashes differ, and it reports the added, removed and changed
+    process and workflow nodes (and top level statements), with their
+    paths. Trees without hashes get them through add_merkle_hashes.
+    Trees with spans need their normalized texts (see add_merkle_hashes).
+    """
+    if "rule" in old_tree and "hash" not in old_tree:
+        old_tree = add_merkle_hashes(old_tree, old_text)
+    if "rule" in new_tree and "hash" not in new_tree:
+        new_tree = add_merkle_hashes(new_tree, new_text)
+
+    differ = _TreeDiffer(old_text, new_text)
+    differ.diff(old_tree, new_tree, (), (old_tree, new_tree))
+
+    return GroovyTreeDiff(changes=differ.changes, visited_nodes=differ.visited_nodes)
+
+
+def diff_groovy_files(
+    old_path: "Union[str, os.PathLike[str]]",
+    new_path: "Union[str, os.PathLike[str]]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    spans: "bool" = False,
+) -> "GroovyTreeDiff":
+    """
+    It compares two versions of a Groovy file, using the cached digested
+    trees and hashes when they are available. With spans, the trees of
+    the changes have spans, and their leaves are compared through the
+    normalized texts of the files.
+    """
+    old_text: "Optional[str]" = None
+    new_text: "Optional[str]" = None
+    if spans:
+        old_text = _read_groovy_text(old_path)
+        new_text = _read_groovy_text(new_path)
+
+    return diff_digested_trees(
+        parse_and_digest_groovy_file_hashed(
+            old_path,
+            ro_cache_directories=ro_cache_directories,
+            cache_directory=cache_directory,
+            spans=spans,
+        ),
+        parse_and_digest_groovy_file_hashed(
+            new_path,
+            ro_cache_directories=ro_cache_directories,
+            cache_directory=cache_directory,
+            spans=spans,
+        ),
+        old_text=old_text,
+        new_text=new_text,
+    )
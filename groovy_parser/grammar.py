@@ -0,0 +1,769 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# https://github.com/daniellansun/groovy-antlr4-grammar-optimized/tree/master/src/main/antlr4/org/codehaus/groovy/parser/antlr4
+
+# Everything which depends on lark: the JSON encoders of the trees, the
+# construction of both the full and the inlined parsers, and the recovering
+# parsing
+
+import bisect
+import functools
+import json
+import re
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Callable,
+        List,
+        Mapping,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Set,
+        Tuple,
+        Type,
+        Union,
+    )
+    from lark.tree import ParseTree
+
+    from .parser import (
+        EmptyNode,
+        LeafNode,
+        ParseErrorLocation,
+        RuleNode,
+    )
+
+from lark import (
+    Lark,
+    Tree as LarkTree,
+)
+from lark.exceptions import (
+    ParseError as LarkParseError,
+    UnexpectedEOF,
+    UnexpectedInput,
+)
+from lark.lexer import Token as LarkToken
+from lark.parse_tree_builder import ExpandSingleChild
+from lark.tree import Meta
+
+from .lexer import (
+    PygmentsGroovyLexer,
+    SEPARATOR_TERMINALS,
+    top_level_boundaries,
+)
+from .parser import (
+    children_span,
+    GROOVY_3_0_X_GRAMMAR,
+    GROOVY_START_RULES,
+)
+
+
+class LarkTokenEncoder(json.JSONEncoder):
+    def __init__(
+        self,
+        *args: "Any",
+        spans: "bool" = False,
+        text: "Optional[str]" = None,
+        **kwargs: "Any",
+    ):
+        """
+        With spans, the nodes tell the [start, end] offsets they cover
+        within the normalized text. When that text is provided, the values
+        of the leaves which are the very same text of their span are not
+        kept, as they can be reconstructed.
+        """
+        super().__init__(*args, **kwargs)
+        self.spans = spans
+        self.text = text
+
+    def default(
+        self,
+        obj: "Any",
+    ) -> "LeafNode":
+        if isinstance(obj, LarkToken):
+            value = obj.value[1] if isinstance(obj.value, tuple) else obj.value
+            if not self.spans:
+                return {
+                    "leaf": obj.type,
+                    #                "value": json.JSONEncoder.default(self, obj.value[1] if isinstance(obj.value, tuple) else obj.value),
+                    "value": value,
+                }
+
+            start = cast("int", obj.start_pos)
+            end = cast("int", obj.end_pos)
+            leaf: "LeafNode" = {
+                "leaf": obj.type,
+                "span": [start, end],
+            }
+            if self.text is None or self.text[start:end] != value:
+                leaf["value"] = value
+            return leaf
+
+        # Let the base class default method raise the TypeError
+        return cast("LeafNode", json.JSONEncoder.default(self, obj))
+
+
+class LarkFilteringTreeEncoder(LarkTokenEncoder):
+    def default(  # type: ignore[override]
+        self,
+        obj: "Any",
+        rule: "Sequence[str]" = [],
+        prune: "Sequence[str]" = ["sep", "nls"],
+        noflat: "Sequence[str]" = ["script_statement"],
+    ) -> "Union[LeafNode, RuleNode, EmptyNode]":
+        if isinstance(obj, LarkTree):
+            new_rule = cast("MutableSequence[str]", rule[:])
+            # This is needed because the type annotation of the data
+            # facet from a lark tree is str instead of Token
+            # (which is a subclass of str)
+            # Rules inlined by the inlined parser
+            if isinstance(obj, InlinedTree):
+                new_rule.extend(obj.inlined)
+            new_rule.append(cast("LarkToken", obj.data).value)
+            children = []
+            for child in obj.children:
+                if isinstance(child, LarkTree) and child.data in prune:
+                    continue
+                children.append(child)
+            if children:
+                if (
+                    len(children) == 1
+                    and isinstance(children[0], LarkTree)
+                    and outer_rule_name(children[0]) not in noflat
+                ):
+                    return self.default(
+                        children[0],
+                        rule=new_rule,
+                        prune=prune,
+                        noflat=noflat,
+                    )
+                else:
+                    t_children = [
+                        self.default(
+                            child,
+                            prune=prune,
+                            noflat=noflat,
+                        )
+                        for child in children
+                    ]
+                    r_node: "RuleNode" = {
+                        "rule": new_rule,
+                        "children": t_children,
+                    }
+                    if self.spans:
+                        span = children_span(t_children)
+                        if span is not None:
+                            r_node["span"] = span
+                    # The unparsable regions always tell where they are
+                    if isinstance(obj, ParseErrorTree):
+                        r_node["error"] = obj.as_dict()
+                    return r_node
+            else:
+                # No children!!!!!!!
+                return {}
+
+        # Let the base class default method raise the TypeError (if it is the case)
+        return super().default(obj)
+
+
+class GroovyLark(Lark):
+    """
+    Parser compiled once for all the GROOVY_START_RULES, so fragments
+    can be parsed from any of them sharing the grammar analysis. When
+    no start rule is told, the first one (compilation_unit) is used,
+    as it was the only one.
+    """
+
+    def parse(
+        self,
+        text: "Any",
+        start: "Optional[str]" = None,
+        on_error: "Optional[Callable[[UnexpectedInput], bool]]" = None,
+    ) -> "ParseTree":
+        return super().parse(
+            text,
+            start=self.options.start[0] if start is None else start,
+            on_error=on_error,
+        )
+
+
+def create_groovy_parser() -> "Lark":
+    with open(GROOVY_3_0_X_GRAMMAR, mode="r", encoding="utf-8") as gH:
+        parser = GroovyLark(
+            gH,
+            lexer=PygmentsGroovyLexer,
+            #    parser='lalr',
+            #    debug=True,
+            start=list(GROOVY_START_RULES),
+            # ambiguity='explicit',
+            # lexer_callbacks={
+            #    'square_bracket_block': jarlmethod
+            # }
+        )
+
+    return parser
+
+
+@functools.lru_cache(maxsize=None)
+def get_groovy_parser() -> "Lark":
+    """
+    Building the parser is expensive, so the same instance is
+    reused by all the parsing calls within the process
+    """
+    return create_groovy_parser()
+
+
+class InlinedTree(LarkTree["LarkToken"]):
+    """
+    Tree built by the inlined parser. It remembers the names of the
+    single child rules which were inlined over it, outermost first,
+    so the digested tree keeps the very same rule paths
+    """
+
+    def __init__(
+        self,
+        data: "str",
+        children: "List[Union[str, LarkTree[LarkToken]]]",
+        meta: "Optional[Meta]" = None,
+    ):
+        super().__init__(data, children, meta)  # type: ignore[arg-type]
+        self.inlined: "Tuple[str, ...]" = ()
+
+
+def outer_rule_name(tree: "LarkTree[LarkToken]") -> "str":
+    """
+    The name of the rule which was matched, which is not the tree
+    one when single child rules were inlined over it
+    """
+    if isinstance(tree, InlinedTree) and len(tree.inlined) > 0:
+        return tree.inlined[0]
+    return tree.data
+
+
+class _InliningExpandSingleChild:
+    """
+    Replacement of lark ExpandSingleChild for the ?rules of the inlined
+    grammar. Only those single children which would be flattened by
+    LarkFilteringTreeEncoder are inlined, recording the rule name.
+    """
+
+    def __init__(
+        self,
+        rule_name: "str",
+        node_builder: "Callable[[List[Any]], Any]",
+        noflat: "Sequence[str]",
+    ):
+        self.rule_name = rule_name
+        self.node_builder = node_builder
+        self.noflat = noflat
+
+    def __call__(self, children: "List[Any]") -> "Any":
+        if len(children) == 1 and isinstance(children[0], InlinedTree):
+            child = children[0]
+            if outer_rule_name(child) not in self.noflat:
+                child.inlined = (self.rule_name,) + child.inlined
+                return child
+
+        return self.node_builder(children)
+
+
+RULE_DEFINITION_RE = re.compile(r"^\??([a-z_][a-z0-9_]*)\s*:")
+TERMINAL_RE = re.compile(r"\b([A-Z][A-Z0-9_]*)\b")
+NONTERMINAL_RE = re.compile(r"\b[a-z][a-z0-9_]*\b")
+EBNF_TOKEN_RE = re.compile(r"[()|?*+]|[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _parse_ebnf(
+    tokens: "Sequence[str]", pos: "int" = 0
+) -> "Tuple[List[List[Tuple[Any, str]]], int]":
+    """
+    It parses the alternatives of a rule body (or of a group within it)
+    into lists of (atom, operator) items, where the atom is either a
+    symbol name or the alternatives of a group
+    """
+    alternatives: "List[List[Tuple[Any, str]]]" = [[]]
+    while pos < len(tokens) and tokens[pos] != ")":
+        token = tokens[pos]
+        pos += 1
+        if token == "|":
+            alternatives.append([])
+            continue
+        atom: "Any" = token
+        if token == "(":
+            atom, pos = _parse_ebnf(tokens, pos)
+            # The closing parenthesis
+            pos += 1
+        operator = ""
+        if pos < len(tokens) and tokens[pos] in ("?", "*", "+"):
+            operator = tokens[pos]
+            pos += 1
+        alternatives[-1].append((atom, operator))
+
+    return alternatives, pos
+
+
+def _restrict_ebnf(
+    alternatives: "Sequence[Sequence[Tuple[Any, str]]]",
+    excluded: "Set[str]",
+) -> "List[str]":
+    """
+    It returns the alternatives which do not need any of the excluded
+    symbols, as grammar text. Optional items which need them are
+    removed instead of the whole alternative.
+    """
+    restricted = []
+    for items in alternatives:
+        texts: "Optional[List[str]]" = []
+        for atom, operator in items:
+            if isinstance(atom, str):
+                text = None if atom in excluded else atom
+            else:
+                group = _restrict_ebnf(atom, excluded)
+                text = "( " + " | ".join(group) + " )" if len(group) > 0 else None
+            if text is not None:
+                assert texts is not None
+                texts.append(text + operator)
+            elif operator not in ("?", "*"):
+                texts = None
+                break
+        if texts is not None:
+            restricted.append(" ".join(texts))
+
+    return restricted
+
+
+def derive_groovy_grammar_subset(
+    grammar: "str",
+    start: "str" = "compilation_unit",
+    excluded: "Sequence[str]" = [],
+) -> "str":
+    """
+    It derives a grammar which only accepts the subset of the language
+    which does not need the excluded rules and terminals. The remaining
+    rules keep their names and the shape of their alternatives, so the
+    parse trees of that subset are the ones from the original grammar.
+    Rules which are left without alternatives, or are not reachable
+    from the start one, are removed.
+    """
+    rules: "MutableMapping[str, Tuple[str, str]]" = {}
+    declarations: "MutableSequence[str]" = []
+    rule_name: "Optional[str]" = None
+    for line in grammar.splitlines():
+        if line.startswith("//"):
+            continue
+        if line.startswith("%"):
+            rule_name = None
+            declarations.append(line)
+            continue
+        rule_match = RULE_DEFINITION_RE.match(line)
+        if rule_match is not None:
+            rule_name = rule_match.group(1)
+            rules[rule_name] = (line[: rule_match.end()], line[rule_match.end() :])
+        elif rule_name is not None and line.strip() != "":
+            head, body = rules[rule_name]
+            rules[rule_name] = (head, body + " " + line.strip())
+
+    parsed = {
+        name: _parse_ebnf(EBNF_TOKEN_RE.findall(body))[0]
+        for name, (_, body) in rules.items()
+    }
+    unusable = set(excluded)
+    bodies: "MutableMapping[str, List[str]]" = {}
+    # Excluding a rule can leave others without alternatives
+    while True:
+        bodies = {
+            name: _restrict_ebnf(alternatives, unusable)
+            for name, alternatives in parsed.items()
+            if name not in unusable
+        }
+        emptied = {name for name, body in bodies.items() if len(body) == 0}
+        if len(emptied) == 0:
+            break
+        unusable.update(emptied)
+
+    if start not in bodies:
+        raise ValueError(f"Start rule {start} is excluded")
+    reachable = {start}
+    pending = [start]
+    while len(pending) > 0:
+        for symbol in NONTERMINAL_RE.findall(" ".join(bodies[pending.pop()])):
+            if symbol in bodies and symbol not in reachable:
+                reachable.add(symbol)
+                pending.append(symbol)
+
+    derived = [
+        rules[name][0] + " " + "\n    | ".join(body)
+        for name, body in bodies.items()
+        if name in reachable
+    ]
+    return "\n\n".join(derived) + "\n\n" + "\n".join(declarations) + "\n"
+
+
+def derive_inlined_groovy_grammar(
+    grammar: "str",
+    start: "str" = "compilation_unit",
+    prune: "Sequence[str]" = ["sep", "nls"],
+) -> "Tuple[str, Mapping[str, str]]":
+    """
+    It derives a grammar which accepts the same language, but whose
+    parse trees do not contain the nodes thrown away by the digestion.
+    Pruned rules become _rules made of filtered out terminals, which
+    are aliases of the original ones, and the remaining rules
+    (but the start one) become ?rules. It returns the derived grammar
+    and the mapping from the filtered out terminals to the original ones.
+    """
+    if len(prune) > 0:
+        prune_re = re.compile(r"\b(" + "|".join(map(re.escape, prune)) + r")\b")
+    aliases: "MutableMapping[str, str]" = {}
+    derived: "MutableSequence[str]" = []
+    rule_name: "Optional[str]" = None
+    for line in grammar.splitlines():
+        if line.startswith("//"):
+            derived.append(line)
+            continue
+
+        rule_match = RULE_DEFINITION_RE.match(line)
+        if rule_match is not None:
+            rule_name = rule_match.group(1)
+        elif line.startswith("%"):
+            rule_name = None
+
+        if rule_name in prune:
+            head = ""
+            body = line
+            if rule_match is not None:
+                head = "_" + line[rule_match.start(1) : rule_match.end()]
+                body = line[rule_match.end() :]
+            if NONTERMINAL_RE.search(body) is not None:
+                raise ValueError(
+                    f"Rule {rule_name} cannot be pruned, as it is not only made of terminals"
+                )
+            for terminal in TERMINAL_RE.findall(body):
+                aliases["_" + terminal] = terminal
+            line = head + TERMINAL_RE.sub(r"_\1", body)
+        else:
+            if len(prune) > 0:
+                line = prune_re.sub(r"_\1", line)
+            if (
+                rule_match is not None
+                and rule_name != start
+                and not line.startswith("?")
+            ):
+                line = "?" + line
+        derived.append(line)
+
+    if len(aliases) > 0:
+        derived.append("%declare " + " ".join(sorted(aliases.keys())))
+
+    return "\n".join(derived) + "\n", aliases
+
+
+def create_inlined_groovy_parser(
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    excluded: "Sequence[str]" = [],
+) -> "Lark":
+    """
+    Parser built from the derived grammar. Its trees are only meant
+    to be digested with the same prune and noflat parameters. When
+    there are excluded rules and terminals, the grammar is derived
+    from the subset of the language which does not need them.
+    """
+    with open(GROOVY_3_0_X_GRAMMAR, mode="r", encoding="utf-8") as gH:
+        grammar = gH.read()
+    if len(excluded) > 0:
+        grammar = derive_groovy_grammar_subset(
+            grammar, start="compilation_unit", excluded=excluded
+        )
+    grammar, aliases = derive_inlined_groovy_grammar(
+        grammar, start="compilation_unit", prune=prune
+    )
+
+    parser = GroovyLark(
+        grammar,
+        lexer=PygmentsGroovyLexer,
+        start=list(GROOVY_START_RULES),
+        tree_class=InlinedTree,
+    )
+
+    earley = parser.parser.parser
+    # The tokens from the lexer also match their filtered out aliases
+    earley.term_matcher = (
+        lambda term, token: aliases.get(term.name, term.name) == token.type
+    )
+    for rule, callback in earley.callbacks.items():
+        if not rule.options.expand1:
+            continue
+        outer = None
+        wrapper = callback
+        while wrapper is not None and not isinstance(wrapper, ExpandSingleChild):
+            outer = wrapper
+            wrapper = getattr(wrapper, "node_builder", None)
+        if wrapper is None:
+            continue
+        replacement = _InliningExpandSingleChild(
+            str(rule.origin.name), wrapper.node_builder, noflat
+        )
+        if outer is None:
+            earley.callbacks[rule] = replacement
+        else:
+            outer.node_builder = replacement
+
+    return parser
+
+
+@functools.lru_cache(maxsize=None)
+def get_inlined_groovy_parser(
+    prune: "Tuple[str, ...]" = ("sep", "nls"),
+    noflat: "Tuple[str, ...]" = ("script_statement",),
+    excluded: "Tuple[str, ...]" = (),
+) -> "Lark":
+    return create_inlined_groovy_parser(prune=prune, noflat=noflat, excluded=excluded)
+
+
+class CachedParseError(LarkParseError, UnexpectedInput):
+    """
+    Parse error replayed from the negative cache, so the content is not
+    parsed again. error_type is the name of the original exception
+    class, and the message, position and expected terminals are the
+    original ones.
+    """
+
+    def __init__(
+        self,
+        error_type: "str",
+        message: "str",
+        line: "int",
+        column: "int",
+        pos_in_stream: "Optional[int]",
+        expected: "Sequence[str]",
+    ):
+        super().__init__(message)
+        self.error_type = error_type
+        self.message = message
+        self.line = line
+        self.column = column
+        self.pos_in_stream = pos_in_stream  # type: ignore[assignment]
+        self.expected = expected
+
+    def __reduce__(self) -> "Tuple[Any, ...]":
+        return (
+            self.__class__,
+            (
+                self.error_type,
+                self.message,
+                self.line,
+                self.column,
+                self.pos_in_stream,
+                self.expected,
+            ),
+        )
+
+    def __str__(self) -> "str":
+        return self.message
+
+
+class ParseErrorTree(LarkTree["LarkToken"]):
+    """
+    Region of tokens which could not be parsed, found by the recovering
+    parsing. Its meta holds the span of the region (trailing separators
+    excluded), and error the exception raised within it.
+    """
+
+    def __init__(
+        self,
+        tokens: "Sequence[LarkToken]",
+        error: "LarkParseError",
+    ):
+        spanned = [tok for tok in tokens if tok.type not in SEPARATOR_TERMINALS]
+        if len(spanned) == 0:
+            spanned = list(tokens)
+        first = spanned[0]
+        last = spanned[-1]
+        raw_last = last.value[2] if isinstance(last.value, tuple) else last.value
+
+        meta = Meta()  # type: ignore[no-untyped-call]
+        meta.empty = False
+        meta.line = cast("int", first.line)
+        meta.column = cast("int", first.column)
+        meta.start_pos = cast("int", first.start_pos)
+        meta.end_pos = cast("int", last.end_pos)
+        meta.end_line = cast("int", last.line) + raw_last.count("\n")
+        if "\n" in raw_last:
+            meta.end_column = len(raw_last) - raw_last.rfind("\n") - 1
+        else:
+            meta.end_column = cast("int", last.column) + len(raw_last)
+
+        super().__init__(LarkToken("RULE", "parse_error"), list(tokens), meta)  # type: ignore[arg-type]
+        self.error = error
+
+    def as_dict(self) -> "ParseErrorLocation":
+        """
+        Where the region is and what the error was, as it is kept in
+        the parse_error nodes of the digested trees
+        """
+        return {
+            "message": str(self.error),
+            "line": self.meta.line,
+            "column": self.meta.column,
+            "end_line": self.meta.end_line,
+            "end_column": self.meta.end_column,
+            "span": [self.meta.start_pos, self.meta.end_pos],
+        }
+
+
+# How many top level statements are tried backwards, looking for
+# the end of the last parsable region before an error
+MAX_RECOVERY_BACKTRACK = 8
+
+
+def _error_index(
+    error: "LarkParseError", lark_tokens: "Sequence[LarkToken]", start: "int"
+) -> "int":
+    token = getattr(error, "token", None)
+    if isinstance(error, UnexpectedEOF) or not isinstance(token, LarkToken):
+        return len(lark_tokens)
+    for idx in range(start, len(lark_tokens)):
+        if lark_tokens[idx] is token:
+            return idx
+    for idx in range(start, len(lark_tokens)):
+        if lark_tokens[idx].start_pos == token.start_pos:
+            return idx
+
+    return len(lark_tokens)
+
+
+class _UnparsableRegion(NamedTuple):
+    # Token indices of the region
+    start: "int"
+    end: "int"
+    # The error which was raised at its beginning
+    error: "LarkParseError"
+
+
+def _merge_recovered_pieces(
+    pieces: "Sequence[Union[ParseTree, _UnparsableRegion]]",
+    lark_tokens: "Sequence[LarkToken]",
+) -> "Tuple[ParseTree, Sequence[ParseErrorTree]]":
+    """
+    The parsed pieces are compilation units, whose script statements
+    are concatenated, interleaving the unparsable regions
+    """
+    tree_class: "Type[ParseTree]" = LarkTree
+    unit_data: "Any" = LarkToken("RULE", "compilation_unit")
+    statements_data: "Any" = LarkToken("RULE", "script_statements")
+    head: "MutableSequence[Any]" = []
+    statements: "MutableSequence[Any]" = []
+    errors: "MutableSequence[ParseErrorTree]" = []
+    for i_piece, piece in enumerate(pieces):
+        if isinstance(piece, _UnparsableRegion):
+            error_tree = ParseErrorTree(
+                lark_tokens[piece.start : piece.end], piece.error
+            )
+            errors.append(error_tree)
+            statements.append(error_tree)
+            continue
+
+        tree_class = type(piece)
+        unit_data = piece.data
+        for child in piece.children:
+            if (
+                isinstance(child, LarkTree)
+                and outer_rule_name(child) == "script_statements"
+            ):
+                statements_data = child.data
+                statements.extend(child.children)
+            elif i_piece == 0:
+                head.append(child)
+            elif not isinstance(child, LarkTree) or child.data != "nls":
+                statements.append(child)
+
+    if len(statements) > 0:
+        head.append(tree_class(statements_data, list(statements)))
+
+    return tree_class(unit_data, list(head)), errors
+
+
+def parse_tokens_recovering(
+    parser: "Lark",
+    lark_tokens: "Sequence[LarkToken]",
+) -> "Tuple[ParseTree, Sequence[ParseErrorTree]]":
+    """
+    It parses the tokens, resynchronizing at the top level statement
+    boundaries when something cannot be parsed. Each unparsable region
+    becomes a ParseErrorTree among the script statements, and they are
+    also returned. The tree is the usual one when there are no errors.
+    """
+    boundaries = top_level_boundaries(lark_tokens)
+    num_tokens = len(lark_tokens)
+    pieces: "MutableSequence[Union[ParseTree, _UnparsableRegion]]" = []
+    start = 0
+    while True:
+        try:
+            # The type ignore is needed due the poor type annotation of
+            # lark, which assumes the input is always a string
+            pieces.append(parser.parse(lark_tokens[start:]))  # type: ignore[arg-type]
+            break
+        except LarkParseError as pe:
+            error_idx = _error_index(pe, lark_tokens, start)
+
+            # The longest parsable run of statements before the error
+            bad_start = start
+            i_first = bisect.bisect_right(boundaries, start)
+            i_last = bisect.bisect_right(boundaries, error_idx)
+            for i_boundary in range(
+                i_last - 1, max(i_first, i_last - MAX_RECOVERY_BACKTRACK) - 1, -1
+            ):
+                boundary = boundaries[i_boundary]
+                try:
+                    pieces.append(parser.parse(lark_tokens[start:boundary]))  # type: ignore[arg-type]
+                except LarkParseError:
+                    continue
+                bad_start = boundary
+                break
+
+            # The region ends at the next statement boundary
+            i_next = bisect.bisect_right(boundaries, error_idx)
+            bad_end = boundaries[i_next] if i_next < len(boundaries) else num_tokens
+
+            # Unparsable regions next to each other are joined
+            last_piece = pieces[-1] if len(pieces) > 0 else None
+            if (
+                isinstance(last_piece, _UnparsableRegion)
+                and last_piece.end == bad_start
+            ):
+                pieces[-1] = last_piece._replace(end=bad_end)
+            else:
+                pieces.append(_UnparsableRegion(start=bad_start, end=bad_end, error=pe))
+
+            start = bad_end
+            if start >= num_tokens:
+                break
+
+    if len(pieces) == 1 and not isinstance(pieces[0], _UnparsableRegion):
+        return pieces[0], []
+
+    return _merge_recovered_pieces(pieces, lark_tokens)
@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# groovy-parser, a proof of concept Groovy parser based on Pygments and Lark
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# SQLite index of the Nextflow features (processes, with their containers,
+# conda packages and templates, includes and workflows) of whole corpora,
+# so questions like which processes use a container, or who includes a
+# module, do not need to extract them again from every digested tree.
+# The features are kept per content (hash), along with the signature of
+# the software which extracted them, and the files are mapped to their
+# contents, so only the files which changed are hashed and parsed again.
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Iterable,
+        Iterator,
+        Mapping,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from .budget import ParseBudget
+    from .parser import RuleNode
+
+from .batch import (
+    digest_groovy_files,
+    hash_groovy_file,
+)
+from .nextflow import extract_nextflow_features
+from .parser import _signature_hash
+
+# Suffixes of the files which are indexed when walking directories
+DEFAULT_SUFFIXES = (".nf",)
+
+SCHEMA_VERSION = "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_content_hash ON files(content_hash);
+CREATE TABLE IF NOT EXISTS contents (
+    content_hash TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS processes (
+    process_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL REFERENCES contents(content_hash) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS processes_content_hash ON processes(content_hash);
+CREATE INDEX IF NOT EXISTS processes_name ON processes(name);
+CREATE TABLE IF NOT EXISTS process_containers (
+    process_id INTEGER NOT NULL REFERENCES processes(process_id) ON DELETE CASCADE,
+    container TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS process_containers_process_id ON process_containers(process_id);
+CREATE INDEX IF NOT EXISTS process_containers_container ON process_containers(container);
+CREATE TABLE IF NOT EXISTS process_condas (
+    process_id INTEGER NOT NULL REFERENCES processes(process_id) ON DELETE CASCADE,
+    conda TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS process_condas_process_id ON process_condas(process_id);
+CREATE INDEX IF NOT EXISTS process_condas_conda ON process_condas(conda);
+CREATE TABLE IF NOT EXISTS process_templates (
+    process_id INTEGER NOT NULL REFERENCES processes(process_id) ON DELETE CASCADE,
+    template TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS process_templates_process_id ON process_templates(process_id);
+CREATE INDEX IF NOT EXISTS process_templates_template ON process_templates(template);
+CREATE TABLE IF NOT EXISTS includes (
+    content_hash TEXT NOT NULL REFERENCES contents(content_hash) ON DELETE CASCADE,
+    include_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS includes_content_hash ON includes(content_hash);
+CREATE INDEX IF NOT EXISTS includes_include_path ON includes(include_path);
+CREATE TABLE IF NOT EXISTS workflows (
+    content_hash TEXT NOT NULL REFERENCES contents(content_hash) ON DELETE CASCADE,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS workflows_content_hash ON workflows(content_hash);
+CREATE INDEX IF NOT EXISTS workflows_name ON workflows(name);
+"""
+
+# Tables of the process features, and their value columns
+PROCESS_FEATURE_TABLES = {
+    "container": ("process_containers", "container"),
+    "conda": ("process_condas", "conda"),
+    "template": ("process_templates", "template"),
+}
+
+
+class IndexedProcess(NamedTuple):
+    path: "str"
+    content_hash: "str"
+    name: "str"
+    # Its row, shared by all the files with the same content
+    process_id: "int"
+
+
+class IndexedInclude(NamedTuple):
+    path: "str"
+    content_hash: "str"
+    include_path: "str"
+
+
+class IndexedWorkflow(NamedTuple):
+    path: "str"
+    content_hash: "str"
+    name: "Optional[str]"
+
+
+class IndexUpdateSummary(NamedTuple):
+    files: "int"
+    # Files whose size and modification time did not change
+    unchanged: "int"
+    # Files which changed, but whose content was already indexed
+    rehashed: "int"
+    # Distinct contents whose features were extracted
+    parsed: "int"
+    # Files which are gone
+    removed: "int"
+    # Contents which could not be parsed (or files which could not be read)
+    errors: "int"
+    elapsed_seconds: "float"
+
+
+def find_indexable_files(
+    paths: "Iterable[str]",
+    suffixes: "Sequence[str]" = DEFAULT_SUFFIXES,
+) -> "Iterator[str]":
+    """
+    It yields the given files, and the ones within the given
+    directories with any of the suffixes, as absolute paths
+    """
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(tuple(suffixes)):
+                        yield os.path.join(dirpath, filename)
+        else:
+            yield path
+
+
+def _hash_or_none(path: "str") -> "Optional[str]":
+    try:
+        return hash_groovy_file(path)
+    except OSError:
+        return None
+
+
+class GroovyFeatureIndex:
+    """
+    SQLite database with the Nextflow features of the indexed files.
+    update() keeps it in sync with the filesystem, and the query
+    methods answer from the database alone.
+    """
+
+    def __init__(self, db_path: "Union[str, os.PathLike[str]]"):
+        self.db_path = os.fspath(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO index_meta(key, value) VALUES ('schema_version', ?)",
+                (SCHEMA_VERSION,),
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "GroovyFeatureIndex":
+        return self
+
+    def __exit__(self, *exc_info: "Any") -> None:
+        self.close()
+
+    def _indexed_contents(self, signature: "str") -> "Mapping[str, str]":
+        return {
+            content_hash: content_signature
+            for content_hash, content_signature in self.conn.execute(
+                "SELECT content_hash, signature FROM contents"
+            )
+            if content_signature == signature
+        }
+
+    def _store_features(
+        self,
+        content_hash: "str",
+        signature: "str",
+        t_tree: "Optional[Mapping[str, Any]]",
+        error: "Optional[str]",
+    ) -> None:
+        # The rows of the previous signature are removed in cascade
+        self.conn.execute(
+            "DELETE FROM contents WHERE content_hash = ?", (content_hash,)
+        )
+        self.conn.execute(
+            "INSERT INTO contents(content_hash, signature, error) VALUES (?, ?, ?)",
+            (content_hash, signature, error),
+        )
+        if t_tree is None or "rule" not in t_tree:
+            return
+
+        processes, includes, workflows = extract_nextflow_features(
+            cast("RuleNode", t_tree)
+        )
+        for process in processes:
+            cursor = self.conn.execute(
+                "INSERT INTO processes(content_hash, name) VALUES (?, ?)",
+                (content_hash, process.name),
+            )
+            process_id = cursor.lastrowid
+            for values, (table, column) in (
+                (process.containers, PROCESS_FEATURE_TABLES["container"]),
+                (process.condas, PROCESS_FEATURE_TABLES["conda"]),
+                (process.templates, PROCESS_FEATURE_TABLES["template"]),
+            ):
+                self.conn.executemany(
+                    f"INSERT INTO {table}(process_id, {column}) VALUES (?, ?)",
+                    [(process_id, value) for value in values],
+                )
+        self.conn.executemany(
+            "INSERT INTO includes(content_hash, include_path) VALUES (?, ?)",
+            [(content_hash, include.path) for include in includes],
+        )
+        self.conn.executemany(
+            "INSERT INTO workflows(content_hash, name) VALUES (?, ?)",
+            [(content_hash, workflow.name) for workflow in workflows],
+        )
+
+    def update(
+        self,
+        paths: "Iterable[str]",
+        suffixes: "Sequence[str]" = DEFAULT_SUFFIXES,
+        cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+        ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+        max_workers: "Optional[int]" = None,
+        budget: "Optional[ParseBudget]" = None,
+    ) -> "IndexUpdateSummary":
+        """
+        It brings the index up to date with the given files and directories.
+        Files whose size and modification time did not change are not even
+        read, the changed ones are hashed, and only the contents which were
+        not indexed (or were indexed by another version of the software)
+        are parsed, through digest_groovy_files. The indexed files within
+        the given directories which are gone are removed.
+        """
+        t_start = time.perf_counter()
+        roots = [os.path.abspath(path) for path in paths]
+        signature = _signature_hash().hexdigest()
+        indexed = self._indexed_contents(signature)
+        known: "MutableMapping[str, Tuple[int, int, str]]" = {
+            path: (mtime_ns, size, content_hash)
+            for path, mtime_ns, size, content_hash in self.conn.execute(
+                "SELECT path, mtime_ns, size, content_hash FROM files"
+            )
+        }
+
+        found = list(dict.fromkeys(find_indexable_files(roots, suffixes)))
+        unchanged = 0
+        errors = 0
+        candidates: "MutableSequence[Tuple[str, os.stat_result]]" = []
+        for path in found:
+            try:
+                st = os.stat(path)
+            except OSError:
+                errors += 1
+                continue
+            row = known.get(path)
+            if (
+                row is not None
+                and row[0] == st.st_mtime_ns
+                and row[1] == st.st_size
+                and row[2] in indexed
+            ):
+                unchanged += 1
+            else:
+                candidates.append((path, st))
+
+        # Reading and hashing is mostly I/O
+        with concurrent.futures.ThreadPoolExecutor() as hasher:
+            hashes = list(hasher.map(_hash_or_none, (path for path, _ in candidates)))
+
+        rehashed = 0
+        to_parse: "MutableMapping[str, str]" = {}
+        file_rows: "MutableSequence[Tuple[str, int, int, str]]" = []
+        for (path, st), content_hash in zip(candidates, hashes):
+            if content_hash is None:
+                errors += 1
+                continue
+            file_rows.append((path, st.st_mtime_ns, st.st_size, content_hash))
+            if content_hash in indexed:
+                rehashed += 1
+            else:
+                to_parse.setdefault(content_hash, path)
+
+        outcomes: "Sequence[Tuple[str, Optional[Mapping[str, Any]], Optional[str]]]" = (
+            []
+        )
+        if len(to_parse) > 0:
+            batch = digest_groovy_files(
+                to_parse.values(),
+                cache_directory=cache_directory,
+                ro_cache_directories=ro_cache_directories,
+                max_workers=max_workers,
+                budget=budget,
+            )
+            outcomes = [
+                (
+                    content_hash,
+                    cast("Optional[Mapping[str, Any]]", batch.entries[path].t_tree),
+                    batch.entries[path].error,
+                )
+                for content_hash, path in to_parse.items()
+            ]
+
+        removed = [
+            path
+            for path in known
+            if path not in found
+            and any(
+                path == root or path.startswith(os.path.join(root, ""))
+                for root in roots
+            )
+        ]
+        with self.conn:
+            for content_hash, t_tree, error in outcomes:
+                if error is not None:
+                    errors += 1
+                self._store_features(content_hash, signature, t_tree, error)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files(path, mtime_ns, size, content_hash) VALUES (?, ?, ?, ?)",
+                file_rows,
+            )
+            self.conn.executemany(
+                "DELETE FROM files WHERE path = ?", [(path,) for path in removed]
+            )
+            # Contents no file has anymore
+            self.conn.execute(
+                "DELETE FROM contents WHERE content_hash NOT IN (SELECT content_hash FROM files)"
+            )
+
+        return IndexUpdateSummary(
+            files=len(found),
+            unchanged=unchanged,
+            rehashed=rehashed,
+            parsed=len(outcomes),
+            removed=len(removed),
+            errors=errors,
+            elapsed_seconds=time.perf_counter() - t_start,
+        )
+
+    def processes(
+        self,
+        name: "Optional[str]" = None,
+        container: "Optional[str]" = None,
+        conda: "Optional[str]" = None,
+        template: "Optional[str]" = None,
+        like: "bool" = False,
+    ) -> "Sequence[IndexedProcess]":
+        """
+        The indexed processes (one per file having it) with that name,
+        and using that container, conda package and template, when told.
+        With like, the values are SQL LIKE patterns instead.
+        """
+        op = "LIKE" if like else "="
+        conditions = []
+        params = []
+        if name is not None:
+            conditions.append(f"p.name {op} ?")
+            params.append(name)
+        for feature, value in (
+            ("container", container),
+            ("conda", conda),
+            ("template", template),
+        ):
+            if value is not None:
+                table, column = PROCESS_FEATURE_TABLES[feature]
+                # So the index on the column is used
+                conditions.append(
+                    f"p.process_id IN (SELECT process_id FROM {table} WHERE {column} {op} ?)"
+                )
+                params.append(value)
+
+        query = (
+            "SELECT f.path, p.content_hash, p.name, p.process_id FROM processes p"
+            " JOIN files f ON f.content_hash = p.content_hash"
+        )
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY f.path, p.process_id"
+        return [IndexedProcess(*row) for row in self.conn.execute(query, params)]
+
+    def process_features(
+        self, process: "IndexedProcess"
+    ) -> "Mapping[str, Sequence[str]]":
+        """
+        The containers, conda packages and templates of an indexed process
+        """
+        features: "MutableMapping[str, Sequence[str]]" = {}
+        for feature, (table, column) in PROCESS_FEATURE_TABLES.items():
+            features[feature] = [
+                value
+                for value, in self.conn.execute(
+                    f"SELECT {column} FROM {table} WHERE process_id = ? ORDER BY rowid",
+                    (process.process_id,),
+                )
+            ]
+        return features
+
+    def includes(
+        self,
+        include_path: "Optional[str]" = None,
+        like: "bool" = False,
+    ) -> "Sequence[IndexedInclude]":
+        """
+        The indexed includes of that module (all of them, when not told),
+        along with the files including it
+        """
+        query = (
+            "SELECT f.path, i.content_hash, i.include_path FROM includes i"
+            " JOIN files f ON f.content_hash = i.content_hash"
+        )
+        params = []
+        if include_path is not None:
+            query += " WHERE i.include_path " + ("LIKE" if like else "=") + " ?"
+            params.append(include_path)
+        query += " ORDER BY f.path, i.rowid"
+        return [IndexedInclude(*row) for row in self.conn.execute(query, params)]
+
+    def workflows(
+        self,
+        name: "Optional[str]" = None,
+        like: "bool" = False,
+    ) -> "Sequence[IndexedWorkflow]":
+        """
+        The indexed workflows with that name (all of them, when not told)
+        """
+        query = (
+            "SELECT f.path, w.content_hash, w.name FROM workflows w"
+            " JOIN files f ON f.content_hash = w.content_hash"
+        )
+        params = []
+        if name is not None:
+            query += " WHERE w.name " + ("LIKE" if like else "=") + " ?"
+            params.append(name)
+        query += " ORDER BY f.path, w.rowid"
+        return [IndexedWorkflow(*row) for row in self.conn.execute(query, params)]
+
+
+def main(argv: "Sequence[str]") -> "int":
+    ap = argparse.ArgumentParser(
+        prog="python -m groovy_parser.index",
+        description="Index the Nextflow features of whole corpora in a SQLite database, and query it",
+    )
+    ap.add_argument("--db", required=True, help="Path of the SQLite database")
+    ap.add_argument(
+        "--like",
+        action="store_true",
+        help="Query values are SQL LIKE patterns (like '%%fastqc%%')",
+    )
+    sp = ap.add_subparsers(dest="command", required=True)
+    up = sp.add_parser("update", help="Index the new and changed files")
+    up.add_argument("--cache-dir", help="Caching directory of the parsings")
+    up.add_argument(
+        "--ro-cache-dir",
+        action="append",
+        help="Read-only caching directory (it can be repeated)",
+    )
+    up.add_argument("-j", "--jobs", type=int, help="Number of parsing processes")
+    up.add_argument(
+        "--suffix",
+        action="append",
+        help=f"Suffix of the indexed files within directories (default {' '.join(DEFAULT_SUFFIXES)})",
+    )
+    up.add_argument("paths", nargs="+", help="Files or directories to index")
+    pp = sp.add_parser("processes", help="Print the matching processes")
+    pp.add_argument("--name", help="Name of the process")
+    pp.add_argument("--container", help="Container used by the process")
+    pp.add_argument("--conda", help="Conda package used by the process")
+    pp.add_argument("--template", help="Template used by the process")
+    ip = sp.add_parser("includes", help="Print the files including a module")
+    ip.add_argument("include_path", nargs="?", help="Path of the included module")
+    wp = sp.add_parser("workflows", help="Print the matching workflows")
+    wp.add_argument("--name", help="Name of the workflow")
+    args = ap.parse_args(argv)
+
+    with GroovyFeatureIndex(args.db) as index:
+        records: "Iterable[Mapping[str, Any]]"
+        if args.command == "update":
+            summary = index.update(
+                args.paths,
+                suffixes=args.suffix if args.suffix else DEFAULT_SUFFIXES,
+                cache_directory=args.cache_dir,
+                ro_cache_directories=args.ro_cache_dir,
+                max_workers=args.jobs,
+            )
+            records = [summary._asdict()]
+        elif args.command == "processes":
+            records = (
+                {**process._asdict(), **index.process_features(process)}
+                for process in index.processes(
+                    name=args.name,
+                    container=args.container,
+                    conda=args.conda,
+                    template=args.template,
+                    like=args.like,
+                )
+            )
+        elif args.command == "includes":
+            records = (
+                include._asdict()
+                for include in index.includes(args.include_path, like=args.like)
+            )
+        else:
+            records = (
+                workflow._asdict()
+                for workflow in index.workflows(args.name, like=args.like)
+            )
+
+        for record in records:
+            print(json.dumps(record))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
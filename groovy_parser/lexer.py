@@ -21,11 +21,16 @@
 import inspect
 import logging
 import sys
-from typing import TYPE_CHECKING
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
 
 if TYPE_CHECKING:
     from typing import (
         Any,
+        FrozenSet,
+        Iterable,
         Iterator,
         Mapping,
         MutableMapping,
@@ -33,6 +38,7 @@ if TYPE_CHECKING:
         Sequence,
         Tuple,
         Optional,
+        Union,
     )
     from lark.common import (
         LexerConf,
@@ -44,6 +50,10 @@ if TYPE_CHECKING:
 from pygments.token import Token
 from lark.lexer import Lexer, Token as LarkToken
 
+from .tokenizer import (
+    CombinedGroovyRestrictedTokenizer,
+)
+
 # Mapping between Pygment tokens and TERMINALS
 # used in groovy grammar
 
@@ -229,6 +239,107 @@ for c in GMAPPER[Token.Operator].keys():
         COMBINED_OPERATORS_HASH.setdefault(c[0], []).append(c)
 
 
+def pygments_to_lark(
+    token_type: "_TokenType", raw_token: "str"
+) -> "Sequence[Tuple[Optional[str], str, str]]":
+    """
+    It translates a token from the tokenizer into the terminals from the
+    grammar, as (terminal, value, raw text) tuples. The terminal is None
+    for the filtered out tokens (whitespaces, comments).
+    """
+    base_token_type: "Optional[_TokenType]" = token_type
+    token_map = None
+
+    the_tokens: "MutableSequence[Tuple[Optional[str], str, str]]" = []
+
+    # Determining the matching type
+    while base_token_type is not None:
+        # This check is needed because there could
+        # be in the future None returns
+        if base_token_type in GMAPPER:
+            token_map = GMAPPER[base_token_type]
+            break
+
+        # Try with the parent
+        base_token_type = base_token_type.parent
+
+    # Yield or not
+    token = raw_token
+    ltok: "Optional[str]" = None
+    if token_type == Token.Name.Label:
+        the_tokens = [
+            ("IDENTIFIER", raw_token[0:-1], raw_token[0:-1]),
+            ("COLON", ":", ":"),
+        ]
+    elif token_type == Token.Name.Decorator:
+        the_tokens = [
+            ("AT", "@", "@"),
+            ("IDENTIFIER", raw_token[1:], raw_token[1:]),
+        ]
+    elif token_map is not None:
+        ltok = token_map.get(token)
+        if ltok is None:
+            ltok = token_map.get(None)
+
+        if ltok == "IDENTIFIER":
+            if raw_token[0].isupper():
+                ltok = "CAPITALIZED_IDENTIFIER"
+    elif token_type == Token.Literal.String.Single:
+        if token.startswith("'''"):
+            token = raw_token[3:-3]
+        else:
+            token = raw_token[1:-1]
+        ltok = "STRING_LITERAL"
+    elif token_type == Token.Literal.String.GString.GStringBegin:
+        ltok = "GSTRING_BEGIN"
+    elif token_type == Token.Literal.String.GString.GStringPath:
+        the_tokens = [
+            ("GSTRING_PART", "$", "$"),
+        ]
+        for identifier in raw_token[1:].split("."):
+            the_tokens.append(("IDENTIFIER", identifier, identifier))
+            the_tokens.append(("DOT", ".", "."))
+        the_tokens.pop()
+
+    elif token_type == Token.Literal.String.Escape:
+        if len(raw_token) == 2:
+            token = raw_token[1:]
+        else:
+            token = raw_token.encode("ascii").decode("unicode-escape")
+        ltok = "STRING_LITERAL_PART"
+    elif token_type == Token.Literal.String.GString.ClosureBegin:
+        the_tokens = [
+            ("GSTRING_PART", "$", "$"),
+            ("LBRACE", "{", "{"),
+        ]
+    elif token_type == Token.Literal.String.GString.ClosureEnd:
+        ltok = "RBRACE"
+    elif token_type == Token.Literal.String.GString.GStringEnd:
+        ltok = "GSTRING_END"
+    elif token_type == Token.Literal.String.Double:
+        # if token.startswith('"""') and token.endswith('"""'):
+        #    token = raw_token[3:-3]
+        #    ltok = 'STRING_LITERAL'
+        # elif token.startswith('"'):
+        #    token = raw_token[1:-1]
+        #    ltok = 'STRING_LITERAL'
+        # else:
+        ltok = "STRING_LITERAL_PART"
+    elif token_type == Token.Literal.String:
+        if token.startswith("/") and token.endswith("/"):
+            token = raw_token[1:-1]
+            ltok = "STRING_LITERAL"
+        else:
+            ltok = "SKIPPABLE"
+    else:
+        ltok = "SKIPPABLE"
+
+    if len(the_tokens) == 0:
+        the_tokens.append((ltok, token, raw_token))
+
+    return the_tokens
+
+
 class PygmentsGroovyLexer(Lexer):
     def __init__(self, lexer_conf: "LexerConf"):
         self.logger = logging.getLogger(
@@ -322,103 +433,27 @@ class PygmentsGroovyLexer(Lexer):
                         yield prev_tokens[0]
                         prev_tokens = prev_tokens[1:]
 
-    def lex(self, data: "Sequence[Tuple[_TokenType, str]]") -> "Iterator[LarkToken]":  # type: ignore[override]
-        preproc_tokens = self._preprocess_tokens(data)
+    def lex(  # type: ignore[override]
+        self, data: "Sequence[Union[Tuple[_TokenType, str], LarkToken]]"
+    ) -> "Iterator[LarkToken]":
+        # Already lexed streams are passed through, so the parser
+        # can be fed with them
+        if len(data) > 0 and isinstance(data[0], LarkToken):
+            yield from cast("Sequence[LarkToken]", data)
+        else:
+            yield from self.lex_preprocessed(
+                self._preprocess_tokens(cast("Sequence[Tuple[_TokenType, str]]", data))
+            )
 
+    def lex_preprocessed(
+        self, preproc_tokens: "Iterable[Tuple[_TokenType, str]]"
+    ) -> "Iterator[LarkToken]":
         # Lex itself
         start_pos = 0
         start_row = 1
         start_column = 0
         for token_type, raw_token in preproc_tokens:
-            base_token_type: "Optional[_TokenType]" = token_type
-            token_map = None
-
-            the_tokens: "MutableSequence[Tuple[Optional[str], str, str]]" = []
-
-            # Determining the matching type
-            while base_token_type is not None:
-                # This check is needed because there could
-                # be in the future None returns
-                if base_token_type in GMAPPER:
-                    token_map = GMAPPER[base_token_type]
-                    break
-
-                # Try with the parent
-                base_token_type = base_token_type.parent
-
-            # Yield or not
-            token = raw_token
-            ltok: "Optional[str]" = None
-            if token_type == Token.Name.Label:
-                the_tokens = [
-                    ("IDENTIFIER", raw_token[0:-1], raw_token[0:-1]),
-                    ("COLON", ":", ":"),
-                ]
-            elif token_type == Token.Name.Decorator:
-                the_tokens = [
-                    ("AT", "@", "@"),
-                    ("IDENTIFIER", raw_token[1:], raw_token[1:]),
-                ]
-            elif token_map is not None:
-                ltok = token_map.get(token)
-                if ltok is None:
-                    ltok = token_map.get(None)
-
-                if ltok == "IDENTIFIER":
-                    if raw_token[0].isupper():
-                        ltok = "CAPITALIZED_IDENTIFIER"
-            elif token_type == Token.Literal.String.Single:
-                if token.startswith("'''"):
-                    token = raw_token[3:-3]
-                else:
-                    token = raw_token[1:-1]
-                ltok = "STRING_LITERAL"
-            elif token_type == Token.Literal.String.GString.GStringBegin:
-                ltok = "GSTRING_BEGIN"
-            elif token_type == Token.Literal.String.GString.GStringPath:
-                the_tokens = [
-                    ("GSTRING_PART", "$", "$"),
-                ]
-                for identifier in raw_token[1:].split("."):
-                    the_tokens.append(("IDENTIFIER", identifier, identifier))
-                    the_tokens.append(("DOT", ".", "."))
-                the_tokens.pop()
-
-            elif token_type == Token.Literal.String.Escape:
-                if len(raw_token) == 2:
-                    token = raw_token[1:]
-                else:
-                    token = raw_token.encode("ascii").decode("unicode-escape")
-                ltok = "STRING_LITERAL_PART"
-            elif token_type == Token.Literal.String.GString.ClosureBegin:
-                the_tokens = [
-                    ("GSTRING_PART", "$", "$"),
-                    ("LBRACE", "{", "{"),
-                ]
-            elif token_type == Token.Literal.String.GString.ClosureEnd:
-                ltok = "RBRACE"
-            elif token_type == Token.Literal.String.GString.GStringEnd:
-                ltok = "GSTRING_END"
-            elif token_type == Token.Literal.String.Double:
-                # if token.startswith('"""') and token.endswith('"""'):
-                #    token = raw_token[3:-3]
-                #    ltok = 'STRING_LITERAL'
-                # elif token.startswith('"'):
-                #    token = raw_token[1:-1]
-                #    ltok = 'STRING_LITERAL'
-                # else:
-                ltok = "STRING_LITERAL_PART"
-            elif token_type == Token.Literal.String:
-                if token.startswith("/") and token.endswith("/"):
-                    token = raw_token[1:-1]
-                    ltok = "STRING_LITERAL"
-                else:
-                    ltok = "SKIPPABLE"
-            else:
-                ltok = "SKIPPABLE"
-
-            if len(the_tokens) == 0:
-                the_tokens.append((ltok, token, raw_token))
+            the_tokens = pygments_to_lark(token_type, raw_token)
 
             # There could be more than one token to be processed
             for ltok, the_token, the_raw_token in the_tokens:
@@ -446,3 +481,206 @@ class PygmentsGroovyLexer(Lexer):
                 start_pos = next_start_pos
                 start_row = next_row
                 start_column = next_column
+
+
+class _SilencingGroovyTokenizer(CombinedGroovyRestrictedTokenizer):
+    # The token types which never reach the parser, according to GMAPPER
+    silenced = {
+        token_type: (
+            frozenset(key for key in token_map.keys() if key is not None)
+            if token_map.get(None) is None
+            and all(len(key) == 1 for key in token_map.keys() if key is not None)
+            else None
+        )
+        for token_type, token_map in GMAPPER.items()
+    }
+
+
+# Translations of the most common tokens (keywords, operators, ...)
+_TRANSLATIONS: "MutableMapping[Tuple[_TokenType, str], Sequence[Tuple[Optional[str], str, str]]]" = (
+    {}
+)
+_MAX_TRANSLATIONS = 65536
+
+
+class FusedGroovyLexer(Lexer):
+    """
+    The tokenizer, the operators merging and the lexer in a single pass
+    over the text, emitting the very same terminals as the split pipeline
+    (CombinedGroovyRestrictedTokenizer, then PygmentsGroovyLexer).
+    Whitespaces and comments are consumed without being emitted, and
+    positions come from the offsets of the matches, so they are also
+    right after the filtered out text.
+    """
+
+    def __init__(self, lexer_conf: "Optional[LexerConf]" = None):
+        self.tokenizer = _SilencingGroovyTokenizer()
+        # Counters from the last lexed text
+        self.tokenizer_tokens = 0
+        self.preprocessed_tokens = 0
+
+    def _merge_operators(
+        self, raw_tokens: "Iterable[Tuple[int, _TokenType, str]]"
+    ) -> "Iterator[Tuple[int, _TokenType, str]]":
+        # Same greedy algorithm as PygmentsGroovyLexer._preprocess_tokens,
+        # but only adjacent operators are merged
+        pending: "MutableSequence[Tuple[int, _TokenType, str]]" = []
+        prev_tokens: "MutableSequence[Tuple[int, _TokenType, str]]" = []
+        join_token = ""
+        combined_operators: "Optional[Sequence[str]]" = None
+        raw_iter = iter(raw_tokens)
+        while True:
+            if len(pending) > 0:
+                token = pending.pop()
+            else:
+                next_token = next(raw_iter, None)
+                if next_token is None:
+                    break
+                token = next_token
+                self.tokenizer_tokens += 1
+
+            if combined_operators is not None:
+                last = prev_tokens[-1]
+                if token[0] == last[0] + len(last[2]):
+                    # Possible combined operator
+                    next_join_token = join_token + token[2]
+                    for combined_operator in combined_operators:
+                        if combined_operator.startswith(next_join_token):
+                            prev_tokens.append(token)
+                            join_token = next_join_token
+                            break
+                    else:
+                        next_join_token = ""
+                    if next_join_token != "":
+                        continue
+
+                if len(prev_tokens) == 1:
+                    yield prev_tokens[0]
+                else:
+                    # Emit the longest combined operator, and reprocess
+                    # the remaining tokens
+                    for si in range(len(prev_tokens), 1, -1):
+                        join_token = "".join(t[2] for t in prev_tokens[:si])
+                        if join_token in combined_operators:
+                            yield (prev_tokens[0][0], prev_tokens[0][1], join_token)
+                            break
+                    else:
+                        si = 1
+                        yield prev_tokens[0]
+                    pending.append(token)
+                    pending.extend(reversed(prev_tokens[si:]))
+                    combined_operators = None
+                    continue
+                combined_operators = None
+
+            if token[1] == Token.Operator:
+                combined_operators = COMBINED_OPERATORS_HASH.get(token[2][0])
+                if combined_operators is not None:
+                    prev_tokens = [token]
+                    join_token = token[2]
+                    continue
+            yield token
+
+        if combined_operators is not None:
+            while len(prev_tokens) > 0:
+                for si in range(len(prev_tokens), 1, -1):
+                    join_token = "".join(t[2] for t in prev_tokens[:si])
+                    if join_token in combined_operators:
+                        yield (prev_tokens[0][0], prev_tokens[0][1], join_token)
+                        break
+                else:
+                    si = 1
+                    yield prev_tokens[0]
+                prev_tokens = prev_tokens[si:]
+
+    def lex(  # type: ignore[override]
+        self, data: "Union[str, Sequence[LarkToken]]"
+    ) -> "Iterator[LarkToken]":
+        # Already lexed streams are passed through, so the parser
+        # can be fed with them
+        if not isinstance(data, str):
+            yield from data
+            return
+
+        # Same text normalization as Pygments get_tokens
+        if data.startswith("\ufeff"):
+            data = data[len("\ufeff") :]
+        if "\r" in data:
+            data = data.replace("\r\n", "\n").replace("\r", "\n")
+        # Stripped leading newlines are accounted in the positions
+        begin = len(data) - len(data.lstrip("\n"))
+        text = data.strip("\n") + "\n"
+
+        self.tokenizer_tokens = 0
+        self.preprocessed_tokens = 0
+        line = begin + 1
+        line_start = 0
+        last_pos = 0
+        for pos, token_type, raw_token in self._merge_operators(
+            self.tokenizer.get_tokens_unprocessed(text)
+        ):
+            self.preprocessed_tokens += 1
+            key = (token_type, raw_token)
+            the_tokens = _TRANSLATIONS.get(key)
+            if the_tokens is None:
+                the_tokens = pygments_to_lark(token_type, raw_token)
+                if len(_TRANSLATIONS) >= _MAX_TRANSLATIONS:
+                    _TRANSLATIONS.clear()
+                _TRANSLATIONS[key] = the_tokens
+
+            newlines = text.count("\n", last_pos, pos)
+            if newlines > 0:
+                line += newlines
+                line_start = text.rfind("\n", last_pos, pos) + 1
+            last_pos = pos
+
+            # There could be more than one token to be processed
+            for ltok, the_token, the_raw_token in the_tokens:
+                if ltok is not None:
+                    yield LarkToken(
+                        ltok,
+                        (token_type, the_token, raw_token),
+                        start_pos=begin + pos,
+                        end_pos=begin + pos + len(the_raw_token),
+                        line=line,
+                        column=pos - line_start,
+                    )
+                pos += len(the_raw_token)
+
+        # Silenced tokens are also accounted, as in the split pipeline
+        self.tokenizer_tokens += self.tokenizer.silenced_tokens
+        self.preprocessed_tokens += self.tokenizer.silenced_tokens
+
+
+# Terminals which open and close nested constructs, where statement
+# separators do not end top level statements
+_OPENING_TERMINALS = frozenset(("LBRACE", "LBRACK", "LPAREN", "GSTRING_BEGIN"))
+_CLOSING_TERMINALS = frozenset(("RBRACE", "RBRACK", "RPAREN", "GSTRING_END"))
+SEPARATOR_TERMINALS = frozenset(("NL", "SEMI"))
+
+
+def top_level_boundaries(lark_tokens: "Sequence[LarkToken]") -> "Sequence[int]":
+    """
+    It returns the indices of the tokens which follow a run of statement
+    separators found outside any brace, bracket, parenthesis or string.
+    They are where top level statements can start.
+    """
+    boundaries = []
+    depth = 0
+    num_tokens = len(lark_tokens)
+    for idx, tok in enumerate(lark_tokens):
+        if tok.type in _OPENING_TERMINALS:
+            depth += 1
+        elif tok.type in _CLOSING_TERMINALS:
+            # Unbalanced closings are the parser problem
+            if depth > 0:
+                depth -= 1
+        elif (
+            depth == 0
+            and tok.type in SEPARATOR_TERMINALS
+            and idx + 1 < num_tokens
+            and lark_tokens[idx + 1].type not in SEPARATOR_TERMINALS
+        ):
+            boundaries.append(idx + 1)
+
+    return boundaries
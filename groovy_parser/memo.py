@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Memoization of the digested top level statements, so the statements
+# shared by different files (like identical process blocks) are parsed
+# only once
+
+import collections
+import functools
+import hashlib
+import threading
+
+from typing import (
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from lark.lexer import Token as LarkToken
+
+    from .parser import (
+        EmptyNode,
+        GroovyParseStats,
+        LeafNode,
+        RuleNode,
+    )
+
+from .parser import (
+    _phase,
+    digest_groovy_content,
+    lex_groovy_content,
+)
+
+# A statement separated from the previous one only by newlines can
+# still belong to it when it starts with a brace (a closure argument,
+# or the body of a method or a class), and that cannot be told apart
+# without parsing them together
+_JOINING_TERMINALS = frozenset(("LBRACE",))
+
+
+class StatementDigestMemo:
+    """
+    Bounded memo of the digested top level statements, keyed by the
+    hash of their token sequences. It also keeps the counters needed
+    to report the hit rates.
+    """
+
+    def __init__(self, max_entries: "int" = 65536):
+        self.max_entries = max_entries
+        self._digests: "collections.OrderedDict[str, Union[RuleNode, LeafNode, EmptyNode]]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Contents which had to be parsed as a whole
+        self.fallbacks = 0
+
+    def __len__(self) -> "int":
+        return len(self._digests)
+
+    def get(self, key: "str") -> "Optional[Union[RuleNode, LeafNode, EmptyNode]]":
+        with self._lock:
+            t_tree = self._digests.get(key)
+            if t_tree is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._digests.move_to_end(key)
+        return t_tree
+
+    def put(self, key: "str", t_tree: "Union[RuleNode, LeafNode, EmptyNode]") -> None:
+        with self._lock:
+            self._digests[key] = t_tree
+            self._digests.move_to_end(key)
+            while len(self._digests) > self.max_entries:
+                self._digests.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> "float":
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+@functools.lru_cache(maxsize=None)
+def get_statement_memo() -> "StatementDigestMemo":
+    """
+    The memo shared by all the memoized parsing calls within the process
+    """
+    return StatementDigestMemo()
+
+
+def split_top_level_statements(
+    lark_tokens: "Sequence[LarkToken]",
+) -> "Sequence[Tuple[int, int]]":
+    """
+    It splits the tokens into the ranges of the candidate top level
+    statements, without their trailing separators
+    """
+    from .lexer import (
+        SEPARATOR_TERMINALS,
+        top_level_boundaries,
+    )
+
+    starts = [0]
+    for boundary in top_level_boundaries(lark_tokens):
+        if lark_tokens[boundary].type not in _JOINING_TERMINALS:
+            starts.append(boundary)
+
+    units = []
+    for start, next_start in zip(starts, starts[1:] + [len(lark_tokens)]):
+        end = next_start
+        while end > start and lark_tokens[end - 1].type in SEPARATOR_TERMINALS:
+            end -= 1
+        if end > start:
+            units.append((start, end))
+
+    return units
+
+
+def _statement_key(
+    lark_tokens: "Sequence[LarkToken]",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+) -> "str":
+    h = hashlib.sha256()
+    h.update(repr((tuple(prune), tuple(noflat))).encode("utf-8"))
+    for tok in lark_tokens:
+        # The digested leaves keep the type and the processed value
+        value = tok.value[1] if isinstance(tok.value, tuple) else tok.value
+        h.update(tok.type.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(value.encode("utf-8", errors="surrogatepass"))
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+def _token_span(tree: "Any") -> "Optional[Tuple[int, int]]":
+    """
+    The offsets of the first and the last tokens within a subtree
+    """
+    from lark import Tree as LarkTree
+
+    first: "Optional[int]" = None
+    last: "Optional[int]" = None
+    pending: "MutableSequence[Any]" = [tree]
+    while len(pending) > 0:
+        node = pending.pop()
+        if isinstance(node, LarkTree):
+            pending.extend(reversed(node.children))
+        elif node.start_pos is not None:
+            if first is None:
+                first = node.start_pos
+            last = node.end_pos
+
+    if first is None or last is None:
+        return None
+    return first, last
+
+
+def _parse_statements(
+    lark_tokens: "Sequence[LarkToken]",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+) -> "Optional[Sequence[Any]]":
+    """
+    It parses a run of statements, returning the script statements
+    of the tree, or None when it cannot be parsed on its own
+    """
+    from lark import Tree as LarkTree
+    from lark.exceptions import ParseError as LarkParseError
+
+    from .grammar import (
+        get_inlined_groovy_parser,
+        outer_rule_name,
+    )
+
+    parser = get_inlined_groovy_parser(tuple(prune), tuple(noflat))
+    try:
+        # The type ignore is needed due the poor type annotation of
+        # lark, which assumes the input is always a string
+        tree = parser.parse(lark_tokens)  # type: ignore[arg-type]
+    except LarkParseError:
+        return None
+
+    if len(tree.children) != 1:
+        return None
+    statements = tree.children[0]
+    if (
+        not isinstance(statements, LarkTree)
+        or outer_rule_name(statements) != "script_statements"
+    ):
+        return None
+
+    return statements.children
+
+
+def digest_groovy_content_memoized(
+    content: "str",
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    memo: "Optional[StatementDigestMemo]" = None,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    Same as digest_groovy_content, but the content is split into its top
+    level statements, and only those which are not in the memo are
+    parsed. When the novel statements cannot be parsed on their own,
+    or they are not aligned with the split, the whole content is parsed,
+    so the digested tree is always the same as the one of a full parse.
+    """
+    from .grammar import LarkFilteringTreeEncoder
+
+    if memo is None:
+        memo = get_statement_memo()
+
+    # Only the digested trees whose statements are kept apart can be
+    # assembled from the digested statements
+    if "script_statement" not in noflat:
+        return digest_groovy_content(content, prune=prune, noflat=noflat, stats=stats)
+
+    lark_tokens = lex_groovy_content(content, stats=stats)
+    units = split_top_level_statements(lark_tokens)
+    if len(units) == 0 or lark_tokens[0].type == "PACKAGE":
+        memo.fallbacks += 1
+        return digest_groovy_content(content, prune=prune, noflat=noflat, stats=stats)
+
+    encoder = LarkFilteringTreeEncoder()
+    keys = [
+        _statement_key(lark_tokens[start:end], prune, noflat) for start, end in units
+    ]
+    digests: "MutableSequence[Optional[Union[RuleNode, LeafNode, EmptyNode]]]" = [
+        memo.get(key) for key in keys
+    ]
+    num_hits = sum(1 for t_tree in digests if t_tree is not None)
+    if stats is not None:
+        stats.statement_hits += num_hits
+        stats.statement_misses += len(units) - num_hits
+
+    # The runs of novel statements are parsed together
+    i_unit = 0
+    while i_unit < len(units):
+        if digests[i_unit] is not None:
+            i_unit += 1
+            continue
+        i_end = i_unit
+        while i_end < len(units) and digests[i_end] is None:
+            i_end += 1
+
+        run_tokens = lark_tokens[units[i_unit][0] : units[i_end - 1][1]]
+        with _phase(stats, "parse"):
+            statements = _parse_statements(run_tokens, prune, noflat)
+        aligned = statements is not None and len(statements) == i_end - i_unit
+        if aligned:
+            assert statements is not None
+            for i_statement, statement in enumerate(statements):
+                start, end = units[i_unit + i_statement]
+                if _token_span(statement) != (
+                    lark_tokens[start].start_pos,
+                    lark_tokens[end - 1].end_pos,
+                ):
+                    aligned = False
+                    break
+        if not aligned:
+            memo.fallbacks += 1
+            return digest_groovy_content(
+                content, prune=prune, noflat=noflat, stats=stats
+            )
+
+        assert statements is not None
+        with _phase(stats, "digest"):
+            for i_statement, statement in enumerate(statements):
+                t_tree = encoder.default(statement, prune=prune, noflat=noflat)
+                digests[i_unit + i_statement] = t_tree
+                memo.put(keys[i_unit + i_statement], t_tree)
+        i_unit = i_end
+
+    # The same shape LarkFilteringTreeEncoder gives to a compilation
+    # unit made only of script statements
+    return {
+        "rule": ["compilation_unit", "script_statements"],
+        "children": [t_tree for t_tree in digests if t_tree is not None],
+    }
@@ -18,215 +18,828 @@
 
 # https://github.com/daniellansun/groovy-antlr4-grammar-optimized/tree/master/src/main/antlr4/org/codehaus/groovy/parser/antlr4
 
+import contextlib
+import functools
 import gzip
-import importlib.resources
 import hashlib
+import importlib
+import importlib.util
 import json
+import mmap
 import os
 import os.path
 import pathlib
+import re
 import shutil
+import time
 from typing import (
     cast,
+    NamedTuple,
     TYPE_CHECKING,
 )
 
 if TYPE_CHECKING:
     from typing import (
         Any,
+        Callable,
+        ContextManager,
+        Iterable,
+        Iterator,
+        List,
         Mapping,
+        MutableMapping,
         MutableSequence,
         Optional,
         Sequence,
+        Tuple,
         Union,
     )
+    from lark import Lark
+    from lark.lexer import Token as LarkToken
     from lark.tree import ParseTree
 
+    # Whatever can be hashed and decoded: bytes, or a memory map
+    SourceBytes = Union[bytes, mmap.mmap]
+
     from typing_extensions import (
+        NotRequired,
         TypedDict,
     )
 
+    # The [start, end] offsets within the normalized text
+    Span = Sequence[int]
+
     class EmptyNode(TypedDict):
         pass
 
     class LeafNode(TypedDict):
         leaf: "str"
-        value: "str"
+        # Only missing in trees with spans, when it is the text of the span
+        value: "NotRequired[str]"
+        span: "NotRequired[Span]"
+
+    class ParseErrorLocation(TypedDict):
+        message: "str"
+        line: "int"
+        column: "int"
+        end_line: "int"
+        end_column: "int"
+        span: "Span"
 
     class RuleNode(TypedDict):
         rule: "Sequence[str]"
         children: "Sequence[Union[EmptyNode, LeafNode, RuleNode]]"
+        span: "NotRequired[Span]"
+        # Structural hash of the subtree (see groovy_parser.diff)
+        hash: "NotRequired[str]"
+        # Only in the parse_error nodes of the recovered trees
+        error: "NotRequired[ParseErrorLocation]"
 
+    from .grammar import (
+        CachedParseError as CachedParseError,
+        create_groovy_parser as create_groovy_parser,
+        create_inlined_groovy_parser as create_inlined_groovy_parser,
+        derive_inlined_groovy_grammar as derive_inlined_groovy_grammar,
+        get_groovy_parser as get_groovy_parser,
+        get_inlined_groovy_parser as get_inlined_groovy_parser,
+        InlinedTree as InlinedTree,
+        LarkFilteringTreeEncoder as LarkFilteringTreeEncoder,
+        LarkTokenEncoder as LarkTokenEncoder,
+        outer_rule_name as outer_rule_name,
+        ParseErrorTree as ParseErrorTree,
+    )
+    from .budget import (
+        ParseBudget,
+        ParseBudgetExceeded,
+    )
+    from .memo import (
+        StatementDigestMemo,
+    )
 
-from pygments import (
-    __version__ as pygments_version,
-)
-from lark import (
-    __version__ as lark_version,
-    Lark,
-    Tree as LarkTree,
+# lark, Pygments and the tokenizer are only imported when some content
+# is going to be lexed or parsed, so the cache lookups, the digested
+# trees and the statistics are cheap to import. The names which were
+# moved to the grammar module are still available from here.
+_GRAMMAR_NAMES = frozenset(
+    (
+        "CachedParseError",
+        "create_groovy_parser",
+        "create_inlined_groovy_parser",
+        "derive_inlined_groovy_grammar",
+        "get_groovy_parser",
+        "get_inlined_groovy_parser",
+        "InlinedTree",
+        "LarkFilteringTreeEncoder",
+        "LarkTokenEncoder",
+        "outer_rule_name",
+        "ParseErrorTree",
+        "RULE_DEFINITION_RE",
+        "TERMINAL_RE",
+        "NONTERMINAL_RE",
+    )
 )
-from lark.lexer import Token as LarkToken
-from lark.exceptions import ParseError as LarkParseError
 
-from .tokenizer import (
-    __file__ as tokenizer_source_path,
-    GroovyRestrictedTokenizer,
-)
-from .lexer import (
-    __file__ as lexer_source_path,
-    PygmentsGroovyLexer,
+
+def __getattr__(name: "str") -> "Any":
+    if name in _GRAMMAR_NAMES:
+        return getattr(importlib.import_module(".grammar", __package__), name)
+    if name == "SIGNATURE_VERSIONS":
+        return _signature_versions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+GROOVY_3_0_X_GRAMMAR = os.path.join(
+    os.path.dirname(__file__), "GROOVY_3_0_X", "master_groovy_parser.g"
 )
 
+# The digestion defaults of the parsers shared by the worker processes
+DEFAULT_PRUNE = ("sep", "nls")
+DEFAULT_NOFLAT = ("script_statement",)
 
-class LarkTokenEncoder(json.JSONEncoder):
-    def default(
-        self,
-        obj: "Any",
-    ) -> "LeafNode":
-        if isinstance(obj, LarkToken):
-            return {
-                "leaf": obj.type,
-                #                "value": json.JSONEncoder.default(self, obj.value[1] if isinstance(obj.value, tuple) else obj.value),
-                "value": (obj.value[1] if isinstance(obj.value, tuple) else obj.value),
-            }
+# Start rules the parsers are compiled for. The first one is used
+# by default, and the others are there to parse fragments
+GROOVY_START_RULES = ("compilation_unit", "statement", "expression", "closure")
 
-        # Let the base class default method raise the TypeError
-        return cast("LeafNode", json.JSONEncoder.default(self, obj))
-
-
-class LarkFilteringTreeEncoder(LarkTokenEncoder):
-    def default(  # type: ignore[override]
-        self,
-        obj: "Any",
-        rule: "Sequence[str]" = [],
-        prune: "Sequence[str]" = ["sep", "nls"],
-        noflat: "Sequence[str]" = ["script_statement"],
-    ) -> "Union[LeafNode, RuleNode, EmptyNode]":
-        if isinstance(obj, LarkTree):
-            new_rule = cast("MutableSequence[str]", rule[:])
-            # This is needed because the type annotation of the data
-            # facet from a lark tree is str instead of Token
-            # (which is a subclass of str)
-            new_rule.append(cast("LarkToken", obj.data).value)
-            children = []
-            for child in obj.children:
-                if isinstance(child, LarkTree) and child.data in prune:
-                    continue
-                children.append(child)
-            if children:
-                if (
-                    len(children) == 1
-                    and isinstance(children[0], LarkTree)
-                    and children[0].data not in noflat
-                ):
-                    return self.default(
-                        children[0],
-                        rule=new_rule,
-                        prune=prune,
-                        noflat=noflat,
-                    )
-                else:
-                    return {
-                        "rule": new_rule,
-                        "children": [
-                            self.default(
-                                child,
-                                prune=prune,
-                                noflat=noflat,
-                            )
-                            for child in children
-                        ],
-                    }
-            else:
-                # No children!!!!!!!
-                return {}
 
-        # Let the base class default method raise the TypeError (if it is the case)
-        return super().default(obj)
+class GroovyParseStats:
+    """
+    Per phase wall and CPU times, along with several counters, which
+    are filled in by parse_groovy_content and
+    parse_and_digest_groovy_content when an instance is provided
+    """
 
+    # Possible cache outcomes
+    CACHE_DISABLED = "disabled"
+    CACHE_MISS = "miss"
+    CACHE_HIT = "hit"
+    # Hit in a read-only cache, copied to the read-write one
+    CACHE_PROPAGATED = "propagated"
+    # The content is known to fail, so the error is raised again
+    CACHE_NEGATIVE_HIT = "negative_hit"
+    # Same content as another one from the batch, which was parsed instead
+    CACHE_DEDUPLICATED = "deduplicated"
+    # Told by the lookups which do not parse, when the content is only
+    # known to exceed a budget which does not apply (or there is none)
+    CACHE_BUDGET_EXCEEDED = "budget_exceeded"
+
+    def __init__(self) -> None:
+        self.wall_times: "MutableMapping[str, float]" = {}
+        self.cpu_times: "MutableMapping[str, float]" = {}
+        # Tokens emitted by the tokenizer
+        self.tokenizer_tokens = 0
+        # Tokens after merging the operators
+        self.preprocessed_tokens = 0
+        # Tokens which reached the parser, once the filtered ones
+        # (whitespaces, comments) were removed
+        self.lexer_tokens = 0
+        self.tree_nodes = 0
+        # Unparsable regions skipped by the recovering parsing
+        self.parse_errors = 0
+        # Top level statements found in (or missing from) the memo
+        self.statement_hits = 0
+        self.statement_misses = 0
+        # Contents out of the configuration subset of the grammar
+        self.config_fallbacks = 0
+        self.cache_outcome = self.CACHE_DISABLED
+        self.cache_bytes_read = 0
+        self.cache_bytes_written = 0
+        # Shared counter (like a multiprocessing.Value) which is updated
+        # with the tokens consumed by the parser, so its progress can be
+        # watched from another process
+        self.token_progress: "Optional[Any]" = None
+
+    @contextlib.contextmanager
+    def phase(self, name: "str") -> "Iterator[None]":
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.wall_times[name] = (
+                self.wall_times.get(name, 0.0) + time.perf_counter() - wall_start
+            )
+            self.cpu_times[name] = (
+                self.cpu_times.get(name, 0.0) + time.process_time() - cpu_start
+            )
+
+    def merge(self, other: "GroovyParseStats") -> None:
+        """
+        It adds the timings and token counters gathered elsewhere, like
+        in a worker process. The cache outcome is not touched.
+        """
+        for name, wall_time in other.wall_times.items():
+            self.wall_times[name] = self.wall_times.get(name, 0.0) + wall_time
+        for name, cpu_time in other.cpu_times.items():
+            self.cpu_times[name] = self.cpu_times.get(name, 0.0) + cpu_time
+        self.tokenizer_tokens += other.tokenizer_tokens
+        self.preprocessed_tokens += other.preprocessed_tokens
+        self.lexer_tokens += other.lexer_tokens
+        self.tree_nodes += other.tree_nodes
+        self.parse_errors += other.parse_errors
+        self.statement_hits += other.statement_hits
+        self.statement_misses += other.statement_misses
+        self.config_fallbacks += other.config_fallbacks
+
+    def as_dict(self) -> "Mapping[str, Any]":
+        return {
+            "wall_times": dict(self.wall_times),
+            "cpu_times": dict(self.cpu_times),
+            "tokenizer_tokens": self.tokenizer_tokens,
+            "preprocessed_tokens": self.preprocessed_tokens,
+            "lexer_tokens": self.lexer_tokens,
+            "tree_nodes": self.tree_nodes,
+            "parse_errors": self.parse_errors,
+            "statement_hits": self.statement_hits,
+            "statement_misses": self.statement_misses,
+            "config_fallbacks": self.config_fallbacks,
+            "cache_outcome": self.cache_outcome,
+            "cache_bytes_read": self.cache_bytes_read,
+            "cache_bytes_written": self.cache_bytes_written,
+        }
 
-GROOVY_3_0_X_GRAMMAR = os.path.join(
-    os.path.dirname(__file__), "GROOVY_3_0_X", "master_groovy_parser.g"
-)
 
+def _phase(stats: "Optional[GroovyParseStats]", name: "str") -> "ContextManager[None]":
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.phase(name)
 
-def create_groovy_parser() -> "Lark":
-    with open(GROOVY_3_0_X_GRAMMAR, mode="r", encoding="utf-8") as gH:
-        parser = Lark(
-            gH,
-            lexer=PygmentsGroovyLexer,
-            #    parser='lalr',
-            #    debug=True,
-            start="compilation_unit",
-            # ambiguity='explicit',
-            # lexer_callbacks={
-            #    'square_bracket_block': jarlmethod
-            # }
+
+def aggregate_parse_stats(
+    stats_list: "Iterable[Tuple[str, GroovyParseStats]]",
+) -> "Mapping[str, Any]":
+    """
+    It summarizes the statistics gathered from a batch of parsed contents,
+    which are provided as pairs of (label, stats)
+    """
+    wall_times: "MutableMapping[str, float]" = {}
+    cpu_times: "MutableMapping[str, float]" = {}
+    cache_outcomes: "MutableMapping[str, int]" = {}
+    counters = {
+        "tokenizer_tokens": 0,
+        "preprocessed_tokens": 0,
+        "lexer_tokens": 0,
+        "tree_nodes": 0,
+        "parse_errors": 0,
+        "statement_hits": 0,
+        "statement_misses": 0,
+        "config_fallbacks": 0,
+        "cache_bytes_read": 0,
+        "cache_bytes_written": 0,
+    }
+    per_file: "List[Mapping[str, Any]]" = []
+    for label, stats in stats_list:
+        for name, wall_time in stats.wall_times.items():
+            wall_times[name] = wall_times.get(name, 0.0) + wall_time
+        for name, cpu_time in stats.cpu_times.items():
+            cpu_times[name] = cpu_times.get(name, 0.0) + cpu_time
+        cache_outcomes[stats.cache_outcome] = (
+            cache_outcomes.get(stats.cache_outcome, 0) + 1
         )
+        stats_dict = stats.as_dict()
+        for counter in counters.keys():
+            counters[counter] += stats_dict[counter]
+        per_file.append({"label": label, **stats_dict})
+
+    # Slowest first
+    per_file.sort(key=lambda entry: -sum(entry["wall_times"].values()))
+
+    return {
+        "files": len(per_file),
+        "wall_times": wall_times,
+        "cpu_times": cpu_times,
+        "cache_outcomes": cache_outcomes,
+        **counters,
+        "per_file": per_file,
+    }
+
+
+def count_tree_nodes(tree: "ParseTree") -> "int":
+    from lark import Tree as LarkTree
+
+    num_nodes = 0
+    pending: "MutableSequence[Any]" = [tree]
+    while len(pending) > 0:
+        node = pending.pop()
+        num_nodes += 1
+        if isinstance(node, LarkTree):
+            pending.extend(node.children)
+
+    return num_nodes
+
+
+def lex_groovy_content(
+    content: "str",
+    stats: "Optional[GroovyParseStats]" = None,
+) -> "Sequence[LarkToken]":
+    """
+    It obtains the stream of tokens which feeds the parser.
+    Lexing is done beforehand, so it can be measured apart
+    """
+    from .lexer import FusedGroovyLexer
+
+    lexer = FusedGroovyLexer()
+    with _phase(stats, "lex"):
+        lark_tokens = list(lexer.lex(content))
+
+    if stats is not None:
+        stats.tokenizer_tokens = lexer.tokenizer_tokens
+        stats.preprocessed_tokens = lexer.preprocessed_tokens
+        stats.lexer_tokens = len(lark_tokens)
+
+    return lark_tokens
 
-    return parser
 
+class _ProgressTokens(list):  # type: ignore[type-arg]
+    """
+    Tokens which update a shared counter as they are iterated
+    """
 
-def parse_groovy_content(content: "str") -> "ParseTree":
-    parser = create_groovy_parser()
+    def __init__(self, lark_tokens: "Sequence[LarkToken]", progress: "Any"):
+        super().__init__(lark_tokens)
+        self.progress = progress
 
+    def __iter__(self) -> "Iterator[LarkToken]":
+        for num_tokens, lark_token in enumerate(super().__iter__(), 1):
+            self.progress.value = num_tokens
+            yield lark_token
+
+
+def _parse_content(
+    content: "str",
+    stats: "Optional[GroovyParseStats]",
+    parser: "Optional[Lark]",
+    recover: "bool",
+) -> "Tuple[ParseTree, Sequence[ParseErrorTree]]":
+    """
+    It returns the parse tree, along with the unparsable regions
+    (always empty when not recovering)
+    """
+    from lark.exceptions import ParseError as LarkParseError
+
+    if parser is None:
+        from .grammar import get_groovy_parser
+
+        with _phase(stats, "parser_build"):
+            parser = get_groovy_parser()
+
+    errors: "Sequence[ParseErrorTree]" = []
     try:
-        gResLex = GroovyRestrictedTokenizer()
-        # import logging
-        # tokens = []
-        # for tok in gResLex.get_tokens(content):
-        #    logging.info(f"TOK {tok}")
-        #    tokens.append(tok)
-        tokens = list(gResLex.get_tokens(content))
-        # The type ignore is needed due the poor type annotation of
-        # lark, which assumes the input is always a string
-        tree = parser.parse(
-            tokens,  # type: ignore[arg-type]
-            #    on_error=handle_errors
-        )
+        lark_tokens = lex_groovy_content(content, stats=stats)
+        if stats is not None and stats.token_progress is not None:
+            lark_tokens = _ProgressTokens(lark_tokens, stats.token_progress)
+
+        with _phase(stats, "parse"):
+            if recover:
+                from .grammar import parse_tokens_recovering
+
+                tree, errors = parse_tokens_recovering(parser, lark_tokens)
+            else:
+                # The type ignore is needed due the poor type annotation of
+                # lark, which assumes the input is always a string
+                tree = parser.parse(
+                    lark_tokens,  # type: ignore[arg-type]
+                    #    on_error=handle_errors
+                )
     except LarkParseError as pe:
         raise pe
 
+    if stats is not None:
+        stats.tree_nodes = count_tree_nodes(tree)
+        stats.parse_errors = len(errors)
+
+    return tree, errors
+
+
+def parse_groovy_content(
+    content: "str",
+    stats: "Optional[GroovyParseStats]" = None,
+    parser: "Optional[Lark]" = None,
+    recover: "bool" = False,
+) -> "ParseTree":
+    """
+    It parses the Groovy content. When a GroovyParseStats instance
+    is provided, it is filled in with the timings and counters of
+    each phase. When recover is set, the top level statements which
+    cannot be parsed become parse_error nodes (ParseErrorTree instances,
+    which tell the span and the error) instead of failing the whole
+    content.
+    """
+    tree, _ = _parse_content(content, stats, parser, recover)
+
+    return tree
+
+
+def _lex_groovy_fragment(
+    content: "str",
+    start: "str",
+    stats: "Optional[GroovyParseStats]",
+) -> "Sequence[LarkToken]":
+    if start not in GROOVY_START_RULES:
+        raise ValueError(
+            f"Unknown start rule {start}. It must be one of {GROOVY_START_RULES}"
+        )
+
+    lark_tokens = lex_groovy_content(content, stats=stats)
+    if start != GROOVY_START_RULES[0]:
+        from .lexer import SEPARATOR_TERMINALS
+
+        # Only whole scripts can begin or end with separators
+        ifrom = 0
+        ito = len(lark_tokens)
+        while ifrom < ito and lark_tokens[ifrom].type in SEPARATOR_TERMINALS:
+            ifrom += 1
+        while ito > ifrom and lark_tokens[ito - 1].type in SEPARATOR_TERMINALS:
+            ito -= 1
+        lark_tokens = lark_tokens[ifrom:ito]
+
+    return lark_tokens
+
+
+def parse_groovy_fragment(
+    content: "str",
+    start: "str" = "expression",
+    stats: "Optional[GroovyParseStats]" = None,
+    parser: "Optional[Lark]" = None,
+) -> "ParseTree":
+    """
+    It parses a Groovy fragment (an expression, a closure, a statement,
+    the contents of a GString placeholder...) from one of the
+    GROOVY_START_RULES, without wrapping it in a script. The warm parser
+    is the same one parse_groovy_content uses.
+    """
+    if parser is None:
+        from .grammar import get_groovy_parser
+
+        with _phase(stats, "parser_build"):
+            parser = get_groovy_parser()
+
+    lark_tokens = _lex_groovy_fragment(content, start, stats)
+    with _phase(stats, "parse"):
+        tree = parser.parse(lark_tokens, start=start)  # type: ignore[arg-type]
+
+    if stats is not None:
+        stats.tree_nodes = count_tree_nodes(tree)
+
     return tree
 
 
+def digest_groovy_fragment(
+    content: "str",
+    start: "str" = "expression",
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    spans: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    It parses and digests a Groovy fragment, like parse_groovy_fragment
+    does, with the inlined parser. Its digested tree is the same as the
+    one of that fragment within a whole digested tree, although the
+    spans are relative to the fragment.
+    """
+    from .grammar import (
+        get_inlined_groovy_parser,
+        LarkFilteringTreeEncoder,
+    )
+
+    with _phase(stats, "parser_build"):
+        parser = get_inlined_groovy_parser(tuple(prune), tuple(noflat))
+    tree = parse_groovy_fragment(content, start=start, stats=stats, parser=parser)
+    with _phase(stats, "digest"):
+        return LarkFilteringTreeEncoder(
+            spans=spans,
+            text=normalize_groovy_text(content) if spans else None,
+        ).default(
+            tree,
+            prune=prune,
+            noflat=noflat,
+        )
+
+
 def digest_lark_tree(
     tree: "ParseTree",
     prune: "Sequence[str]" = ["sep", "nls"],
     noflat: "Sequence[str]" = ["script_statement"],
+    spans: "bool" = False,
+    text: "Optional[str]" = None,
 ) -> "Union[RuleNode, LeafNode, EmptyNode]":
-    return LarkFilteringTreeEncoder().default(
+    """
+    It digests the parse tree. With spans, both leaves and rule nodes
+    tell the [start, end] offsets they cover within the normalized text
+    (see normalize_groovy_text), and when that text is provided, the
+    values of the leaves which can be sliced from it are not kept.
+    """
+    from .grammar import LarkFilteringTreeEncoder
+
+    return LarkFilteringTreeEncoder(spans=spans, text=text).default(
         tree,
         prune=prune,
         noflat=noflat,
     )
 
 
+def normalize_groovy_text(content: "str") -> "str":
+    """
+    The same normalization the lexer applies to the content, so token
+    positions and the spans of the digested trees refer to this text
+    """
+    if content.startswith("\ufeff"):
+        content = content[len("\ufeff") :]
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+def children_span(
+    children: "Sequence[Union[RuleNode, LeafNode, EmptyNode]]",
+) -> "Optional[Span]":
+    """
+    The span covered by the digested children which have one
+    """
+    start: "Optional[int]" = None
+    end: "Optional[int]" = None
+    for child in children:
+        span = cast("Mapping[str, Any]", child).get("span")
+        if span is not None:
+            if start is None:
+                start = span[0]
+            end = span[1]
+
+    if start is None or end is None:
+        return None
+    return [start, end]
+
+
+def digested_leaf_value(leaf: "LeafNode", text: "str") -> "str":
+    """
+    The value of a digested leaf, which is sliced from the
+    normalized text when it was not kept
+    """
+    value = leaf.get("value")
+    if value is None:
+        start, end = leaf["span"]
+        value = text[start:end]
+    return value
+
+
+def restore_digested_values(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    text: "str",
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    It returns a copy of a digested tree with spans where all the leaves
+    have their values, as the code written for trees without spans expects
+    """
+    children = cast("RuleNode", t_tree).get("children")
+    if children is not None:
+        r_node = cast("RuleNode", dict(t_tree))
+        r_node["children"] = [
+            restore_digested_values(child, text) for child in children
+        ]
+        return r_node
+
+    if "span" not in t_tree or "value" in t_tree:
+        return t_tree
+
+    leaf = cast("LeafNode", dict(t_tree))
+    leaf["value"] = digested_leaf_value(leaf, text)
+    return leaf
+
+
+def _pack_spans(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+) -> "Mapping[str, Any]":
+    """
+    The cached form of a digested tree with spans. As they compress
+    better, the spans of the leaves become the distance from the end
+    of the previous leaf and their length, and the spans of the rule
+    nodes are left out, as they are derived from their children
+    """
+    prev_end = 0
+
+    def _pack(node: "Mapping[str, Any]") -> "Mapping[str, Any]":
+        nonlocal prev_end
+        children = node.get("children")
+        if children is not None:
+            packed_node = {
+                "rule": node["rule"],
+                "children": [_pack(child) for child in children],
+            }
+            if "error" in node:
+                packed_node["error"] = node["error"]
+            return packed_node
+
+        span = node.get("span")
+        if span is None:
+            return node
+        packed = dict(node)
+        packed["span"] = [span[0] - prev_end, span[1] - span[0]]
+        prev_end = span[1]
+        return packed
+
+    return _pack(t_tree)
+
+
+def _unpack_spans(
+    packed: "Mapping[str, Any]",
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    It rebuilds a digested tree with spans from its cached form
+    """
+    prev_end = 0
+
+    def _unpack(node: "Mapping[str, Any]") -> "Union[RuleNode, LeafNode, EmptyNode]":
+        nonlocal prev_end
+        children = node.get("children")
+        if children is not None:
+            t_children = [_unpack(child) for child in children]
+            r_node: "RuleNode" = {
+                "rule": node["rule"],
+                "children": t_children,
+            }
+            span = children_span(t_children)
+            if span is not None:
+                r_node["span"] = span
+            if "error" in node:
+                r_node["error"] = node["error"]
+            return r_node
+
+        packed_span = node.get("span")
+        if packed_span is None:
+            return cast("EmptyNode", node)
+        leaf = cast("LeafNode", dict(node))
+        start = prev_end + packed_span[0]
+        prev_end = start + packed_span[1]
+        leaf["span"] = [start, prev_end]
+        return leaf
+
+    return _unpack(packed)
+
+
 SIGNATURE_FILES = [
     GROOVY_3_0_X_GRAMMAR,
-    tokenizer_source_path,
-    lexer_source_path,
+    os.path.join(os.path.dirname(__file__), "tokenizer.py"),
+    os.path.join(os.path.dirname(__file__), "lexer.py"),
+    os.path.join(os.path.dirname(__file__), "grammar.py"),
+    os.path.join(os.path.dirname(__file__), "config.py"),
     __file__,
 ]
 
-SIGNATURE_VERSIONS = [
-    pygments_version,
-    lark_version,
+# Dependencies whose versions are part of the cache signature
+SIGNATURE_MODULES = [
+    "pygments",
+    "lark",
 ]
 
+VERSION_RE = re.compile(r"""^__version__\s*(?::\s*str\s*)?=\s*['"]([^'"]+)['"]""", re.M)
+
+
+def _module_version(module_name: "str") -> "str":
+    """
+    It reads the version of a dependency from its sources, so a cache
+    hit does not need importing it. When it cannot, it is imported.
+    """
+    spec = importlib.util.find_spec(module_name)
+    if spec is not None and spec.origin is not None:
+        try:
+            with open(spec.origin, mode="r", encoding="utf-8") as mH:
+                version_match = VERSION_RE.search(mH.read())
+            if version_match is not None:
+                return version_match.group(1)
+        except OSError:
+            pass
+
+    return str(importlib.import_module(module_name).__version__)
+
+
+@functools.lru_cache(maxsize=None)
+def _signature_versions() -> "Sequence[str]":
+    return [_module_version(module_name) for module_name in SIGNATURE_MODULES]
+
+
 BLOCK_SIZE = 1024 * 1024
 
+# Files from this size on are memory mapped instead of read
+MMAP_THRESHOLD = BLOCK_SIZE
 
-def parse_and_digest_groovy_content(
-    content: "str",
+
+@functools.lru_cache(maxsize=None)
+def _signature_hash() -> "hashlib._Hash":
+    h = hashlib.sha256()
+    buff = bytearray(BLOCK_SIZE)
+
+    # The base signature for the caching directory
+    for signature_file in SIGNATURE_FILES:
+        with open(signature_file, mode="rb") as sH:
+            numbytes = 1
+            while numbytes > 0:
+                numbytes = sH.readinto(buff)
+                if numbytes > 0:
+                    if numbytes < BLOCK_SIZE:
+                        h.update(buff[:numbytes])
+                    else:
+                        h.update(buff)
+
+    # Without forgetting both pygments and lark versions
+    for signature_version in _signature_versions():
+        h.update(signature_version.encode("utf-8"))
+
+    return h
+
+
+class GroovySourceDecodeError(UnicodeDecodeError):
+    """
+    The source file is not valid UTF-8. start and end are the byte
+    offsets of the offending bytes within the file.
+    """
+
+    def __init__(self, path: "str", error: "UnicodeDecodeError"):
+        super().__init__(
+            error.encoding, error.object, error.start, error.end, error.reason
+        )
+        self.path = path
+        self.line = error.object.count(b"\n", 0, error.start) + 1
+
+    def __reduce__(self) -> "Tuple[Any, ...]":
+        return (
+            self.__class__,
+            (
+                self.path,
+                UnicodeDecodeError(
+                    self.encoding, self.object, self.start, self.end, self.reason
+                ),
+            ),
+        )
+
+    def __str__(self) -> "str":
+        return f"{self.path}: cannot decode bytes {self.start}-{self.end} (line {self.line}) as {self.encoding}: {self.reason}"
+
+
+@contextlib.contextmanager
+def open_groovy_source(path: "Union[str, os.PathLike[str]]") -> "Iterator[SourceBytes]":
+    with open(path, mode="rb") as sH:
+        if os.fstat(sH.fileno()).st_size < MMAP_THRESHOLD:
+            yield sH.read()
+        else:
+            with mmap.mmap(sH.fileno(), 0, access=mmap.ACCESS_READ) as mH:
+                yield mH
+
+
+def normalize_groovy_source(source: "SourceBytes") -> "SourceBytes":
+    # Same newlines a file opened in text mode provides, so the
+    # cache keys match the ones from its decoded content
+    if source.find(b"\r") == -1:
+        return source
+    return bytes(source).replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+def decode_groovy_source(source: "SourceBytes", path: "str" = "<bytes>") -> "str":
+    try:
+        return str(source, "utf-8")
+    except UnicodeDecodeError as ude:
+        raise GroovySourceDecodeError(path, ude) from ude
+
+
+def parse_groovy_file(
+    path: "Union[str, os.PathLike[str]]",
+    stats: "Optional[GroovyParseStats]" = None,
+    parser: "Optional[Lark]" = None,
+    recover: "bool" = False,
+) -> "ParseTree":
+    """
+    It parses a Groovy file, which is read (or memory mapped) at once.
+    Decoding errors are reported with their byte offsets.
+    """
+    with _phase(stats, "read"), open_groovy_source(path) as source:
+        content = decode_groovy_source(source, os.fspath(path))
+
+    return parse_groovy_content(content, stats=stats, parser=parser, recover=recover)
+
+
+class _CacheKey(NamedTuple):
+    # The read-write directory of this version of the software
+    cache_path: "pathlib.Path"
+    # Where the entries are looked up, starting from the read-write one
+    lookup_paths: "Sequence[pathlib.Path]"
+    # The hash of the signature and the source
+    content_hash: "str"
+
+    def rel_hashpath(self, variant: "Optional[str]" = None) -> "str":
+        return (
+            self.content_hash + ("" if variant is None else "." + variant) + ".json.gz"
+        )
+
+
+def _cache_key(
+    get_source: "Callable[[], SourceBytes]",
     ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
     cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
-    prune: "Sequence[str]" = ["sep", "nls"],
-    noflat: "Sequence[str]" = ["script_statement"],
-) -> "Union[RuleNode, LeafNode, EmptyNode]":
-    t_tree: "Optional[Union[RuleNode, LeafNode, EmptyNode]]" = None
-    hashpath: "Optional[pathlib.Path]" = None
+    stats: "Optional[GroovyParseStats]" = None,
+) -> "Optional[_CacheKey]":
+    """
+    It computes where the cache entries of a source are, hashing it
+    once for all their variants. None when there is no cache.
+    """
     cache_path: "Optional[pathlib.Path]" = None
     if cache_directory is not None:
         if isinstance(cache_directory, pathlib.Path):
@@ -234,99 +847,663 @@ def parse_and_digest_groovy_content(
         else:
             cache_path = pathlib.Path(cache_directory)
 
-    if cache_path is not None and cache_path.is_dir():
-        h = hashlib.sha256()
-        buff = bytearray(BLOCK_SIZE)
-
-        # The base signature for the caching directory
-        for signature_file in SIGNATURE_FILES:
-            with open(signature_file, mode="rb") as sH:
-                numbytes = 1
-                while numbytes > 0:
-                    numbytes = sH.readinto(buff)
-                    if numbytes > 0:
-                        if numbytes < BLOCK_SIZE:
-                            h.update(buff[:numbytes])
-                        else:
-                            h.update(buff)
-
-        # Without forgetting both pygments and lark versions
-        for signature_version in SIGNATURE_VERSIONS:
-            h.update(signature_version.encode("utf-8"))
+    if cache_path is None or not cache_path.is_dir():
+        return None
+
+    with _phase(stats, "cache_key"):
+        h = _signature_hash().copy()
 
         # Now we can obtain the relative directory, unique to this
         # version of the software and its dependencies
-        hreldir = h.copy().hexdigest()
-
-        this_cache_path = cache_path / hreldir
-        this_cache_path.mkdir(parents=True, exist_ok=True)
-
-        # The first path to be inspected must the read-write one
-        # so no spurious backpropagation operations from read-only to
-        # already existing read-write one happen
-        ro_cache_paths: "MutableSequence[pathlib.Path]" = [this_cache_path]
-        if ro_cache_directories is not None:
-            for ro_cache_directory in ro_cache_directories:
-                if isinstance(ro_cache_directory, pathlib.Path):
-                    ro_cache_path = ro_cache_directory
-                else:
-                    ro_cache_path = pathlib.Path(ro_cache_directory)
-
-                # Include only existing cache paths
-                this_ro_cache_path = ro_cache_path / hreldir
-                if this_ro_cache_path.is_dir():
-                    ro_cache_paths.append(this_ro_cache_path)
-
-        # Now, let's go for the content signature
-        h.update(content.encode("utf-8"))
-        rel_hashpath = h.hexdigest() + ".json.gz"
-
-        # This is needed in case nothing was available
-        hashpath = this_cache_path / rel_hashpath
-        for ro_cache_path in ro_cache_paths:
-            ro_hashpath = ro_cache_path / rel_hashpath
-            if ro_hashpath.is_file():
-                try:
+        hreldir = h.hexdigest()
+    this_cache_path = cache_path / hreldir
+    this_cache_path.mkdir(parents=True, exist_ok=True)
+
+    # The first path to be inspected must the read-write one
+    # so no spurious backpropagation operations from read-only to
+    # already existing read-write one happen
+    ro_cache_paths: "MutableSequence[pathlib.Path]" = [this_cache_path]
+    if ro_cache_directories is not None:
+        for ro_cache_directory in ro_cache_directories:
+            if isinstance(ro_cache_directory, pathlib.Path):
+                ro_cache_path = ro_cache_directory
+            else:
+                ro_cache_path = pathlib.Path(ro_cache_directory)
+
+            # Include only existing cache paths
+            this_ro_cache_path = ro_cache_path / hreldir
+            if this_ro_cache_path.is_dir():
+                ro_cache_paths.append(this_ro_cache_path)
+
+    # Now, let's go for the content signature
+    with _phase(stats, "cache_key"):
+        h.update(get_source())
+
+    return _CacheKey(
+        cache_path=this_cache_path,
+        lookup_paths=ro_cache_paths,
+        content_hash=h.hexdigest(),
+    )
+
+
+def _read_cache_entry(
+    key: "_CacheKey",
+    stats: "Optional[GroovyParseStats]" = None,
+    variant: "Optional[str]" = None,
+) -> "Tuple[Optional[Union[RuleNode, LeafNode, EmptyNode]], Optional[pathlib.Path]]":
+    """
+    Same as read_cached_digest, from an already computed key
+    """
+    t_tree: "Optional[Union[RuleNode, LeafNode, EmptyNode]]" = None
+    rel_hashpath = key.rel_hashpath(variant)
+
+    if stats is not None:
+        stats.cache_outcome = GroovyParseStats.CACHE_MISS
+
+    # This is needed in case nothing was available
+    hashpath: "Optional[pathlib.Path]" = key.cache_path / rel_hashpath
+    for ro_cache_path in key.lookup_paths:
+        ro_hashpath = ro_cache_path / rel_hashpath
+        if ro_hashpath.is_file():
+            try:
+                with _phase(stats, "cache_read"):
                     with gzip.open(
                         ro_hashpath.as_posix(), mode="rt", encoding="utf-8"
                     ) as jH:
                         t_tree = json.load(jH)
 
-                    # This is needed in order to propagate the cached
-                    # copy from the read-only cache
-                    try:
-                        assert hashpath is not None
-                        if not hashpath.samefile(ro_hashpath):
-                            # Removing possible stale copy
-                            if hashpath.exists():
-                                if hashpath.is_dir() and not hashpath.is_symlink():
-                                    shutil.rmtree(hashpath.as_posix())
-                                else:
-                                    hashpath.unlink()
-                            # New copy
-                            shutil.copy2(ro_hashpath.as_posix(), hashpath.as_posix())
-                        hashpath = None
-                    except:
-                        # If it cannot be created for some reason, try again later
-                        pass
-
-                    break
+                if stats is not None:
+                    stats.cache_bytes_read = ro_hashpath.stat().st_size
+                    stats.cache_outcome = (
+                        GroovyParseStats.CACHE_HIT
+                        if ro_cache_path == key.cache_path
+                        else GroovyParseStats.CACHE_PROPAGATED
+                    )
+
+                # This is needed in order to propagate the cached
+                # copy from the read-only cache
+                try:
+                    assert hashpath is not None
+                    if not hashpath.samefile(ro_hashpath):
+                        # Removing possible stale copy
+                        if hashpath.exists():
+                            if hashpath.is_dir() and not hashpath.is_symlink():
+                                shutil.rmtree(hashpath.as_posix())
+                            else:
+                                hashpath.unlink()
+                        # New copy
+                        shutil.copy2(ro_hashpath.as_posix(), hashpath.as_posix())
+                    hashpath = None
                 except:
-                    # If it is unreadable, re-create
+                    # If it cannot be created for some reason, try again later
                     pass
 
-    if t_tree is None and (hashpath is not None or cache_path is None):
-        tree = parse_groovy_content(content)
-        t_tree = LarkFilteringTreeEncoder().default(
+                break
+            except:
+                # If it is unreadable, re-create
+                pass
+
+    return t_tree, hashpath
+
+
+def read_cached_digest(
+    get_source: "Callable[[], SourceBytes]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    stats: "Optional[GroovyParseStats]" = None,
+    variant: "Optional[str]" = None,
+) -> "Tuple[Optional[Union[RuleNode, LeafNode, EmptyNode]], Optional[pathlib.Path]]":
+    """
+    It looks up the digested tree of a source (provided as its bytes)
+    in the caches, propagating it from the read-only ones. It returns
+    the digested tree (None on a cache miss) and the path where it has
+    to be stored through write_cached_digest (None when not needed).
+    A variant keeps apart the trees obtained in a different way from
+    the same source, like the recovered ones.
+    """
+    key = _cache_key(
+        get_source,
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        stats=stats,
+    )
+    if key is None:
+        return None, None
+
+    return _read_cache_entry(key, stats=stats, variant=variant)
+
+
+def write_cached_digest(
+    hashpath: "pathlib.Path",
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode, Mapping[str, Any]]",
+    stats: "Optional[GroovyParseStats]" = None,
+) -> None:
+    with _phase(stats, "cache_write"):
+        with gzip.open(hashpath.as_posix(), mode="wt", encoding="utf-8") as jH:
+            json.dump(t_tree, jH, sort_keys=True)
+    if stats is not None:
+        stats.cache_bytes_written = hashpath.stat().st_size
+
+
+# Cache variant of the parse failures
+ERROR_VARIANT = "error"
+
+
+def _variant_hashpath(hashpath: "pathlib.Path", variant: "str") -> "pathlib.Path":
+    """
+    The path of a variant, derived from the one of the digested tree
+    """
+    return hashpath.with_name(
+        hashpath.name[: -len(".json.gz")] + "." + variant + ".json.gz"
+    )
+
+
+def parse_error_as_dict(error: "Exception") -> "Mapping[str, Any]":
+    """
+    What is kept from a parse error in the negative cache
+    """
+    expected = getattr(error, "expected", None)
+    return {
+        "type": getattr(error, "error_type", type(error).__name__),
+        "message": str(error),
+        "line": getattr(error, "line", -1),
+        "column": getattr(error, "column", -1),
+        "pos_in_stream": getattr(error, "pos_in_stream", None),
+        "expected": sorted(map(str, expected)) if expected is not None else [],
+    }
+
+
+def _cached_parse_error(entry: "Mapping[str, Any]") -> "CachedParseError":
+    from .grammar import CachedParseError
+
+    return CachedParseError(
+        entry["type"],
+        entry["message"],
+        entry["line"],
+        entry["column"],
+        entry["pos_in_stream"],
+        entry["expected"],
+    )
+
+
+def _digest_content(
+    content: "str",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+    stats: "Optional[GroovyParseStats]",
+    recover: "bool",
+    spans: "bool" = False,
+    config_mode: "bool" = False,
+) -> "Tuple[Union[RuleNode, LeafNode, EmptyNode], Sequence[ParseErrorTree]]":
+    if config_mode and not recover:
+        from .config import digest_groovy_config_content
+
+        t_config, _, _ = digest_groovy_config_content(
+            content, prune, noflat, stats, spans=spans
+        )
+        return t_config, []
+
+    from .grammar import (
+        get_inlined_groovy_parser,
+        LarkFilteringTreeEncoder,
+    )
+
+    # The parse tree is only going to be digested, so the nodes
+    # thrown away by the digestion are not even built
+    with _phase(stats, "parser_build"):
+        parser = get_inlined_groovy_parser(tuple(prune), tuple(noflat))
+    tree, errors = _parse_content(content, stats, parser, recover)
+    with _phase(stats, "digest"):
+        t_tree = LarkFilteringTreeEncoder(
+            spans=spans,
+            text=normalize_groovy_text(content) if spans else None,
+        ).default(
             tree,
             prune=prune,
             noflat=noflat,
         )
 
-    assert t_tree is not None
+    return t_tree, errors
+
+
+def _digest_in_worker(
+    content: "str",
+    prune: "Sequence[str]" = DEFAULT_PRUNE,
+    noflat: "Sequence[str]" = DEFAULT_NOFLAT,
+    with_stats: "bool" = False,
+    recover: "bool" = False,
+    spans: "bool" = False,
+    config_mode: "bool" = False,
+) -> "Tuple[Optional[Union[RuleNode, LeafNode, EmptyNode]], Optional[Mapping[str, Any]], Optional[GroovyParseStats]]":
+    """
+    The unit of work of the worker processes. It returns the digested
+    tree (None when the content could not be parsed) and the parse error
+    of the whole content, when it failed or it was recovered. The error
+    is returned as parse_error_as_dict does, as not all the parse errors
+    can be pickled.
+    """
+    from lark.exceptions import ParseError as LarkParseError
+
+    from .budget import worker_parse_stats
+
+    with worker_parse_stats() as stats:
+        try:
+            t_tree, errors = _digest_content(
+                content,
+                prune,
+                noflat,
+                stats,
+                recover,
+                spans=spans,
+                config_mode=config_mode,
+            )
+        except LarkParseError as pe:
+            return None, parse_error_as_dict(pe), stats if with_stats else None
+
+    return (
+        t_tree,
+        parse_error_as_dict(errors[0].error) if len(errors) > 0 else None,
+        stats if with_stats else None,
+    )
+
+
+def digest_groovy_content(
+    content: "str",
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    recover: "bool" = False,
+    spans: "bool" = False,
+    config_mode: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    It parses and digests the content, without any cache. In
+    config_mode, the configuration subset of the grammar is tried
+    first (see groovy_parser.config).
+    """
+    t_tree, _ = _digest_content(
+        content, prune, noflat, stats, recover, spans=spans, config_mode=config_mode
+    )
+
+    return t_tree
+
+
+# Cache variant of the trees with unparsable regions
+RECOVERED_VARIANT = "recovered"
+
+# Cache variant of the trees with spans, which is combined with the others
+SPANS_VARIANT = "spans"
+
+
+# Cache variant of the trees from the configuration mode, which is
+# combined with the others, so they are never mixed with the ones
+# from the full grammar
+CONFIG_VARIANT = "config"
+
+
+def _join_variants(*variants: "Optional[str]") -> "Optional[str]":
+    joined = ".".join(variant for variant in variants if variant is not None)
+    return joined if joined != "" else None
+
+
+def _tree_variant(spans: "bool", config_mode: "bool") -> "Optional[str]":
+    return _join_variants(
+        SPANS_VARIANT if spans else None, CONFIG_VARIANT if config_mode else None
+    )
+
+
+# Cache variant of the contents which exceeded a parsing budget
+BUDGET_VARIANT = "budget"
+
+
+def _read_cached_budget_exceeded(
+    key: "_CacheKey",
+    budget: "ParseBudget",
+    stats: "Optional[GroovyParseStats]" = None,
+    tree_variant: "Optional[str]" = None,
+) -> "Optional[ParseBudgetExceeded]":
+    from .budget import ParseBudgetExceeded
+
+    entry, _ = _read_cache_entry(
+        key, stats=stats, variant=_join_variants(tree_variant, BUDGET_VARIANT)
+    )
+    if entry is None:
+        return None
+
+    exceeded = ParseBudgetExceeded.from_dict(cast("Mapping[str, Any]", entry))
+    return exceeded if exceeded.applies_to(budget) else None
+
+
+def read_cached_budget_exceeded(
+    get_source: "Callable[[], SourceBytes]",
+    budget: "ParseBudget",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    stats: "Optional[GroovyParseStats]" = None,
+    spans: "bool" = False,
+    config_mode: "bool" = False,
+) -> "Optional[ParseBudgetExceeded]":
+    """
+    It tells whether the source is known to exceed the budget, because
+    it already exceeded a budget which was not smaller
+    """
+    key = _cache_key(
+        get_source,
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        stats=stats,
+    )
+    if key is None:
+        return None
+
+    return _read_cached_budget_exceeded(
+        key, budget, stats=stats, tree_variant=_tree_variant(spans, config_mode)
+    )
+
+
+def write_cached_budget_exceeded(
+    get_source: "Callable[[], SourceBytes]",
+    exceeded: "ParseBudgetExceeded",
+    cache_directory: "Union[str, os.PathLike[str]]",
+    spans: "bool" = False,
+    config_mode: "bool" = False,
+) -> None:
+    """
+    It remembers that the source exceeded a budget. As the worker which
+    was parsing it is usually gone, it is written by whoever watched it.
+    """
+    h = _signature_hash().copy()
+    this_cache_path = pathlib.Path(cache_directory) / h.hexdigest()
+    this_cache_path.mkdir(parents=True, exist_ok=True)
+    h.update(get_source())
+    variant = _join_variants(_tree_variant(spans, config_mode), BUDGET_VARIANT)
+    write_cached_digest(
+        this_cache_path / f"{h.hexdigest()}.{variant}.json.gz", exceeded.as_dict()
+    )
+
+
+class _CachedDigestLookup(NamedTuple):
+    # The cached digested tree, None on a cache miss
+    t_tree: "Optional[Union[RuleNode, LeafNode, EmptyNode]]"
+    # Where the digested tree has to be stored, when it has to
+    hashpath: "Optional[pathlib.Path]"
+    # Where the tree with unparsable regions has to be stored, when recovering
+    recovered_hashpath: "Optional[pathlib.Path]"
+
+
+def _lookup_cached_digest(
+    get_source: "Callable[[], SourceBytes]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]",
+    stats: "Optional[GroovyParseStats]",
+    recover: "bool",
+    ignore_cached_errors: "bool",
+    spans: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+    config_mode: "bool" = False,
+) -> "_CachedDigestLookup":
+    """
+    The cache lookup step of parse_and_digest_groovy_content. The source
+    is hashed once for all the variants, and the known failures (parse
+    errors and exceeded budgets) are raised again.
+    """
+    key = _cache_key(
+        get_source,
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        stats=stats,
+    )
+    if key is None:
+        return _CachedDigestLookup(t_tree=None, hashpath=None, recovered_hashpath=None)
+
+    tree_variant = _tree_variant(spans, config_mode)
+    t_tree, hashpath = _read_cache_entry(key, stats=stats, variant=tree_variant)
+    # Known failures are raised again, unless recovering
+    if t_tree is None and not recover and not ignore_cached_errors:
+        error_entry, _ = _read_cache_entry(
+            key, stats=stats, variant=_join_variants(tree_variant, ERROR_VARIANT)
+        )
+        if error_entry is not None:
+            if stats is not None:
+                stats.cache_outcome = GroovyParseStats.CACHE_NEGATIVE_HIT
+            raise _cached_parse_error(cast("Mapping[str, Any]", error_entry))
+
+    recovered_hashpath: "Optional[pathlib.Path]" = None
+    if t_tree is None and recover:
+        # Contents with unparsable regions are kept apart, so they
+        # are never returned when not recovering
+        t_tree, recovered_hashpath = _read_cache_entry(
+            key, stats=stats, variant=_join_variants(tree_variant, RECOVERED_VARIANT)
+        )
+        if t_tree is not None:
+            hashpath = recovered_hashpath
+
+    # Contents which already exceeded the budget are not parsed again
+    if t_tree is None and budget is not None and not ignore_cached_errors:
+        exceeded = _read_cached_budget_exceeded(
+            key, budget, stats=stats, tree_variant=tree_variant
+        )
+        if exceeded is not None:
+            if stats is not None:
+                stats.cache_outcome = GroovyParseStats.CACHE_NEGATIVE_HIT
+            raise exceeded
+
+    if t_tree is not None and spans:
+        t_tree = _unpack_spans(t_tree)
+
+    return _CachedDigestLookup(
+        t_tree=t_tree, hashpath=hashpath, recovered_hashpath=recovered_hashpath
+    )
+
+
+def _store_cached_parse_error(
+    lookup: "_CachedDigestLookup",
+    error_entry: "Mapping[str, Any]",
+    stats: "Optional[GroovyParseStats]" = None,
+) -> None:
+    """
+    The cache store step of parse_and_digest_groovy_content, when the
+    content could not be parsed. The error is the one from
+    parse_error_as_dict.
+    """
+    if lookup.hashpath is not None:
+        write_cached_digest(
+            _variant_hashpath(lookup.hashpath, ERROR_VARIANT),
+            error_entry,
+            stats=stats,
+        )
+
+
+def _store_cached_digest(
+    lookup: "_CachedDigestLookup",
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+    error_entry: "Optional[Mapping[str, Any]]" = None,
+    stats: "Optional[GroovyParseStats]" = None,
+    spans: "bool" = False,
+) -> None:
+    """
+    The cache store step of parse_and_digest_groovy_content, which also
+    propagates the cache hits which could not be propagated on lookup.
+    The error (from parse_error_as_dict) is the one of the whole
+    content, when the tree has unparsable regions.
+    """
+    hashpath = lookup.hashpath
+    if error_entry is not None:
+        # The whole content does fail, so it is also remembered
+        if hashpath is not None:
+            error_hashpath = _variant_hashpath(hashpath, ERROR_VARIANT)
+            if not error_hashpath.exists():
+                write_cached_digest(error_hashpath, error_entry)
+        hashpath = lookup.recovered_hashpath
 
     if hashpath is not None:
-        with gzip.open(hashpath.as_posix(), mode="wt", encoding="utf-8") as jH:
-            json.dump(t_tree, jH, sort_keys=True)
+        write_cached_digest(
+            hashpath, _pack_spans(t_tree) if spans else t_tree, stats=stats
+        )
+
+
+def _parse_and_digest_source(
+    get_content: "Callable[[], str]",
+    get_source: "Callable[[], SourceBytes]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+    stats: "Optional[GroovyParseStats]",
+    recover: "bool",
+    ignore_cached_errors: "bool",
+    statement_memo: "Optional[StatementDigestMemo]",
+    spans: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+    config_mode: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    from lark.exceptions import ParseError as LarkParseError
+
+    # The content is only requested on cache misses
+    lookup = _lookup_cached_digest(
+        get_source,
+        ro_cache_directories,
+        cache_directory,
+        stats,
+        recover,
+        ignore_cached_errors,
+        spans=spans,
+        budget=budget,
+        config_mode=config_mode,
+    )
+    t_tree = lookup.t_tree
+    errors: "Sequence[ParseErrorTree]" = []
+    if t_tree is None:
+        try:
+            # The digested statements with spans depend on where they
+            # are, and the configuration subset is not memoized
+            if (
+                statement_memo is not None
+                and not recover
+                and not spans
+                and not config_mode
+            ):
+                from .memo import digest_groovy_content_memoized
+
+                t_tree = digest_groovy_content_memoized(
+                    get_content(), prune, noflat, stats, memo=statement_memo
+                )
+            else:
+                t_tree, errors = _digest_content(
+                    get_content(),
+                    prune,
+                    noflat,
+                    stats,
+                    recover,
+                    spans=spans,
+                    config_mode=config_mode,
+                )
+        except LarkParseError as pe:
+            _store_cached_parse_error(lookup, parse_error_as_dict(pe), stats=stats)
+            raise
+
+    _store_cached_digest(
+        lookup,
+        t_tree,
+        parse_error_as_dict(errors[0].error) if len(errors) > 0 else None,
+        stats=stats,
+        spans=spans,
+    )
 
     return t_tree
+
+
+def parse_and_digest_groovy_content(
+    content: "str",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    recover: "bool" = False,
+    ignore_cached_errors: "bool" = False,
+    statement_memo: "Optional[StatementDigestMemo]" = None,
+    spans: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+    config_mode: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    It parses and digests the Groovy content, using the cache when
+    it is available. When a GroovyParseStats instance is provided,
+    it is filled in with the timings and counters of each phase,
+    as well as the cache outcome. When recover is set, the unparsable
+    top level statements become parse_error nodes, as in
+    parse_groovy_content.
+
+    Parse failures are also cached, so they are raised again as
+    CachedParseError without parsing, unless ignore_cached_errors
+    is set. When a statement_memo is provided, the top level
+    statements already seen (in any content) are not parsed again.
+    With spans, the digested tree is the one from digest_lark_tree
+    with spans, which is cached apart in a compact form.
+
+    The budget is the one the caller enforces on this parsing, like
+    BudgetedProcessPool does. Contents which already exceeded a budget
+    not smaller than this one raise ParseBudgetExceeded again, unless
+    ignore_cached_errors is set.
+
+    In config_mode, the content is first parsed with the configuration
+    subset of the grammar (see groovy_parser.config), falling back to
+    the full one. Its trees are cached apart from the ones of the full
+    grammar, and the statement_memo is not used.
+    """
+    return _parse_and_digest_source(
+        lambda: content,
+        lambda: content.encode("utf-8"),
+        ro_cache_directories=ro_cache_directories,
+        cache_directory=cache_directory,
+        prune=prune,
+        noflat=noflat,
+        stats=stats,
+        recover=recover,
+        ignore_cached_errors=ignore_cached_errors,
+        statement_memo=statement_memo,
+        spans=spans,
+        budget=budget,
+        config_mode=config_mode,
+    )
+
+
+def parse_and_digest_groovy_file(
+    path: "Union[str, os.PathLike[str]]",
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    recover: "bool" = False,
+    ignore_cached_errors: "bool" = False,
+    statement_memo: "Optional[StatementDigestMemo]" = None,
+    spans: "bool" = False,
+    budget: "Optional[ParseBudget]" = None,
+    config_mode: "bool" = False,
+) -> "Union[RuleNode, LeafNode, EmptyNode]":
+    """
+    Same as parse_and_digest_groovy_content, but the file is read (or
+    memory mapped) at once, and its bytes are hashed as they are, so
+    a cache hit does not even decode it. The cache entries are shared
+    with parse_and_digest_groovy_content.
+    """
+    with contextlib.ExitStack() as stack:
+        with _phase(stats, "read"):
+            source = stack.enter_context(open_groovy_source(path))
+        return _parse_and_digest_source(
+            lambda: decode_groovy_source(source, os.fspath(path)),
+            lambda: normalize_groovy_source(source),
+            ro_cache_directories=ro_cache_directories,
+            cache_directory=cache_directory,
+            prune=prune,
+            noflat=noflat,
+            stats=stats,
+            recover=recover,
+            ignore_cached_errors=ignore_cached_errors,
+            statement_memo=statement_memo,
+            spans=spans,
+            budget=budget,
+            config_mode=config_mode,
+        )
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Whole pipeline analysis, following the include declarations from
+# an entry point (usually a main.nf) through the local filesystem
+
+import concurrent.futures
+import logging
+import os
+import os.path
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Mapping,
+        MutableMapping,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Set,
+        Tuple,
+        Union,
+    )
+
+    from .parser import (
+        RuleNode,
+    )
+
+from .nextflow import (
+    extract_nextflow_features,
+    NfInclude,
+    NfProcess,
+    NfWorkflow,
+)
+from .parser import (
+    parse_and_digest_groovy_file,
+)
+
+
+class NfModuleNode(NamedTuple):
+    path: "str"
+    processes: "Sequence[NfProcess]"
+    includes: "Sequence[NfInclude]"
+    workflows: "Sequence[NfWorkflow]"
+    # The reason when the module could not be analyzed
+    error: "Optional[str]" = None
+
+
+class NfIncludeEdge(NamedTuple):
+    source: "str"
+    # The path as it was written in the include declaration
+    include_path: "str"
+    # The resolved path, or None when it could not be resolved
+    target: "Optional[str]"
+
+
+class NfModuleGraph(NamedTuple):
+    entry: "str"
+    nodes: "Mapping[str, NfModuleNode]"
+    edges: "Sequence[NfIncludeEdge]"
+
+
+def resolve_include_path(source: "str", include_path: "str") -> "Optional[str]":
+    """
+    It mimics how Nextflow resolves the paths of include declarations,
+    relative to the directory of the including module. Plugin includes
+    and paths which do not exist return None.
+    """
+    if include_path.startswith("plugin/"):
+        return None
+
+    if not os.path.isabs(include_path):
+        include_path = os.path.join(os.path.dirname(source), include_path)
+
+    candidates = [include_path]
+    if not include_path.endswith(".nf"):
+        candidates.append(include_path + ".nf")
+    candidates.append(os.path.join(include_path, "main.nf"))
+
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return os.path.realpath(candidate)
+
+    return None
+
+
+def analyze_nextflow_module(
+    path: "str",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    use_scanner: "bool" = False,
+) -> "NfModuleNode":
+    """
+    This method is the unit of work run by the workers. Being a top
+    level method, it can be used from a process pool, where each
+    process keeps its own warm parser.
+    """
+    try:
+        if use_scanner:
+            from .scanner import scan_nextflow_content
+
+            with open(path, mode="r", encoding="utf-8") as nH:
+                content = nH.read()
+
+            processes, includes, workflows, _, _ = scan_nextflow_content(
+                content,
+                cache_directory=cache_directory,
+                ro_cache_directories=ro_cache_directories,
+            )
+        else:
+            t_tree = parse_and_digest_groovy_file(
+                path,
+                cache_directory=cache_directory,
+                ro_cache_directories=ro_cache_directories,
+            )
+            if "rule" in t_tree:
+                processes, includes, workflows = extract_nextflow_features(
+                    cast("RuleNode", t_tree)
+                )
+            else:
+                processes = []
+                includes = []
+                workflows = []
+    except Exception as e:
+        return NfModuleNode(
+            path=path,
+            processes=[],
+            includes=[],
+            workflows=[],
+            error=f"{e.__class__.__name__}: {e}",
+        )
+
+    return NfModuleNode(
+        path=path,
+        processes=processes,
+        includes=includes,
+        workflows=workflows,
+    )
+
+
+def build_include_graph(
+    entry: "Union[str, os.PathLike[str]]",
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    max_workers: "Optional[int]" = None,
+    executor: "Optional[concurrent.futures.Executor]" = None,
+    use_scanner: "bool" = False,
+) -> "NfModuleGraph":
+    """
+    It builds the graph of modules of a pipeline, starting from its
+    entry point. Each module is analyzed in a worker process as soon as
+    an include declaration pointing to it is found. When no executor is
+    provided, a process pool using all the available cores is created.
+    """
+    logger = logging.getLogger(__name__)
+    entry_path = os.path.realpath(entry)
+
+    own_executor = executor is None
+    if executor is None:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    nodes: "MutableMapping[str, NfModuleNode]" = {}
+    edges: "MutableSequence[NfIncludeEdge]" = []
+    seen: "Set[str]" = {entry_path}
+    try:
+        pending = {
+            executor.submit(
+                analyze_nextflow_module,
+                entry_path,
+                cache_directory,
+                ro_cache_directories,
+                use_scanner,
+            )
+        }
+        while len(pending) > 0:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                node = future.result()
+                nodes[node.path] = node
+                if node.error is not None:
+                    logger.warning(f"Module {node.path} failed: {node.error}")
+
+                for include in node.includes:
+                    target = resolve_include_path(node.path, include.path)
+                    edges.append(
+                        NfIncludeEdge(
+                            source=node.path,
+                            include_path=include.path,
+                            target=target,
+                        )
+                    )
+                    if target is None:
+                        logger.debug(
+                            f"Unresolved include {include.path} from {node.path}"
+                        )
+                    elif target not in seen:
+                        seen.add(target)
+                        pending.add(
+                            executor.submit(
+                                analyze_nextflow_module,
+                                target,
+                                cache_directory,
+                                ro_cache_directories,
+                                use_scanner,
+                            )
+                        )
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+
+    # Results are sorted so they do not depend on the scheduling
+    return NfModuleGraph(
+        entry=entry_path,
+        nodes=dict(sorted(nodes.items())),
+        edges=sorted(edges),
+    )
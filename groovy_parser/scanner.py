@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Token level scanner of Nextflow sources. It recognizes the most common
+# shapes of include, process and workflow declarations (and container,
+# conda and template directives within processes) without running the
+# Earley parser. When it finds something it cannot classify with
+# confidence, it falls back to the full parser.
+
+import re
+
+from typing import (
+    cast,
+    NamedTuple,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    import os
+
+    from typing import (
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+    from lark.lexer import Token as LarkToken
+
+    from .parser import (
+        RuleNode,
+    )
+
+from pygments.token import Token
+
+from .lexer import (
+    FusedGroovyLexer,
+    GMAPPER,
+)
+from .nextflow import (
+    extract_nextflow_features,
+    NfInclude,
+    NfProcess,
+    NfWorkflow,
+)
+from .parser import (
+    parse_and_digest_groovy_content,
+)
+
+SCAN_PATH = "scan"
+PARSE_PATH = "parse"
+
+# Operators which, either ending a line or starting the next one,
+# could be continuing the very same statement
+CONTINUATION_TOKENS = frozenset(
+    ltok
+    for ltok in GMAPPER[Token.Operator].values()
+    if ltok
+    not in (
+        "LBRACE",
+        "RBRACE",
+        "LBRACK",
+        "RBRACK",
+        "LPAREN",
+        "RPAREN",
+        "SEMI",
+        "ARROW",
+    )
+)
+
+OPENING_TOKENS = {
+    "LBRACE": "RBRACE",
+    "LBRACK": "RBRACK",
+    "LPAREN": "RPAREN",
+}
+
+CLOSING_TOKENS = frozenset(OPENING_TOKENS.values())
+
+DECLARATION_KEYWORDS = frozenset(("include", "process", "workflow"))
+
+DIRECTIVE_KEYWORDS = frozenset(("container", "conda", "template"))
+
+# Tokens which can start the argument of a directive recognized
+# by the digested tree features extractor
+DIRECTIVE_ARGUMENT_START = frozenset(("STRING_LITERAL", "GSTRING_BEGIN", "LPAREN"))
+
+STRING_TOKENS = frozenset(("STRING_LITERAL", "STRING_LITERAL_PART"))
+
+NAME_TOKENS = frozenset(("IDENTIFIER", "CAPITALIZED_IDENTIFIER"))
+
+CONDA_SPLITTER = re.compile("[\t ]+")
+
+
+class NfScanUncertainError(Exception):
+    """
+    Raised when the token scanner finds a construction it cannot
+    classify with confidence
+    """
+
+    def __init__(self, reason: "str", line: "Optional[int]" = None):
+        super().__init__(reason if line is None else f"{reason} (line {line})")
+        self.reason = reason
+        self.line = line
+
+
+class NfScanResult(NamedTuple):
+    processes: "Sequence[NfProcess]"
+    includes: "Sequence[NfInclude]"
+    workflows: "Sequence[NfWorkflow]"
+    # Either SCAN_PATH or PARSE_PATH
+    path: "str"
+    # Why the scanner gave up, when it happened
+    reason: "Optional[str]" = None
+
+
+class NextflowTokenScanner:
+    """
+    State machine over the significant Lark tokens emitted by
+    FusedGroovyLexer. Newline tokens are not kept, but their
+    presence before each significant token is remembered, as
+    they are statement separators.
+    """
+
+    def __init__(self, content: "str"):
+        self.tokens: "MutableSequence[LarkToken]" = []
+        self.nl_before: "MutableSequence[bool]" = []
+        nl_seen = False
+        for tok in FusedGroovyLexer().lex(content):
+            if tok.type == "NL":
+                nl_seen = True
+            else:
+                self.tokens.append(tok)
+                self.nl_before.append(nl_seen)
+                nl_seen = False
+
+    def _uncertain(self, reason: "str", itok: "int") -> "NfScanUncertainError":
+        line = None
+        if itok < len(self.tokens):
+            line = self.tokens[itok].line
+        return NfScanUncertainError(reason, line)
+
+    def _value(self, itok: "int") -> "str":
+        return cast("str", self.tokens[itok].value[1])
+
+    def _is_statement_start(self, itok: "int", stack: "Sequence[str]") -> "bool":
+        # Statements only happen at the top level or inside blocks
+        if len(stack) > 0 and stack[-1] != "LBRACE":
+            return False
+
+        if itok == 0:
+            return True
+
+        prev = self.tokens[itok - 1]
+        if prev.type in ("SEMI", "LBRACE", "ARROW"):
+            return True
+
+        # Labels, like the ones in process declarations
+        if prev.type == "COLON" and prev.value[0] == Token.Name.Label:
+            return True
+
+        return self.nl_before[itok] and prev.type not in CONTINUATION_TOKENS
+
+    def _match_block(self, itok: "int") -> "int":
+        """
+        Given the index of an opening token, it returns the index
+        of its matching closing token
+        """
+        stack = [self.tokens[itok].type]
+        itok += 1
+        numtokens = len(self.tokens)
+        while itok < numtokens:
+            tok_type = self.tokens[itok].type
+            if tok_type in OPENING_TOKENS:
+                stack.append(tok_type)
+            elif tok_type in CLOSING_TOKENS:
+                if OPENING_TOKENS[stack.pop()] != tok_type:
+                    raise self._uncertain("Unbalanced brackets", itok)
+                if len(stack) == 0:
+                    return itok
+            elif tok_type == "SKIPPABLE":
+                raise self._uncertain("Unexpected token", itok)
+            itok += 1
+
+        raise self._uncertain("Unclosed block", itok)
+
+    def _statement_end(self, itok: "int") -> "int":
+        """
+        It returns the index just after the last token of the statement
+        which contains the token at itok
+        """
+        depth = 0
+        numtokens = len(self.tokens)
+        while itok < numtokens:
+            tok_type = self.tokens[itok].type
+            if tok_type in OPENING_TOKENS:
+                depth += 1
+            elif tok_type in CLOSING_TOKENS:
+                depth -= 1
+                if depth < 0:
+                    # Closing the enclosing block
+                    break
+            elif tok_type == "SKIPPABLE":
+                raise self._uncertain("Unexpected token", itok)
+
+            itok += 1
+            if depth == 0 and itok < numtokens:
+                if self.nl_before[itok] or self.tokens[itok].type == "SEMI":
+                    break
+
+        if self.tokens[itok - 1].type in CONTINUATION_TOKENS:
+            raise self._uncertain("Statement continues in next line", itok - 1)
+        if itok < numtokens and self.tokens[itok].type in CONTINUATION_TOKENS:
+            raise self._uncertain("Statement continued from previous line", itok)
+
+        return itok
+
+    def _strings(self, ifrom: "int", ito: "int") -> "Sequence[str]":
+        return [
+            self._value(itok)
+            for itok in range(ifrom, ito)
+            if self.tokens[itok].type in STRING_TOKENS
+        ]
+
+    def _scan_process(
+        self, itok: "int", iend: "int"
+    ) -> "Tuple[Sequence[str], Sequence[str], Sequence[str]]":
+        containers: "MutableSequence[str]" = []
+        condas: "MutableSequence[str]" = []
+        templates: "MutableSequence[str]" = []
+
+        # Entering the process body
+        stack = ["LBRACE"]
+        itok += 1
+        while itok < iend:
+            tok = self.tokens[itok]
+            if (
+                tok.type == "IDENTIFIER"
+                and self._value(itok) in DIRECTIVE_KEYWORDS
+                and self._is_statement_start(itok, stack)
+            ):
+                directive = self._value(itok)
+                if (
+                    itok + 1 >= iend
+                    or self.tokens[itok + 1].type not in DIRECTIVE_ARGUMENT_START
+                ):
+                    raise self._uncertain(f"Unexpected {directive} shape", itok)
+                inext = self._statement_end(itok + 1)
+                strings = self._strings(itok + 1, inext)
+                if directive == "container":
+                    containers.extend(
+                        s for s in strings if s not in ("singularity", "docker")
+                    )
+                elif directive == "conda":
+                    for conda_str in strings:
+                        condas.extend(CONDA_SPLITTER.split(conda_str))
+                else:
+                    templates.extend(strings)
+                itok = inext
+                continue
+
+            if tok.type in OPENING_TOKENS:
+                stack.append(tok.type)
+            elif tok.type in CLOSING_TOKENS:
+                stack.pop()
+            elif tok.type == "SKIPPABLE":
+                raise self._uncertain("Unexpected token", itok)
+            itok += 1
+
+        return containers, condas, templates
+
+    def scan(
+        self,
+    ) -> "Tuple[Sequence[NfProcess], Sequence[NfInclude], Sequence[NfWorkflow]]":
+        processes: "MutableSequence[NfProcess]" = []
+        includes: "MutableSequence[NfInclude]" = []
+        workflows: "MutableSequence[NfWorkflow]" = []
+
+        stack: "MutableSequence[str]" = []
+        numtokens = len(self.tokens)
+        itok = 0
+        while itok < numtokens:
+            tok = self.tokens[itok]
+            tok_type = tok.type
+            if tok_type == "IDENTIFIER" and self._value(itok) in DECLARATION_KEYWORDS:
+                keyword = self._value(itok)
+                if self._is_statement_start(itok, stack):
+                    if len(stack) > 0:
+                        raise self._uncertain(f"Nested {keyword}", itok)
+
+                    next_types = [t.type for t in self.tokens[itok + 1 : itok + 5]]
+                    if keyword == "process":
+                        if (
+                            len(next_types) < 2
+                            or next_types[0] not in NAME_TOKENS
+                            or next_types[1] != "LBRACE"
+                            or self.nl_before[itok + 2]
+                        ):
+                            raise self._uncertain("Unexpected process shape", itok)
+
+                        iend = self._match_block(itok + 2)
+                        containers, condas, templates = self._scan_process(
+                            itok + 2, iend
+                        )
+                        processes.append(
+                            NfProcess(
+                                name=self._value(itok + 1),
+                                containers=containers,
+                                condas=condas,
+                                templates=templates,
+                            )
+                        )
+                    elif keyword == "workflow":
+                        if len(next_types) > 0 and next_types[0] == "LBRACE":
+                            name = None
+                            iblock = itok + 1
+                        elif (
+                            len(next_types) > 1
+                            and next_types[0] in NAME_TOKENS
+                            and next_types[1] == "LBRACE"
+                        ):
+                            name = self._value(itok + 1)
+                            iblock = itok + 2
+                        else:
+                            raise self._uncertain("Unexpected workflow shape", itok)
+                        if self.nl_before[iblock]:
+                            raise self._uncertain("Unexpected workflow shape", itok)
+
+                        iend = self._match_block(iblock)
+                        workflows.append(NfWorkflow(name=name))
+                    else:
+                        if len(next_types) == 0 or next_types[0] != "LBRACE":
+                            raise self._uncertain("Unexpected include shape", itok)
+                        ifrom = self._match_block(itok + 1) + 1
+                        if (
+                            ifrom >= numtokens
+                            or self.tokens[ifrom].type != "IDENTIFIER"
+                            or self._value(ifrom) != "from"
+                        ):
+                            raise self._uncertain("Unexpected include shape", itok)
+                        iend = self._statement_end(ifrom + 1) - 1
+                        path_types = [t.type for t in self.tokens[ifrom + 1 : iend + 1]]
+                        if path_types != ["STRING_LITERAL"] and (
+                            len(path_types) < 2
+                            or path_types[0] != "GSTRING_BEGIN"
+                            or path_types[-1] != "GSTRING_END"
+                            or any(t != "STRING_LITERAL_PART" for t in path_types[1:-1])
+                        ):
+                            raise self._uncertain("Unexpected include path", itok)
+                        includes.extend(
+                            NfInclude(path=path)
+                            for path in self._strings(ifrom + 1, iend + 1)
+                        )
+
+                    itok = iend + 1
+                    continue
+                elif self.nl_before[itok] or (
+                    itok > 0 and self.tokens[itok - 1].type == "RBRACE"
+                ):
+                    raise self._uncertain(f"Ambiguous {keyword}", itok)
+
+            if tok_type in OPENING_TOKENS:
+                stack.append(tok_type)
+            elif tok_type in CLOSING_TOKENS:
+                if len(stack) == 0 or OPENING_TOKENS[stack.pop()] != tok_type:
+                    raise self._uncertain("Unbalanced brackets", itok)
+            elif tok_type == "SKIPPABLE":
+                raise self._uncertain("Unexpected token", itok)
+            itok += 1
+
+        return processes, includes, workflows
+
+
+def scan_nextflow_content(
+    content: "str",
+    fallback: "bool" = True,
+    ro_cache_directories: "Optional[Sequence[Union[str, os.PathLike[str]]]]" = None,
+    cache_directory: "Optional[Union[str, os.PathLike[str]]]" = None,
+) -> "NfScanResult":
+    """
+    It extracts the Nextflow features (processes, includes and workflows)
+    from the content. The token scanner is tried first, and the full
+    parser (and its cache) is only used when the scanner is not confident
+    about its results. When fallback is disabled, NfScanUncertainError
+    is raised instead.
+    """
+    try:
+        processes, includes, workflows = NextflowTokenScanner(content).scan()
+        return NfScanResult(
+            processes=processes,
+            includes=includes,
+            workflows=workflows,
+            path=SCAN_PATH,
+        )
+    except NfScanUncertainError as nsue:
+        if not fallback:
+            raise nsue
+        reason = str(nsue)
+
+    t_tree = parse_and_digest_groovy_content(
+        content,
+        cache_directory=cache_directory,
+        ro_cache_directories=ro_cache_directories,
+    )
+    if "rule" in t_tree:
+        processes, includes, workflows = extract_nextflow_features(
+            cast("RuleNode", t_tree)
+        )
+    else:
+        processes = []
+        includes = []
+        workflows = []
+
+    return NfScanResult(
+        processes=processes,
+        includes=includes,
+        workflows=workflows,
+        path=PARSE_PATH,
+        reason=reason,
+    )
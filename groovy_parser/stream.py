@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: Apache-2.0
+# Copyright (C) 2025 Barcelona Supercomputing Center, José M. Fernández
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Streaming digestion of large contents, one top level statement at a
+# time, so neither the whole parse tree nor the whole digested tree
+# are ever kept in memory
+
+import itertools
+import json
+
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        IO,
+        Iterable,
+        Iterator,
+        MutableSequence,
+        Optional,
+        Sequence,
+        Tuple,
+        Union,
+    )
+
+    from lark.lexer import Token as LarkToken
+
+    from .parser import (
+        EmptyNode,
+        GroovyParseStats,
+        LeafNode,
+        RuleNode,
+    )
+
+from .memo import (
+    _JOINING_TERMINALS,
+    _parse_statements,
+    _token_span,
+)
+from .parser import (
+    _phase,
+    digest_groovy_content,
+)
+
+# Number of tokens parsed at once. Larger windows mean less parser calls,
+# and less statements parsed twice (the last one of each window is parsed
+# again within the next one), but a larger Earley chart in memory
+DEFAULT_WINDOW_TOKENS = 512
+
+# The root of a digested content made only of script statements
+STATEMENTS_ROOT_RULE = ["compilation_unit", "script_statements"]
+
+
+def _iter_units(
+    lark_tokens: "Iterable[LarkToken]",
+) -> "Iterator[MutableSequence[LarkToken]]":
+    """
+    Incremental counterpart of memo.split_top_level_statements, which
+    yields the tokens of each candidate top level statement along with
+    its trailing separators, as they are lexed
+    """
+    from .lexer import (
+        _CLOSING_TERMINALS,
+        _OPENING_TERMINALS,
+        SEPARATOR_TERMINALS,
+    )
+
+    unit: "MutableSequence[LarkToken]" = []
+    depth = 0
+    after_separator = False
+    for tok in lark_tokens:
+        if after_separator and tok.type not in SEPARATOR_TERMINALS:
+            after_separator = False
+            if tok.type not in _JOINING_TERMINALS:
+                # Runs made only of separators are not statements
+                if any(u_tok.type not in SEPARATOR_TERMINALS for u_tok in unit):
+                    yield unit
+                unit = []
+        unit.append(tok)
+        if tok.type in _OPENING_TERMINALS:
+            depth += 1
+        elif tok.type in _CLOSING_TERMINALS:
+            # Unbalanced closings are the parser problem
+            if depth > 0:
+                depth -= 1
+        elif depth == 0 and tok.type in SEPARATOR_TERMINALS:
+            after_separator = True
+
+    if any(u_tok.type not in SEPARATOR_TERMINALS for u_tok in unit):
+        yield unit
+
+
+def _stream_statements(
+    units: "Iterator[MutableSequence[LarkToken]]",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+    stats: "Optional[GroovyParseStats]",
+    window_tokens: "int",
+) -> "Iterator[Union[RuleNode, LeafNode, EmptyNode]]":
+    from .grammar import (
+        get_inlined_groovy_parser,
+        LarkFilteringTreeEncoder,
+    )
+    from .lexer import SEPARATOR_TERMINALS
+
+    encoder = LarkFilteringTreeEncoder()
+    window: "MutableSequence[MutableSequence[LarkToken]]" = []
+    num_tokens = 0
+    target = window_tokens
+    exhausted = False
+    while not exhausted:
+        unit = next(units, None)
+        if unit is None:
+            exhausted = True
+            if len(window) == 0:
+                break
+        else:
+            window.append(unit)
+            num_tokens += len(unit)
+            if num_tokens < target:
+                continue
+
+        run_tokens = [tok for w_unit in window for tok in w_unit]
+        while run_tokens[-1].type in SEPARATOR_TERMINALS:
+            run_tokens.pop()
+        with _phase(stats, "parse"):
+            statements = _parse_statements(run_tokens, prune, noflat)
+
+        # The statements must cover the whole window, and the last one
+        # has to start where a unit does, as it is kept for the next
+        # window, in case the next units are its continuation
+        unit_starts = {
+            w_unit[0].start_pos: i_unit for i_unit, w_unit in enumerate(window)
+        }
+        i_last: "Optional[int]" = None
+        if statements is not None and len(statements) > 0:
+            first_span = _token_span(statements[0])
+            last_span = _token_span(statements[-1])
+            if (
+                first_span is not None
+                and last_span is not None
+                and first_span[0] == run_tokens[0].start_pos
+                and last_span[1] == run_tokens[-1].end_pos
+            ):
+                i_last = unit_starts.get(last_span[0])
+
+        if i_last is None:
+            if exhausted:
+                # The error is raised from the whole window
+                with _phase(stats, "parse"):
+                    get_inlined_groovy_parser(tuple(prune), tuple(noflat)).parse(
+                        run_tokens  # type: ignore[arg-type]
+                    )
+                raise ValueError("The statements of the content are not aligned")
+            # Maybe the next units complete the window
+            target = 2 * num_tokens
+            continue
+
+        assert statements is not None
+        to_emit = statements if exhausted else statements[:-1]
+        with _phase(stats, "digest"):
+            digested = [
+                encoder.default(statement, prune=prune, noflat=noflat)
+                for statement in to_emit
+            ]
+        # Releasing the parse tree before the digested statements
+        # are consumed
+        del statements, to_emit, run_tokens
+        yield from digested
+        del digested
+
+        window = window[i_last:]
+        num_tokens = sum(len(w_unit) for w_unit in window)
+        target = num_tokens + window_tokens
+
+
+def _streamed_statements(
+    content: "str",
+    prune: "Sequence[str]",
+    noflat: "Sequence[str]",
+    stats: "Optional[GroovyParseStats]",
+    window_tokens: "int",
+) -> "Optional[Iterator[Union[RuleNode, LeafNode, EmptyNode]]]":
+    """
+    The iterator over the digested statements, or None when the
+    content cannot be streamed
+    """
+    from .lexer import (
+        FusedGroovyLexer,
+        SEPARATOR_TERMINALS,
+    )
+
+    # Only the digested trees whose statements are kept apart can be
+    # streamed
+    if "script_statement" not in noflat:
+        return None
+
+    lexer = FusedGroovyLexer()
+    lark_tokens = iter(lexer.lex(content))
+    first_token = next(
+        (tok for tok in lark_tokens if tok.type not in SEPARATOR_TERMINALS), None
+    )
+    # The package declaration changes the shape of the digested tree
+    if first_token is None or first_token.type == "PACKAGE":
+        return None
+
+    def _counted() -> "Iterator[LarkToken]":
+        num_tokens = 0
+        for tok in itertools.chain([first_token], lark_tokens):
+            num_tokens += 1
+            yield tok
+        if stats is not None:
+            stats.tokenizer_tokens = lexer.tokenizer_tokens
+            stats.preprocessed_tokens = lexer.preprocessed_tokens
+            stats.lexer_tokens = num_tokens
+
+    return _stream_statements(
+        _iter_units(_counted()), prune, noflat, stats, window_tokens
+    )
+
+
+def _top_level_children(
+    t_tree: "Union[RuleNode, LeafNode, EmptyNode]",
+) -> "Iterator[Union[RuleNode, LeafNode, EmptyNode]]":
+    children = cast("RuleNode", t_tree).get("children")
+    if children is None:
+        return
+    if cast("RuleNode", t_tree)["rule"][-1:] == ["script_statements"]:
+        yield from children
+        return
+    for child in children:
+        if cast("RuleNode", child).get("rule") == ["script_statements"]:
+            yield from cast("RuleNode", child)["children"]
+        else:
+            yield child
+
+
+def iter_digested_statements(
+    content: "str",
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    window_tokens: "int" = DEFAULT_WINDOW_TOKENS,
+) -> "Iterator[Union[RuleNode, LeafNode, EmptyNode]]":
+    """
+    It yields the digested top level statements of the content, the
+    same ones digest_groovy_content would give. The content is lexed
+    and parsed as they are consumed, in windows of about window_tokens
+    tokens, so each statement can be collected once it is consumed.
+    Contents which cannot be streamed, like the ones with a package
+    declaration (which is yielded first), are fully parsed.
+    """
+    statements = _streamed_statements(content, prune, noflat, stats, window_tokens)
+    if statements is None:
+        yield from _top_level_children(
+            digest_groovy_content(content, prune=prune, noflat=noflat, stats=stats)
+        )
+    else:
+        yield from statements
+
+
+def write_digested_statements(
+    content: "str",
+    out: "IO[str]",
+    prune: "Sequence[str]" = ["sep", "nls"],
+    noflat: "Sequence[str]" = ["script_statement"],
+    stats: "Optional[GroovyParseStats]" = None,
+    window_tokens: "int" = DEFAULT_WINDOW_TOKENS,
+    separators: "Tuple[str, str]" = (", ", ": "),
+) -> "int":
+    """
+    It writes the digested tree of the content as JSON, the very same
+    json.dump would write from digest_groovy_content, but each statement
+    is written as soon as it is digested. It returns the number of
+    written statements.
+    """
+    statements = _streamed_statements(content, prune, noflat, stats, window_tokens)
+    if statements is None:
+        t_tree = digest_groovy_content(content, prune=prune, noflat=noflat, stats=stats)
+        json.dump(t_tree, out, separators=separators)
+        return sum(1 for _ in _top_level_children(t_tree))
+
+    item_separator, key_separator = separators
+    # The same key order the encoder uses
+    out.write(
+        "{"
+        + json.dumps("rule")
+        + key_separator
+        + json.dumps(STATEMENTS_ROOT_RULE, separators=separators)
+        + item_separator
+        + json.dumps("children")
+        + key_separator
+        + "["
+    )
+    num_statements = 0
+    for statement in statements:
+        if num_statements > 0:
+            out.write(item_separator)
+        json.dump(statement, out, separators=separators)
+        num_statements += 1
+    out.write("]}")
+
+    return num_statements
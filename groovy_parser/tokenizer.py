@@ -29,7 +29,23 @@
 """
 
 import re
-from typing import cast
+from typing import (
+    cast,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        ClassVar,
+        FrozenSet,
+        Iterator,
+        List,
+        Mapping,
+        Optional,
+        Sequence,
+        Tuple,
+    )
 
 from pygments.lexer import (
     Lexer,
@@ -43,6 +59,8 @@ from pygments.lexer import (
     words,
 )
 from pygments.token import (
+    _TokenType,
+    Error,
     Text,
     Comment,
     Operator,
@@ -55,7 +73,10 @@ from pygments.token import (
 )
 from pygments.util import shebang_matches
 
-__all__ = ["GroovyRestrictedTokenizer"]
+__all__ = [
+    "CombinedGroovyRestrictedTokenizer",
+    "GroovyRestrictedTokenizer",
+]
 
 
 class GroovyRestrictedTokenizer(RegexLexer):
@@ -244,3 +265,150 @@ class GroovyRestrictedTokenizer(RegexLexer):
     @staticmethod
     def analyse_text(text: "str") -> "bool":
         return cast("bool", shebang_matches(text, r"groovy"))  # type: ignore[no-untyped-call, redundant-cast]
+
+
+class _OffsetMatch:
+    """
+    The match of a single rule within a combined regular expression,
+    as the callbacks of the rules (i.e. bygroups) expect it
+    """
+
+    __slots__ = ("match", "base")
+
+    def __init__(self, match: "re.Match[str]", base: "int"):
+        self.match = match
+        self.base = base
+
+    def group(self, idx: "int" = 0) -> "Optional[str]":
+        return self.match.group(self.base + idx)
+
+    def start(self, idx: "int" = 0) -> "int":
+        return self.match.start(self.base + idx)
+
+    def end(self, idx: "int" = 0) -> "int":
+        return self.match.end(self.base + idx)
+
+
+class CombinedGroovyRestrictedTokenizer(GroovyRestrictedTokenizer):
+    """
+    The very same tokenizer, but the rules of each state are compiled
+    into a single alternation, where each rule is a group. As Python
+    regular expressions try the alternatives in order, the first rule
+    which matches wins, as it happens in RegexLexer, but only one
+    match call per token is needed.
+    """
+
+    # For each state, the combined expression and, for each group
+    # index, the group where the rule starts, its action, its new state
+    # and whether it is silenced
+    _combined: "ClassVar[Mapping[str, Tuple[re.Pattern[str], Sequence[Optional[Tuple[int, Any, Any, Optional[FrozenSet[str]]]]]]]]"
+
+    # Token types (and their descendants) whose matches are consumed
+    # without being emitted, except the single characters in the set.
+    # A None value stops the search for an ancestor.
+    silenced: "ClassVar[Mapping[_TokenType, Optional[FrozenSet[str]]]]" = {}
+
+    @classmethod
+    def _combine_states(
+        cls,
+    ) -> "Mapping[str, Tuple[re.Pattern[str], Sequence[Optional[Tuple[int, Any, Any, Optional[FrozenSet[str]]]]]]]":
+        expected_flags = re.compile("", cls.flags).flags
+        combined = {}
+        for state, statetokens in cls._tokens.items():  # type: ignore[attr-defined]
+            alternatives = []
+            rules: "List[Optional[Tuple[int, Any, Any, Optional[FrozenSet[str]]]]]" = [
+                None
+            ]
+            for rexmatch, action, new_state in statetokens:
+                pattern = rexmatch.__self__
+                # default() rules are compiled without flags
+                if pattern.pattern != "" and pattern.flags != expected_flags:
+                    raise ValueError(
+                        f"Rule {pattern.pattern!r} from state {state} cannot be combined, as it has its own flags"
+                    )
+                kept: "Optional[FrozenSet[str]]" = None
+                if type(action) is _TokenType:
+                    token_type: "Optional[_TokenType]" = action
+                    while token_type is not None:
+                        if token_type in cls.silenced:
+                            kept = cls.silenced[token_type]
+                            break
+                        token_type = token_type.parent
+                base = len(rules)
+                alternatives.append("(" + pattern.pattern + ")")
+                rules.append((base, action, new_state, kept))
+                rules.extend([None] * pattern.groups)
+            combined[state] = (re.compile("|".join(alternatives), cls.flags), rules)
+
+        return combined
+
+    def get_tokens_unprocessed(  # type: ignore[override]
+        self,
+        text: "str",
+        stack: "Sequence[str]" = ("root",),
+    ) -> "Iterator[Tuple[int, _TokenType, str]]":
+        cls = type(self)
+        if "_combined" not in cls.__dict__:
+            cls._combined = cls._combine_states()
+        combined = cls._combined
+
+        # Matches consumed without being emitted
+        self.silenced_tokens = 0
+
+        pos = 0
+        statestack = list(stack)
+        regex, rules = combined[statestack[-1]]
+        while True:
+            m = regex.match(text, pos)
+            if m is not None:
+                # The group of the rule is the last one to be closed
+                base, action, new_state, kept = cast(
+                    "Tuple[int, Any, Any, Optional[FrozenSet[str]]]",
+                    rules[cast("int", m.lastindex)],
+                )
+                if action is not None:
+                    if kept is not None:
+                        if m.end() == pos + 1 and text[pos] in kept:
+                            yield pos, action, text[pos]
+                        else:
+                            self.silenced_tokens += 1
+                    elif type(action) is _TokenType:
+                        yield pos, action, m.group(base)
+                    else:
+                        yield from action(self, _OffsetMatch(m, base))
+                pos = m.end()
+                if new_state is not None:
+                    # Same state transitions as RegexLexer
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == "#pop":
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == "#push":
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == "#push":
+                        statestack.append(statestack[-1])
+                    else:
+                        assert False, f"wrong state def: {new_state!r}"
+                    regex, rules = combined[statestack[-1]]
+            else:
+                # Same recovery as RegexLexer
+                try:
+                    if text[pos] == "\n":
+                        # at EOL, reset state to "root"
+                        statestack = ["root"]
+                        regex, rules = combined["root"]
+                        yield pos, Whitespace, "\n"
+                        pos += 1
+                        continue
+                    yield pos, Error, text[pos]
+                    pos += 1
+                except IndexError:
+                    break
@@ -17,6 +17,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
 import json
 import logging
 import os
@@ -48,6 +49,10 @@ if TYPE_CHECKING:
 
 from pygments.token import Token
 
+from groovy_parser.cst import (
+    parse_groovy_cst,
+    write_groovy_cst,
+)
 from groovy_parser.parser import (
     parse_groovy_content,
     digest_lark_tree,
@@ -103,7 +108,7 @@ def write_groovy(
             prev_wants_space = wants_space
 
 
-def mirror_groovy_source(
+def mirror_digested_groovy_source(
     filename: "str", jsonfile: "str", mirror_filename: "str"
 ) -> "Union[RuleNode, LeafNode, EmptyNode]":
     with open(filename, mode="r", encoding="utf-8") as wfH:
@@ -126,12 +131,31 @@ def mirror_groovy_source(
     return t_tree
 
 
+def mirror_groovy_source(filename: "str", mirror_filename: "str") -> "int":
+    # newline="" keeps the line endings, so the mirror is exact
+    with open(filename, mode="r", encoding="utf-8", newline="") as wfH:
+        content = wfH.read()
+
+    cst = parse_groovy_cst(content)
+
+    with open(mirror_filename, mode="w", encoding="utf-8", newline="") as mH:
+        return write_groovy_cst(cst, mH)
+
+
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.DEBUG,
     )
     log = logging.getLogger()  # root logger
-    for filename in sys.argv[1:]:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--digested",
+        action="store_true",
+        help="Write back from the digested tree, which loses the comments and most of the whitespaces",
+    )
+    ap.add_argument("filenames", nargs="*")
+    args = ap.parse_args()
+    for filename in args.filenames:
         print(f"* Parsing {filename}")
         logfile = filename + ".lark"
         jsonfile = logfile + ".json"
@@ -141,7 +165,10 @@ if __name__ == "__main__":
             log.removeHandler(hdlr)
         log.addHandler(fH)  # set the new handler
         try:
-            mirror_groovy_source(filename, jsonfile, mirrored_filename)
+            if args.digested:
+                mirror_digested_groovy_source(filename, jsonfile, mirrored_filename)
+            else:
+                mirror_groovy_source(filename, mirrored_filename)
         except Exception as e:
             print(f"\tParse failed, see {logfile}")
             logging.exception("Parse failed")
@@ -59,7 +59,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/inab/python-groovy-parser",
     project_urls={"Bug Tracker": "https://github.com/inab/python-groovy-parser/issues"},
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["benchmarks", "benchmarks.*"]),
     package_data={
         "groovy_parser": [
             "py.typed",
@@ -70,6 +70,11 @@ setuptools.setup(
         "cached-translated-groovy3-parser.py",
         "translated-groovy3-parser.py",
     ],
+    entry_points={
+        "console_scripts": [
+            "groovy-parser = groovy_parser.cli:main",
+        ],
+    },
     install_requires=requirements,
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -47,6 +47,9 @@ if TYPE_CHECKING:
 
 from pygments.token import Token
 
+from groovy_parser.nextflow import (
+    extract_nextflow_features,
+)
 from groovy_parser.parser import (
     parse_groovy_content,
     digest_lark_tree,
@@ -60,302 +63,6 @@ from lark import (
 from lark.visitors import Discard
 
 
-# FilteredOutTokens = (
-#    Token.Comment,
-#    Token.Comments,
-#    Token.Generic,
-#    Token.Other,
-# )
-
-
-ROOT_RULE = ["compilation_unit", "script_statements"]
-
-INCLUDE_PROCESS_RULE = [
-    #    "script_statement",
-    "statement",
-    "statement_expression",
-    "command_expression",
-]
-
-IDENTIFIER_RULE = ["primary", "identifier"]
-
-PRE_IDENTIFIER_NAME = [
-    "expression",
-    "postfix_expression",
-    "path_expression",
-]
-
-
-PROCESS_CHILD = {"leaf": "IDENTIFIER", "value": "process"}
-
-INCLUDE_CHILD = {"leaf": "IDENTIFIER", "value": "include"}
-
-WORKFLOW_CHILD = {"leaf": "IDENTIFIER", "value": "workflow"}
-
-
-CONTAINER_CHILD = {"leaf": "IDENTIFIER", "value": "container"}
-
-CONDA_CHILD = {"leaf": "IDENTIFIER", "value": "conda"}
-
-TEMPLATE_CHILD = {"leaf": "IDENTIFIER", "value": "template"}
-
-
-P_RULE = [
-    "argument_list",
-    "first_argument_list_element",
-    "expression_list_element",
-    "expression",
-    "postfix_expression",
-    "path_expression",
-]
-
-W_RULE = [
-    "argument_list",
-    "first_argument_list_element",
-    "expression_list_element",
-    "expression",
-    "postfix_expression",
-    "path_expression",
-]
-
-NAMELESS_W_RULE = [
-    "argument_list",
-    "first_argument_list_element",
-    "expression_list_element",
-    "expression",
-    "postfix_expression",
-    "path_expression",
-    "primary",
-    "closure_or_lambda_expression",
-    "closure",
-]
-
-
-def extract_strings(node: "Union[EmptyNode, LeafNode, RuleNode]") -> "Iterator[str]":
-    leaf_type = node.get("leaf")
-    if leaf_type is not None:
-        lnode = cast("LeafNode", node)
-        if leaf_type in ("STRING_LITERAL", "STRING_LITERAL_PART"):
-            yield lnode["value"]
-    else:
-        children = node.get("children")
-        if isinstance(children, list):
-            for child in children:
-                yield from extract_strings(child)
-
-
-class NfProcess(NamedTuple):
-    name: "str"
-    containers: "Sequence[str]"
-    condas: "Sequence[str]"
-    templates: "Sequence[str]"
-
-
-def extract_nextflow_containers(
-    node: "Union[EmptyNode, LeafNode, RuleNode]",
-) -> "Iterator[str]":
-    # return [ node ]
-    yield from filter(
-        lambda s: s not in ("singularity", "docker"), extract_strings(node)
-    )
-
-
-def extract_nextflow_condas(
-    node: "Union[EmptyNode, LeafNode, RuleNode]",
-) -> "Iterator[str]":
-    # return [ node ]
-    spsplt = re.compile("[\t ]+")
-    for conda_str in extract_strings(node):
-        yield from spsplt.split(conda_str)
-
-
-def extract_nextflow_templates(
-    node: "Union[EmptyNode, LeafNode, RuleNode]",
-) -> "Iterator[str]":
-    # return [ node ]
-    yield from extract_strings(node)
-
-
-def extract_process_features(
-    t_tree: "RuleNode",
-) -> "Tuple[Sequence[str], Sequence[str], Sequence[str]]":
-    templates: "MutableSequence[str]" = []
-    containers: "MutableSequence[str]" = []
-    condas: "MutableSequence[str]" = []
-
-    # First, sanity check
-    # root_rule = t_tree.get("rule")
-    # if root_rule[-len(ROOT_RULE):] == ROOT_RULE:
-
-    # Now, capture what it is interesting
-    for child in t_tree["children"]:
-        if "rule" in child:
-            r_child = cast("RuleNode", child)
-            child_rule = r_child["rule"]
-            unprocessed = True
-            if child_rule[-len(INCLUDE_PROCESS_RULE) :] == INCLUDE_PROCESS_RULE:
-                # Save the process
-                c_children = r_child["children"]
-                c_children_0 = cast("RuleNode", c_children[0])
-                c_children_0_rule = c_children_0.get("rule")
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(PRE_IDENTIFIER_NAME) :]
-                    == PRE_IDENTIFIER_NAME
-                ):
-                    c_children_0 = cast("RuleNode", c_children_0["children"][0])
-                    c_children_0_rule = c_children_0.get("rule")
-
-                # This is needed to re-evaluate
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(IDENTIFIER_RULE) :] == IDENTIFIER_RULE
-                ):
-                    c_children_0_children = c_children_0["children"]
-
-                    if c_children_0_children[0] == CONTAINER_CHILD:
-                        containers.extend(extract_nextflow_containers(c_children[1]))
-                        unprocessed = False
-                    elif c_children_0_children[0] == CONDA_CHILD:
-                        # both named and nameless workflows
-                        condas.extend(extract_nextflow_condas(c_children[1]))
-                        unprocessed = False
-                    elif c_children_0_children[0] == TEMPLATE_CHILD:
-                        templates.extend(extract_nextflow_templates(c_children[-1]))
-                        unprocessed = False
-
-            if unprocessed:
-                c_containers, c_condas, c_templates = extract_process_features(r_child)
-                containers.extend(c_containers)
-                condas.extend(c_condas)
-                templates.extend(c_templates)
-
-    return containers, condas, templates
-
-
-def extract_nextflow_process(node: "RuleNode") -> "NfProcess":
-    p_rule = node.get("rule")
-    process_name = "<error>"
-    templates: "Sequence[str]" = []
-    containers: "Sequence[str]" = []
-    condas: "Sequence[str]" = []
-    if p_rule == P_RULE:
-        p_c_children = node["children"]
-        assert len(p_c_children) > 0
-        assert "children" in p_c_children[0]
-        pro_node = cast("RuleNode", p_c_children[0])
-        assert len(pro_node["children"]) > 0
-        assert "value" in pro_node["children"][0]
-        process_name = cast("LeafNode", pro_node["children"][0])["value"]
-        process_body = cast("RuleNode", p_c_children[1])
-        containers, condas, templates = extract_process_features(process_body)
-    return NfProcess(
-        name=process_name,
-        templates=templates,
-        containers=containers,
-        condas=condas,
-    )
-
-
-class NfInclude(NamedTuple):
-    path: "str"
-
-
-def extract_nextflow_includes(node: "RuleNode") -> "Sequence[NfInclude]":
-    # return [ node ]
-    return [
-        NfInclude(
-            path=path,
-        )
-        for path in extract_strings(node)
-    ]
-
-
-class NfWorkflow(NamedTuple):
-    name: "Optional[str]"
-
-
-def extract_nextflow_workflow(node: "RuleNode") -> "NfWorkflow":
-    nodes = None
-    name = None
-    if node["rule"] == W_RULE:
-        assert len(node["children"]) > 1
-        name = cast("LeafNode", cast("RuleNode", node["children"][0])["children"][0])[
-            "value"
-        ]
-        nodes = cast("RuleNode", node["children"][1])["children"]
-    elif node["rule"] == NAMELESS_W_RULE:
-        nodes = node["children"]
-
-    return NfWorkflow(
-        name=name,
-    )
-
-
-def extract_nextflow_features(
-    t_tree: "RuleNode",
-) -> "Tuple[Sequence[NfProcess], Sequence[NfInclude], Sequence[NfWorkflow]]":
-    processes: "MutableSequence[NfProcess]" = []
-    includes: "MutableSequence[NfInclude]" = []
-    workflows: "MutableSequence[NfWorkflow]" = []
-
-    # First, sanity check
-    # root_rule = t_tree.get("rule")
-    # if root_rule[-len(ROOT_RULE):] == ROOT_RULE:
-
-    # Now, capture what it is interesting
-    for a_child in t_tree["children"]:
-        if "rule" in a_child:
-            child = cast("RuleNode", a_child)
-            child_rule = child["rule"]
-
-            unprocessed = True
-            if child_rule[-len(INCLUDE_PROCESS_RULE) :] == INCLUDE_PROCESS_RULE:
-                # Save the process
-                c_children = child["children"]
-                c_children_0 = cast("RuleNode", c_children[0])
-                c_children_0_rule = c_children_0.get("rule")
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(PRE_IDENTIFIER_NAME) :]
-                    == PRE_IDENTIFIER_NAME
-                ):
-                    c_children_0 = cast("RuleNode", c_children_0["children"][0])
-                    c_children_0_rule = c_children_0.get("rule")
-
-                # This is needed to re-evaluate
-                if (
-                    c_children_0_rule is not None
-                    and c_children_0_rule[-len(IDENTIFIER_RULE) :] == IDENTIFIER_RULE
-                ):
-                    c_children_0_children = c_children_0["children"]
-
-                    if c_children_0_children[0] == PROCESS_CHILD:
-                        processes.append(
-                            extract_nextflow_process(cast("RuleNode", c_children[1]))
-                        )
-                        unprocessed = False
-                    elif c_children_0_children[0] == WORKFLOW_CHILD:
-                        # both named and nameless workflows
-                        workflows.append(
-                            extract_nextflow_workflow(cast("RuleNode", c_children[1]))
-                        )
-                        unprocessed = False
-                    elif c_children_0_children[0] == INCLUDE_CHILD:
-                        includes.extend(
-                            extract_nextflow_includes(cast("RuleNode", c_children[-1]))
-                        )
-                        unprocessed = False
-
-            if unprocessed:
-                c_processes, c_includes, c_workflows = extract_nextflow_features(child)
-                processes.extend(c_processes)
-                includes.extend(c_includes)
-                workflows.extend(c_workflows)
-
-    return processes, includes, workflows
-
-
 def analyze_nf_source(
     filename: "str", jsonfile: "str", resultfile: "str"
 ) -> "Union[RuleNode, LeafNode, EmptyNode]":